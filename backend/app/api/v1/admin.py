@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.db.repositories.claim_repo import ClaimRepository
+from app.dependencies import require_admin
+from app.jobs.backfill import (
+    BackfillRunningError,
+    backfill_running,
+    create_backfill_job,
+    load_checkpoint,
+)
+from app.schemas.admin import BackfillRequest, DecisionSimulationRequest, ReportExportRequest
+from app.services.decision_simulator import get_decision_simulator, threshold_grid
+from app.services.report_export import ReportExporter
+from app.utils.background import spawn
+from app.utils.logger import logger
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.post("/reports/export")
+async def export_reports(
+    req: ReportExportRequest,
+    current_user: dict = Depends(require_admin),
+):
+    """Stream a ZIP of claim PDF reports, selected by ``claim_ids`` or by filters.
+
+    Filters match processed claims only. Requested claims that are missing or
+    not processed are listed in ``export_errors.txt`` inside the archive.
+    """
+    logger.info(
+        f"Admin {current_user['id']} exporting reports: "
+        + (f"{len(req.claim_ids)} ids" if req.claim_ids else f"filters {req.model_dump(exclude_none=True)}")
+    )
+    exporter = ReportExporter(claim_repo=ClaimRepository())
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        exporter.stream_zip(req),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=ClaimIQ_Reports_{stamp}.zip"},
+    )
+
+
+@router.post("/backfill", status_code=status.HTTP_202_ACCEPTED)
+async def start_backfill(
+    req: BackfillRequest,
+    current_user: dict = Depends(require_admin),
+):
+    """Start re-pricing / re-deciding processed claims in the background.
+
+    Resumes from the checkpoint of an unfinished run unless ``restart`` is set.
+    """
+    job = create_backfill_job(batch_size=req.batch_size, dry_run=req.dry_run)
+    try:
+        # Taken before responding, so a run already going in any process is a 409
+        job.acquire()
+    except BackfillRunningError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    logger.info(f"Admin {current_user['id']} started backfill: {req.model_dump()}")
+    spawn(job.run(restart=req.restart), name="backfill")
+    return {"running": True, "progress": load_checkpoint()}
+
+
+@router.get("/backfill")
+async def backfill_status(current_user: dict = Depends(require_admin)):
+    """Progress of the current (or last checkpointed) backfill run."""
+    # From the lock and the checkpoint file, so every worker reports the same run
+    return {"running": backfill_running(), "progress": load_checkpoint()}
+
+
+@router.post("/decisions/simulate")
+async def simulate_decisions(
+    req: DecisionSimulationRequest,
+    current_user: dict = Depends(require_admin),
+):
+    """Decision rates and cost totals over all processed claims for each threshold setting.
+
+    The claims are loaded once and reused for DECISION_SIMULATION_CACHE_SECONDS,
+    so a run of what-if requests doesn't re-read the table each time.
+    """
+    grid = threshold_grid(**req.model_dump())
+    simulator = await get_decision_simulator(ClaimRepository())
+    # NumPy releases the GIL for the array work; keep it off the event loop either way
+    results = await asyncio.to_thread(simulator.simulate, grid)
+    logger.info(
+        f"Admin {current_user['id']} simulated {len(grid)} threshold settings "
+        f"over {simulator.claim_count} claims"
+    )
+    return {"claims": simulator.claim_count, "results": results}
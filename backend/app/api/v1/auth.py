@@ -8,7 +8,7 @@ from app.schemas.auth import (
     UserProfile,
 )
 from app.db.repositories.user_repo import UserRepository
-from app.dependencies import get_current_user
+from app.dependencies import get_auth_http_client, get_current_user
 from app.utils.logger import logger
 from app.config import settings
 import httpx
@@ -38,7 +38,10 @@ def _ensure_supabase_auth_configured() -> None:
 
 
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-async def register(req: UserRegisterRequest):
+async def register(
+    req: UserRegisterRequest,
+    http: httpx.AsyncClient = Depends(get_auth_http_client),
+):
     """Register a new user via Supabase Auth (direct HTTP)."""
     try:
         _ensure_supabase_auth_configured()
@@ -49,11 +52,10 @@ async def register(req: UserRegisterRequest):
         payload = {
             "email": req.email,
             "password": req.password,
-            "data": {"name": req.name, "role": "user"},
+            "data": {"name": req.name},
         }
         logger.info(f"Calling GoTrue signup for {req.email}")
-        async with httpx.AsyncClient() as http:
-            resp = await http.post(f"{_GOTRUE_URL}/signup", headers=headers, json=payload, timeout=30)
+        resp = await http.post(f"{_GOTRUE_URL}/signup", headers=headers, json=payload)
 
         if resp.status_code >= 400:
             body = resp.json()
@@ -95,7 +97,10 @@ async def register(req: UserRegisterRequest):
 
 
 @router.post("/login", response_model=AuthResponse)
-async def login(req: UserLoginRequest):
+async def login(
+    req: UserLoginRequest,
+    http: httpx.AsyncClient = Depends(get_auth_http_client),
+):
     """Login user via Supabase Auth (direct HTTP)."""
     try:
         _ensure_supabase_auth_configured()
@@ -103,13 +108,11 @@ async def login(req: UserLoginRequest):
             "apikey": settings.SUPABASE_ANON_KEY,
             "Content-Type": "application/json",
         }
-        async with httpx.AsyncClient() as http:
-            resp = await http.post(
-                f"{_GOTRUE_URL}/token?grant_type=password",
-                headers=headers,
-                json={"email": req.email, "password": req.password},
-                timeout=30,
-            )
+        resp = await http.post(
+            f"{_GOTRUE_URL}/token?grant_type=password",
+            headers=headers,
+            json={"email": req.email, "password": req.password},
+        )
 
         if resp.status_code >= 400:
             raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -133,7 +136,10 @@ async def login(req: UserLoginRequest):
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(req: TokenRefreshRequest):
+async def refresh_token(
+    req: TokenRefreshRequest,
+    http: httpx.AsyncClient = Depends(get_auth_http_client),
+):
     """Refresh access token."""
     try:
         _ensure_supabase_auth_configured()
@@ -141,13 +147,11 @@ async def refresh_token(req: TokenRefreshRequest):
             "apikey": settings.SUPABASE_ANON_KEY,
             "Content-Type": "application/json",
         }
-        async with httpx.AsyncClient() as http:
-            resp = await http.post(
-                f"{_GOTRUE_URL}/token?grant_type=refresh_token",
-                headers=headers,
-                json={"refresh_token": req.refresh_token},
-                timeout=30,
-            )
+        resp = await http.post(
+            f"{_GOTRUE_URL}/token?grant_type=refresh_token",
+            headers=headers,
+            json={"refresh_token": req.refresh_token},
+        )
 
         if resp.status_code >= 400:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Response, status
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from app.dependencies import get_current_user
-from app.services.storage_service import StorageService
+from app.services.storage_service import PreparedImage, StorageService, gather_bounded
 from app.services.report_service import ReportService
 from app.services.claim_service import ClaimService
 from app.services.damage_service import DamageService
@@ -10,12 +13,30 @@ from app.services.cost_service import CostService
 from app.services.fraud_service import FraudService
 from app.services.decision_service import DecisionService
 from app.services.vision_llm_service import VisionLLMService
+from app.services.response_cache import ClaimResponseCache, claim_response_cache
+from app.services.explanation_stream import explanation_streams
 from app.db.repositories.claim_repo import ClaimRepository
 from app.db.repositories.cost_repo import CostRepository
 from app.db.repositories.fraud_repo import FraudRepository
-from app.schemas.claim import ClaimResponse, ClaimProcessResponse
-from app.utils.constants import ALLOWED_IMAGE_TYPES, MAX_IMAGE_SIZE, MAX_IMAGES_PER_CLAIM
+from app.schemas.claim import (
+    ClaimFromUploadsRequest,
+    ClaimProcessResponse,
+    ClaimResponse,
+    UploadUrlRequest,
+    UploadUrlResponse,
+)
+from app.config import settings
+from app.utils.constants import (
+    ALLOWED_IMAGE_TYPES,
+    EXPLANATION_STREAM_KEEPALIVE_SECONDS,
+    EXPLANATION_STREAM_MAX_SECONDS,
+    MAX_IMAGE_SIZE,
+    MAX_IMAGES_PER_CLAIM,
+)
+from app.utils.background import spawn
 from app.utils.exceptions import ClaimNotFoundError, ClaimAlreadyProcessedError
+from app.utils.image_processing import parse_image_variants
+from app.utils.http_clients import GEMINI, OPENAI, SUPABASE_STORAGE, http_clients
 from app.utils.logger import logger
 from app.utils.scoring import compute_overall_severity_score
 
@@ -56,7 +77,11 @@ def _build_claim_service(claim_repo: ClaimRepository) -> ClaimService:
         fraud_repo=FraudRepository(),
     )
     decision_service = DecisionService()
-    vision_llm_service = VisionLLMService()
+    vision_llm_service = VisionLLMService(
+        openai_client=http_clients.get(OPENAI),
+        gemini_client=http_clients.get(GEMINI),
+        storage_client=http_clients.get(SUPABASE_STORAGE),
+    )
 
     return ClaimService(
         damage_service=damage_service,
@@ -81,11 +106,13 @@ def _build_claim_response(claim: dict) -> ClaimResponse:
         cost_breakdown = json.loads(cost_breakdown)
 
     damage_severity_score = _compute_damage_severity_score(damage_zones)
+    image_variants = parse_image_variants(claim.get("image_variants"))
 
     return ClaimResponse(
         id=str(claim["id"]),
         user_id=str(claim["user_id"]),
         image_urls=claim.get("image_urls", []),
+        thumbnail_urls=[v.get("thumbnail") for v in image_variants] or None,
         user_description=claim.get("user_description"),
         policy_number=claim.get("policy_number", ""),
         vehicle_company=claim.get("vehicle_company"),
@@ -94,6 +121,7 @@ def _build_claim_response(claim: dict) -> ClaimResponse:
         damage_zones=damage_zones,
         damage_severity_score=damage_severity_score,
         ai_explanation=claim.get("ai_explanation"),
+        explanation_status=claim.get("explanation_status"),
         cost_breakdown=cost_breakdown,
         cost_total=claim.get("cost_total"),
         fraud_score=claim.get("fraud_score"),
@@ -106,6 +134,91 @@ def _build_claim_response(claim: dict) -> ClaimResponse:
     )
 
 
+async def _create_and_process_claim(
+    current_user: dict,
+    policy_number: str,
+    vehicle_company: Optional[str],
+    vehicle_model: Optional[str],
+    user_description: Optional[str],
+    incident_date: Optional[str],
+    location: Optional[str],
+    image_variants: Optional[List[dict]] = None,
+    prepared: Optional[List[PreparedImage]] = None,
+):
+    """Insert the claim row and run the pipeline on it straight away.
+
+    Pass ``image_variants`` for images already in storage, or ``prepared``
+    images that are uploaded while detection runs on their in-memory bytes.
+    """
+    storage = StorageService()
+    upload_task: Optional[asyncio.Future] = None
+    if prepared is not None:
+        upload_task = asyncio.ensure_future(storage.store_prepared_images(prepared))
+
+    # Create claim record
+    claim_repo = ClaimRepository()
+    try:
+        claim = await claim_repo.create(
+            user_id=current_user["id"],
+            image_urls=[v["original"] for v in image_variants or []],
+            image_variants=image_variants,
+            policy_number=policy_number,
+            vehicle_company=vehicle_company,
+            vehicle_model=vehicle_model,
+            user_description=user_description,
+            incident_date=incident_date,
+            location=location,
+        )
+    except Exception:
+        if upload_task is not None:
+            results = await asyncio.gather(upload_task, return_exceptions=True)
+            if isinstance(results[0], list):
+                await storage.delete_ingested(results[0])
+        raise
+
+    # Auto-process immediately after submission
+    claim_service = _build_claim_service(claim_repo)
+
+    try:
+        processed = await claim_service.process_claim(
+            claim["id"],
+            current_user["id"],
+            vehicle_company=vehicle_company,
+            vehicle_model=vehicle_model,
+            image_bytes=[p.variants.inference for p in prepared] if prepared else None,
+            image_uploads=upload_task,
+        )
+        return processed
+    except Exception as e:
+        logger.error(f"Auto-processing failed for claim {claim['id']}: {e}")
+        if upload_task is not None:
+            upload_result = (await asyncio.gather(upload_task, return_exceptions=True))[0]
+            if isinstance(upload_result, BaseException):
+                # Without its images the claim can never be reprocessed; don't keep it
+                await claim_repo.delete(claim["id"], current_user["id"])
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Image upload failed: {str(upload_result)}",
+                )
+        latest = await claim_repo.get_by_id(claim["id"], current_user["id"])
+        if latest:
+            return _build_claim_response(latest)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Claim created but processing failed: {str(e)}",
+        )
+
+
+def _validate_object_path(path: str, user_id: str) -> None:
+    """Uploaded objects must sit directly under the caller's own prefix."""
+    name = path[len(user_id) + 1:] if path.startswith(f"{user_id}/") else ""
+    if not name or "/" in name or name.startswith("."):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid upload path: {path}",
+        )
+
+
 @router.post("", response_model=ClaimResponse, status_code=status.HTTP_201_CREATED)
 async def create_claim(
     images: List[UploadFile] = File(..., description="Vehicle damage images (JPG/PNG, max 5)"),
@@ -125,66 +238,157 @@ async def create_claim(
             detail=f"Maximum {MAX_IMAGES_PER_CLAIM} images allowed per claim.",
         )
 
-    # Validate each file
-    for img in images:
-        if img.content_type not in ALLOWED_IMAGE_TYPES:
+    # Validate and normalise every file before anything is written. Each file
+    # is streamed and checked from its own bytes (signature, header, size);
+    # the client-declared type and size are not trusted.
+    storage = StorageService()
+    results = await storage.prepare_images(images, user_id=current_user["id"])
+    prepared = [r for r in results if isinstance(r, PreparedImage)]
+    failures = [
+        (img.filename, r) for img, r in zip(images, results) if not isinstance(r, PreparedImage)
+    ]
+    if failures:
+        for p in prepared:
+            p.close()
+        invalid = all(isinstance(e, ValueError) for _, e in failures)
+        raise HTTPException(
+            status_code=(
+                status.HTTP_400_BAD_REQUEST if invalid else status.HTTP_500_INTERNAL_SERVER_ERROR
+            ),
+            detail="Image upload failed: "
+            + "; ".join(f"{name or 'image'}: {str(e)}" for name, e in failures),
+        )
+
+    # The uploads to storage run alongside damage detection on the prepared bytes
+    return await _create_and_process_claim(
+        current_user,
+        policy_number=policy_number,
+        vehicle_company=vehicle_company,
+        vehicle_model=vehicle_model,
+        user_description=user_description,
+        incident_date=incident_date,
+        location=location,
+        prepared=prepared,
+    )
+
+
+@router.post("/upload-urls", response_model=UploadUrlResponse)
+async def create_upload_urls(
+    body: UploadUrlRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Issue signed URLs so the client can upload images straight to storage."""
+    for f in body.files:
+        if f.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type: {img.content_type}. Only JPG/PNG accepted.",
+                detail=f"Invalid file type: {f.content_type}. Only JPG/PNG accepted.",
             )
-        if img.size and img.size > MAX_IMAGE_SIZE:
+        if f.size and f.size > MAX_IMAGE_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"File size exceeds {MAX_IMAGE_SIZE // (1024 * 1024)}MB limit.",
             )
 
-    # Upload images to Supabase Storage
     storage = StorageService()
-    image_urls = []
-    for img in images:
-        try:
-            url = await storage.upload_image(file=img, user_id=current_user["id"])
-            image_urls.append(url)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Image upload failed: {str(e)}",
+    try:
+        uploads = await asyncio.gather(
+            *(
+                storage.create_signed_upload_url(
+                    storage.new_object_path(current_user["id"], f.filename, f.content_type)
+                )
+                for f in body.files
             )
+        )
+    except Exception as e:
+        logger.error(f"Failed to create signed upload URLs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not create upload URLs. Please try again.",
+        )
 
-    # Create claim record
-    claim_repo = ClaimRepository()
-    claim = await claim_repo.create(
-        user_id=current_user["id"],
-        image_urls=image_urls,
-        policy_number=policy_number,
-        vehicle_company=vehicle_company,
-        vehicle_model=vehicle_model,
-        user_description=user_description,
-        incident_date=incident_date,
-        location=location,
+    return UploadUrlResponse(
+        uploads=uploads,
+        expires_in=storage.backend.signed_upload_expires_in,
     )
 
-    # Auto-process immediately after submission
-    claim_service = _build_claim_service(claim_repo)
 
-    try:
-        processed = await claim_service.process_claim(
-            claim["id"],
-            current_user["id"],
-            vehicle_company=vehicle_company,
-            vehicle_model=vehicle_model,
+@router.post("/from-uploads", response_model=ClaimResponse, status_code=status.HTTP_201_CREATED)
+async def create_claim_from_uploads(
+    body: ClaimFromUploadsRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """Create and auto-process a claim from images already uploaded via signed URLs."""
+    paths = list(dict.fromkeys(body.object_paths))
+    for path in paths:
+        _validate_object_path(path, current_user["id"])
+
+    # Validate type and size from the stored object metadata
+    storage = StorageService()
+    results = await gather_bounded(
+        (storage.get_object_metadata(p) for p in paths),
+        settings.STORAGE_UPLOAD_CONCURRENCY,
+    )
+    errors = []
+    rejected = []
+    for path, meta in zip(paths, results):
+        if isinstance(meta, BaseException):
+            logger.error(f"Failed to read object metadata for {path}: {meta}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Could not verify uploaded images. Please try again.",
+            )
+        if meta is None:
+            errors.append(f"{path}: not found")
+        elif meta["content_type"] not in ALLOWED_IMAGE_TYPES:
+            errors.append(f"{path}: invalid file type {meta['content_type'] or 'unknown'}")
+            rejected.append(path)
+        elif meta["size"] > MAX_IMAGE_SIZE:
+            errors.append(f"{path}: exceeds {MAX_IMAGE_SIZE // (1024 * 1024)}MB limit")
+            rejected.append(path)
+
+    if errors:
+        # Invalid objects are never usable, so don't keep them around
+        await storage.delete_images(rejected)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded image validation failed: " + "; ".join(errors),
         )
-        return processed
-    except Exception as e:
-        logger.error(f"Auto-processing failed for claim {claim['id']}: {e}")
-        latest = await claim_repo.get_by_id(claim["id"], current_user["id"])
-        if latest:
-            return _build_claim_response(latest)
+
+    # Decode the uploaded originals and store their variants
+    results = await gather_bounded(
+        (storage.ingest_stored_image(p) for p in paths),
+        settings.STORAGE_UPLOAD_CONCURRENCY,
+    )
+    image_variants = [r for r in results if isinstance(r, dict)]
+    failures = [(p, r) for p, r in zip(paths, results) if not isinstance(r, dict)]
+    if failures:
+        await storage.delete_ingested(image_variants)
+        invalid = [p for p, e in failures if isinstance(e, ValueError)]
+        await storage.delete_images(invalid)
+        if len(invalid) == len(failures):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded image validation failed: "
+                + "; ".join(f"{p}: {str(e)}" for p, e in failures),
+            )
+        logger.error(f"Failed to ingest uploaded images: {failures}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Claim created but processing failed: {str(e)}",
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not process uploaded images. Please try again.",
         )
 
+    return await _create_and_process_claim(
+        current_user,
+        policy_number=body.policy_number,
+        vehicle_company=body.vehicle_company,
+        vehicle_model=body.vehicle_model,
+        user_description=body.user_description,
+        incident_date=body.incident_date,
+        location=body.location,
+        image_variants=image_variants,
+    )
+
 
 @router.get("", response_model=List[ClaimResponse])
 async def list_claims(current_user: dict = Depends(get_current_user)):
@@ -204,17 +408,126 @@ async def get_vehicle_options():
     }
 
 
+def _cached_claim_response(cached, if_none_match: Optional[str]) -> Response:
+    """Serve a cached processed claim, answering conditional requests with 304."""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": "private, no-cache",
+    }
+    if ClaimResponseCache.etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
 @router.get("/{claim_id}", response_model=ClaimResponse)
 async def get_claim(
     claim_id: str,
     current_user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
 ):
     """Get details of a specific claim."""
+    cached = await claim_response_cache.get(claim_id, current_user["id"])
+    if cached:
+        return _cached_claim_response(cached, if_none_match)
+
+    # Read before the row so an invalidation racing the fetch still wins
+    version = await claim_response_cache.version(claim_id)
     claim_repo = ClaimRepository()
     claim = await claim_repo.get_by_id(claim_id, current_user["id"])
     if not claim:
         raise ClaimNotFoundError(claim_id)
-    return _build_claim_response(claim)
+
+    response = _build_claim_response(claim)
+    if (
+        response.status != "processed"
+        or not response.processed_at
+        or response.explanation_status == "pending"
+    ):
+        return response
+
+    cached = claim_response_cache.put(
+        claim_id=claim_id,
+        user_id=current_user["id"],
+        processed_at=response.processed_at,
+        body=response.model_dump_json().encode("utf-8"),
+        version=version,
+    )
+    return _cached_claim_response(cached, if_none_match)
+
+
+def _sse_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def _finished_explanation(claim: dict) -> dict | None:
+    """The ``done`` event data for a claim whose explanation can no longer change, else None."""
+    if claim["status"] == "error":
+        return {"status": "error", "ai_explanation": None}
+    if claim["status"] == "processed" and claim.get("explanation_status") != "pending":
+        return {"status": "processed", "ai_explanation": claim.get("ai_explanation")}
+    return None
+
+
+@router.get("/{claim_id}/explanation/stream")
+async def stream_claim_explanation(
+    claim_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """Stream the AI explanation as server-sent events while the claim is processed.
+
+    Sends ``token`` events (``{"text"}``) as the LLM generates the explanation
+    and a final ``done`` event (``{"status", "ai_explanation"}``). Live tokens
+    only reach clients connected to the worker processing the claim; the
+    claim row is re-read on every keep-alive, so clients on other workers
+    still get ``done`` once it is persisted. A claim that has failed, or is
+    processed with no explanation still being generated, gets ``done``
+    straight away.
+    """
+    claim_repo = ClaimRepository()
+    # Subscribe before reading the row so a run finishing in between is not missed
+    subscription = explanation_streams.subscribe(claim_id)
+    try:
+        claim = await claim_repo.get_by_id(claim_id, current_user["id"])
+    except Exception:
+        subscription.close()
+        raise
+    if not claim:
+        subscription.close()
+        raise ClaimNotFoundError(claim_id)
+
+    async def events():
+        try:
+            done = _finished_explanation(claim)
+            if done is not None:
+                yield _sse_event("done", done)
+                return
+
+            give_up_at = time.monotonic() + EXPLANATION_STREAM_MAX_SECONDS
+            async for event, data in subscription.events(EXPLANATION_STREAM_KEEPALIVE_SECONDS):
+                if event != "ping":
+                    yield _sse_event(event, data)
+                    continue
+                if time.monotonic() > give_up_at:
+                    return
+                # The run may be finishing on another worker, whose hub this one never hears from
+                try:
+                    latest = await claim_repo.get_by_id(claim_id, current_user["id"])
+                except Exception as e:
+                    logger.warning(f"Explanation stream re-check failed for claim {claim_id}: {e}")
+                    latest = None
+                done = _finished_explanation(latest) if latest else None
+                if done is not None:
+                    yield _sse_event("done", done)
+                    return
+                yield b": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/{claim_id}/process", response_model=ClaimProcessResponse)
@@ -255,8 +568,13 @@ async def process_claim(
 async def download_report(
     claim_id: str,
     current_user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
 ):
-    """Download PDF claim report."""
+    """Download PDF claim report.
+
+    Served from the copy pre-rendered when the claim was processed; it is
+    rendered on demand (and stored for next time) only if that copy is missing.
+    """
     claim_repo = ClaimRepository()
     claim = await claim_repo.get_by_id(claim_id, current_user["id"])
     if not claim:
@@ -268,15 +586,26 @@ async def download_report(
         )
 
     report_service = ReportService()
-    pdf_buffer = await report_service.generate_pdf(claim)
+    version = report_service.report_version(claim)
+    headers = {
+        "ETag": f'"{version}"',
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename=ClaimIQ_Report_{claim_id[:8]}.pdf",
+    }
+    if ClaimResponseCache.etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=ClaimIQ_Report_{claim_id[:8]}.pdf"
-        },
-    )
+    try:
+        stored = await report_service.open_stored_report(claim, version)
+    except Exception as e:
+        logger.warning(f"Stored report unavailable for claim {claim_id}: {e}")
+        stored = None
+    if stored is not None:
+        return StreamingResponse(stored, media_type="application/pdf", headers=headers)
+
+    pdf = (await report_service.generate_pdf(claim)).getvalue()
+    spawn(report_service.store_report(claim, pdf), name=f"report-{claim_id[:8]}")
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
 
 
 @router.delete("/{claim_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -287,5 +616,10 @@ async def delete_claim(
     """Delete a claim."""
     claim_repo = ClaimRepository()
     deleted = await claim_repo.delete(claim_id, current_user["id"])
+    await claim_response_cache.invalidate(claim_id)
     if not deleted:
         raise ClaimNotFoundError(claim_id)
+    spawn(
+        ReportService().delete_reports(current_user["id"], claim_id),
+        name=f"report-delete-{claim_id[:8]}",
+    )
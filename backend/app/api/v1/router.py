@@ -1,9 +1,13 @@
 from fastapi import APIRouter
+from app.api.v1.admin import router as admin_router
 from app.api.v1.auth import router as auth_router
 from app.api.v1.claims import router as claims_router
 from app.api.v1.analytics import router as analytics_router
+from app.api.v1.storage import router as storage_router
 
 router = APIRouter(prefix="/api/v1")
 router.include_router(auth_router)
 router.include_router(claims_router)
 router.include_router(analytics_router)
+router.include_router(storage_router)
+router.include_router(admin_router)
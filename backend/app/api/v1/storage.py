@@ -0,0 +1,76 @@
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from app.services.storage_backends import (
+    LocalStorageBackend,
+    ObjectExistsError,
+    get_storage_backend,
+)
+from app.utils.constants import MAX_IMAGE_SIZE
+from app.utils.exceptions import PayloadTooLargeError
+
+router = APIRouter(prefix="/storage", tags=["Storage"])
+
+
+def _local_backend() -> LocalStorageBackend:
+    backend = get_storage_backend()
+    if not isinstance(backend, LocalStorageBackend):
+        # Objects are served by Supabase directly; these routes only exist for local storage
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return backend
+
+
+@router.put("/upload/{bucket}/{path:path}")
+async def upload_signed_object(
+    bucket: str,
+    path: str,
+    request: Request,
+    token: str = Query(...),
+):
+    """Receive a direct client upload authorised by a signed upload URL."""
+    backend = _local_backend()
+    if not backend.verify_upload_token(bucket, path, token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired upload token.",
+        )
+
+    async def body():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_IMAGE_SIZE:
+                raise PayloadTooLargeError(MAX_IMAGE_SIZE)
+            yield chunk
+
+    content_type = request.headers.get("content-type") or backend.content_type(path)
+    try:
+        await backend.put(bucket, path, body(), content_type)
+    except ObjectExistsError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Object already exists.",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"Key": f"{bucket}/{path}"}
+
+
+@router.get("/{bucket}/{path:path}")
+async def get_object(bucket: str, path: str):
+    """Serve a public object from local storage (sendfile where the server supports it)."""
+    backend = _local_backend()
+    if bucket not in backend.PUBLIC_BUCKETS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    try:
+        file_path = backend.object_path(bucket, path)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not file_path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    # Keys are never overwritten, so the bytes behind a URL never change
+    return FileResponse(
+        file_path,
+        media_type=backend.content_type(path),
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
@@ -9,22 +9,106 @@ class Settings(BaseSettings):
     SUPABASE_ANON_KEY: str = ""
     SUPABASE_SERVICE_KEY: str = ""
 
+    # Auth (local JWT verification)
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    SUPABASE_JWKS_URL: Optional[str] = None
+    AUTH_JWKS_CACHE_SECONDS: int = 600
+    AUTH_TOKEN_CACHE_SIZE: int = 4096
+    AUTH_REVOCATION_CHECK_SECONDS: int = 0
+    AUTH_JWT_LEEWAY_SECONDS: int = 10
+
     # Vision LLM
     OPENAI_API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
     VISION_LLM_MODEL: str = "gpt-4o"
+    # auto (OpenAI for gpt-* models with a key, else Gemini) | openai | gemini | mock
+    VISION_LLM_PROVIDER: str = "auto"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    LLM_IMAGE_TILING: bool = False  # send all claim images as one grid instead of the first only
+    # Per-provider concurrency governor; timeouts adapt between the minimum and HTTP_LLM_TIMEOUT_SECONDS
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_QUEUE: int = 16
+    LLM_MIN_TIMEOUT_SECONDS: float = 5.0
+    # Model on the other provider to hedge slow calls to (after the primary's p95 latency)
+    LLM_HEDGE_MODEL: Optional[str] = None
+    LLM_HEDGE_PROVIDER: Optional[str] = None  # defaults to the other of openai / gemini
+    LLM_STREAMING_ENABLED: bool = True  # use provider streaming and forward tokens over SSE
+    # Persist and return the decision first; generate the explanation in the background
+    DEFERRED_EXPLANATION: bool = False
+    # Offline mock provider (VISION_LLM_PROVIDER=mock); in-process unless MOCK_LLM_URL is set
+    MOCK_LLM_URL: Optional[str] = None
+    MOCK_LLM_LATENCY_MS: float = 1500  # median
+    MOCK_LLM_LATENCY_SIGMA: float = 0.4  # log-normal shape; 0 = constant latency
+    MOCK_LLM_ERROR_RATE: float = 0.0
+    MOCK_LLM_RESPONSE_WORDS: int = 220
+    MOCK_LLM_SEED: Optional[int] = None
 
     # ML Models
     YOLO_MODEL_PATH: Optional[str] = "../model/my_model.pt"
     YOLO_WEIGHTS_DIR: str = "../model/train/weights"
+    INFERENCE_WORKERS: int = 1
+
+    # PDF report rendering ("thread" or "process" pool)
+    REPORT_EXECUTOR: str = "thread"
+    REPORT_WORKERS: int = 2
+    # Render each report into storage as soon as its claim is processed
+    REPORT_PRERENDER: bool = True
+
+    # Per-claim latency budget and degradation ladder ("stage:min_remaining_ms", dropped in order)
+    CLAIM_LATENCY_BUDGET_MS: int = 25000
+    CLAIM_DEGRADATION_LADDER: str = "llm:8000,overlay_upload:4000,clip:3000"
+
+    # Admission control (ML-heavy endpoints)
+    PIPELINE_MAX_INFLIGHT: int = 4
+    INFERENCE_QUEUE_HIGH_WATERMARK: int = 8
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
 
     # App
     APP_ENV: str = "development"
     LOG_LEVEL: str = "INFO"
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
 
+    # Outbound HTTP (pooled clients per upstream)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_SUPABASE_TIMEOUT_SECONDS: float = 30.0
+    HTTP_STORAGE_TIMEOUT_SECONDS: float = 15.0
+    HTTP_LLM_TIMEOUT_SECONDS: float = 30.0
+    HTTP2_ENABLED: bool = False
+
+    # Storage
+    STORAGE_UPLOAD_CONCURRENCY: int = 4
+    STORAGE_BACKEND: str = "supabase"  # supabase | local
+    LOCAL_STORAGE_DIR: str = "./storage_data"
+    LOCAL_STORAGE_PUBLIC_URL: str = "http://localhost:8000"  # base URL objects are served from
+    LOCAL_STORAGE_SIGNING_KEY: Optional[str] = None  # signs local upload URLs; random per process if unset
+    LOCAL_STORAGE_SIGNED_UPLOAD_SECONDS: int = 600
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_BURST: Optional[int] = None  # defaults to RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_MAX_KEYS: int = 10000
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis
+
+    # Redis (shared state across workers / nodes)
+    REDIS_URL: Optional[str] = None
+
+    # Response caching (processed claims); invalidations are shared through Redis when REDIS_URL is set
+    CLAIM_RESPONSE_CACHE_SIZE: int = 1024
+    CLAIM_RESPONSE_CACHE_TTL_SECONDS: int = 300
+
+    # Re-pricing / re-decision backfill (python -m app.jobs.backfill or POST /admin/backfill)
+    BACKFILL_BATCH_SIZE: int = 500
+    BACKFILL_CHECKPOINT_PATH: str = "./backfill_checkpoint.json"
+
+    # Vision LLM explanation cache (in-process LRU, plus Redis when REDIS_URL is set)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_SIZE: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 604800
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,26 @@
+from app.config import settings
+from app.utils.logger import logger
+
+_client = None
+
+
+def get_redis_client():
+    """Get or create the shared async Redis client, or None when unavailable."""
+    global _client
+    if _client is None:
+        if not settings.REDIS_URL:
+            return None
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("REDIS_URL is set but the 'redis' package is not installed")
+            return None
+        _client = redis.from_url(settings.REDIS_URL, decode_responses=False)
+    return _client
+
+
+async def close_redis_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
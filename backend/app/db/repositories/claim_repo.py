@@ -20,6 +20,7 @@ class ClaimRepository:
         user_description: Optional[str] = None,
         incident_date: Optional[str] = None,
         location: Optional[str] = None,
+        image_variants: Optional[List[dict]] = None,
     ) -> dict:
         data = {
             "user_id": user_id,
@@ -36,14 +37,16 @@ class ClaimRepository:
             data["vehicle_company"] = vehicle_company
         if vehicle_model:
             data["vehicle_model"] = vehicle_model
+        if image_variants:
+            data["image_variants"] = json.dumps(image_variants)
 
         try:
             response = self.client.table(self.table).insert(data).execute()
         except Exception as e:
             error_text = str(e).lower()
-            missing_vehicle_column = (
-                ("vehicle_company" in error_text)
-                or ("vehicle_model" in error_text)
+            optional_columns = ("vehicle_company", "vehicle_model", "image_variants")
+            missing_optional_column = (
+                any(col in error_text for col in optional_columns)
                 or (
                     "column" in error_text
                     and (
@@ -54,12 +57,13 @@ class ClaimRepository:
                 )
             )
 
-            if ("vehicle_company" in data or "vehicle_model" in data) and missing_vehicle_column:
+            if any(col in data for col in optional_columns) and missing_optional_column:
                 logger.warning(
-                    "claims table does not yet include vehicle_company/vehicle_model; retrying create without those fields"
+                    "claims table does not yet include vehicle_company/vehicle_model/image_variants; "
+                    "retrying create without those fields"
                 )
-                data.pop("vehicle_company", None)
-                data.pop("vehicle_model", None)
+                for col in optional_columns:
+                    data.pop(col, None)
                 response = self.client.table(self.table).insert(data).execute()
             else:
                 raise
@@ -74,6 +78,47 @@ class ClaimRepository:
         response = query.maybe_single().execute()
         return response.data
 
+    async def get_by_ids(self, claim_ids: List[str]) -> List[dict]:
+        response = self.client.table(self.table).select("*").in_("id", claim_ids).execute()
+        return response.data
+
+    async def list_page(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[dict] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        columns: str = "*",
+    ) -> List[dict]:
+        """One keyset page of claims ordered by id, starting after ``after_id``.
+
+        ``filters`` are column equality matches.
+        """
+        return self.fetch_page(after_id, limit, filters, created_from, created_to, columns)
+
+    def fetch_page(
+        self,
+        after_id: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[dict] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        columns: str = "*",
+    ) -> List[dict]:
+        """Blocking ``list_page``, for bulk reads run in a worker thread."""
+        query = self.client.table(self.table).select(columns)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        if created_from:
+            query = query.gte("created_at", created_from)
+        if created_to:
+            query = query.lt("created_at", created_to)
+        if after_id:
+            query = query.gt("id", after_id)
+        response = query.order("id").limit(limit).execute()
+        return response.data
+
     async def list_by_user(self, user_id: str) -> List[dict]:
         response = (
             self.client.table(self.table)
@@ -87,6 +132,17 @@ class ClaimRepository:
     async def update_status(self, claim_id: str, status: str) -> None:
         self.client.table(self.table).update({"status": status}).eq("id", claim_id).execute()
 
+    async def update_images(
+        self,
+        claim_id: str,
+        image_urls: List[str],
+        image_variants: Optional[List[dict]] = None,
+    ) -> None:
+        update_data = {"image_urls": image_urls}
+        if image_variants:
+            update_data["image_variants"] = json.dumps(image_variants)
+        self.client.table(self.table).update(update_data).eq("id", claim_id).execute()
+
     async def update_processed(
         self,
         claim_id: str,
@@ -100,6 +156,7 @@ class ClaimRepository:
         decision: str,
         decision_confidence: float,
         risk_level: str,
+        explanation_status: Optional[str] = None,
     ) -> None:
         # Serialize pydantic models to dicts
         damage_data = [
@@ -123,10 +180,60 @@ class ClaimRepository:
             "status": "processed",
             "processed_at": datetime.now(timezone.utc).isoformat(),
         }
+        if explanation_status:
+            update_data["explanation_status"] = explanation_status
 
         self.client.table(self.table).update(update_data).eq("id", claim_id).execute()
         logger.info(f"Claim {claim_id} processed: decision={decision}")
 
+    async def update_explanation(
+        self,
+        claim_id: str,
+        ai_explanation: Optional[str],
+        explanation_status: str,
+        only_if_pending: bool = False,
+    ) -> None:
+        query = self.client.table(self.table).update(
+            {"ai_explanation": ai_explanation, "explanation_status": explanation_status}
+        ).eq("id", claim_id)
+        if only_if_pending:
+            query = query.eq("explanation_status", "pending")
+        query.execute()
+
+    async def list_stale_pending_explanations(
+        self, processed_before: str, after_id: Optional[str] = None, limit: int = 100
+    ) -> List[dict]:
+        """Processed claims whose deferred explanation is still pending from before ``processed_before``."""
+        query = (
+            self.client.table(self.table)
+            .select("id, damage_json")
+            .eq("status", "processed")
+            .eq("explanation_status", "pending")
+            .lt("processed_at", processed_before)
+        )
+        if after_id:
+            query = query.gt("id", after_id)
+        response = query.order("id").limit(limit).execute()
+        return response.data
+
+    async def bulk_update_pricing(self, updates: List[dict]) -> int:
+        """Write recomputed costs and decisions for many processed claims in one statement.
+
+        Each update has ``id``, ``cost_breakdown``, ``cost_total``, ``decision``,
+        ``decision_confidence`` and ``risk_level``. Returns the number of rows written.
+        """
+        rows = [
+            {
+                **u,
+                "cost_breakdown": json.dumps([
+                    c.model_dump() if hasattr(c, "model_dump") else c for c in u["cost_breakdown"]
+                ]),
+            }
+            for u in updates
+        ]
+        response = self.client.rpc("backfill_claim_pricing", {"updates": rows}).execute()
+        return int(response.data or 0)
+
     async def count_recent_claims(self, user_id: str, months: int = 6) -> int:
         cutoff = (datetime.now(timezone.utc) - timedelta(days=months * 30)).isoformat()
         response = (
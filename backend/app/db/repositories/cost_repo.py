@@ -188,6 +188,25 @@ class CostRepository:
 
         return self._damage_type_cache.get(normalized)
 
+    async def get_pricing_tables(self) -> dict:
+        """Current zone rows and damage-type prices (refreshed if stale), for compiling lookups.
+
+        Keys: ``zones`` (zone_name -> row), ``damage_type`` (type -> price),
+        ``brand`` ((brand, type) -> price) and ``model`` ((brand, model, type)
+        -> price), all keyed by normalised strings.
+        """
+        now = time.time()
+        if not self._cache or (now - self._cache_time > self._cache_ttl):
+            await self._refresh_cache()
+        if not self._damage_type_cache or (now - self._damage_type_cache_time > self._cache_ttl):
+            await self._refresh_damage_type_cache()
+        return {
+            "zones": dict(self._cache),
+            "damage_type": dict(self._damage_type_cache),
+            "brand": dict(self._brand_damage_cache),
+            "model": dict(self._model_pricing_cache),
+        }
+
     async def get_vehicle_options(self) -> dict[str, list[str]]:
         now = time.time()
         if (
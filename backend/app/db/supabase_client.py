@@ -1,5 +1,6 @@
 from supabase import create_client, Client
 from app.config import settings
+from app.utils.http_clients import SUPABASE_AUTH, http_clients
 import httpx
 
 _client: Client | None = None
@@ -32,47 +33,60 @@ _AUTH_HEADERS = {
 }
 
 
-async def supabase_auth_sign_up(email: str, password: str, user_metadata: dict | None = None) -> dict:
+async def supabase_auth_sign_up(
+    email: str,
+    password: str,
+    user_metadata: dict | None = None,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
     """Sign up via direct HTTP to Supabase GoTrue."""
+    client = client or http_clients.get(SUPABASE_AUTH)
     payload = {"email": email, "password": password}
     if user_metadata:
         payload["data"] = user_metadata
-    async with httpx.AsyncClient() as client:
-        r = await client.post(f"{_AUTH_URL}/signup", headers=_AUTH_HEADERS, json=payload, timeout=30)
+    r = await client.post(f"{_AUTH_URL}/signup", headers=_AUTH_HEADERS, json=payload)
     r.raise_for_status()
     return r.json()
 
 
-async def supabase_auth_sign_in(email: str, password: str) -> dict:
+async def supabase_auth_sign_in(
+    email: str,
+    password: str,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
     """Sign in via direct HTTP to Supabase GoTrue."""
-    async with httpx.AsyncClient() as client:
-        r = await client.post(
-            f"{_AUTH_URL}/token?grant_type=password",
-            headers=_AUTH_HEADERS,
-            json={"email": email, "password": password},
-            timeout=30,
-        )
+    client = client or http_clients.get(SUPABASE_AUTH)
+    r = await client.post(
+        f"{_AUTH_URL}/token?grant_type=password",
+        headers=_AUTH_HEADERS,
+        json={"email": email, "password": password},
+    )
     r.raise_for_status()
     return r.json()
 
 
-async def supabase_auth_refresh(refresh_token: str) -> dict:
+async def supabase_auth_refresh(
+    refresh_token: str,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
     """Refresh token via direct HTTP to Supabase GoTrue."""
-    async with httpx.AsyncClient() as client:
-        r = await client.post(
-            f"{_AUTH_URL}/token?grant_type=refresh_token",
-            headers=_AUTH_HEADERS,
-            json={"refresh_token": refresh_token},
-            timeout=30,
-        )
+    client = client or http_clients.get(SUPABASE_AUTH)
+    r = await client.post(
+        f"{_AUTH_URL}/token?grant_type=refresh_token",
+        headers=_AUTH_HEADERS,
+        json={"refresh_token": refresh_token},
+    )
     r.raise_for_status()
     return r.json()
 
 
-async def supabase_auth_get_user(access_token: str) -> dict:
+async def supabase_auth_get_user(
+    access_token: str,
+    client: httpx.AsyncClient | None = None,
+) -> dict:
     """Get user by access token via direct HTTP to Supabase GoTrue."""
+    client = client or http_clients.get(SUPABASE_AUTH)
     headers = {**_AUTH_HEADERS, "Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient() as client:
-        r = await client.get(f"{_AUTH_URL}/user", headers=headers, timeout=15)
+    r = await client.get(f"{_AUTH_URL}/user", headers=headers, timeout=15)
     r.raise_for_status()
     return r.json()
@@ -1,6 +1,8 @@
+import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.db.supabase_client import get_supabase_client
+from app.utils.http_clients import SUPABASE_AUTH, http_clients
+from app.utils.jwt_verifier import TokenVerificationError, jwt_verifier
 
 security = HTTPBearer()
 
@@ -8,27 +10,24 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
-    """Validate JWT token via Supabase Auth and return user info."""
+    """Validate the JWT locally (falling back to Supabase Auth) and return user info."""
     try:
-        client = get_supabase_client()
-        token = credentials.credentials
-        user_response = client.auth.get_user(token)
+        user = await jwt_verifier.verify(credentials.credentials)
 
-        if not user_response or not user_response.user:
+        if not user or not user.get("id"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired token",
             )
 
-        user = user_response.user
-        return {
-            "id": user.id,
-            "email": user.email,
-            "role": (user.user_metadata or {}).get("role", "user"),
-            "name": (user.user_metadata or {}).get("name", ""),
-        }
+        return user
     except HTTPException:
         raise
+    except TokenVerificationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid or expired token: {str(e)}",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,10 +36,15 @@ async def get_current_user(
 
 
 def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
-    """Ensure user has admin role."""
+    """Ensure user has admin role (``app_metadata.role``, which only the service role can set)."""
     if current_user.get("role") != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
         )
     return current_user
+
+
+def get_auth_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client for Supabase GoTrue calls."""
+    return http_clients.get(SUPABASE_AUTH)
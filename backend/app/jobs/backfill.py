@@ -0,0 +1,263 @@
+"""Re-price and re-decide processed claims after pricing data or thresholds change.
+
+Streams processed claims in keyset batches (ordered by id), recomputes
+``cost_breakdown`` / ``cost_total`` from the stored ``damage_json`` and the
+decision from the stored fraud result (no ML is rerun), and writes changed
+rows back with one bulk RPC per batch (``backfill_claim_pricing`` in
+schema_rpc.sql). After each batch the last claim id is checkpointed to a JSON
+file, so an interrupted run resumes where it stopped. Only one run at a time
+can hold the checkpoint: an exclusive ``flock`` on ``<checkpoint>.lock``
+guards it across processes (API workers and the CLI alike). Run from
+``backend/``::
+
+    python -m app.jobs.backfill [--dry-run] [--restart] [--batch-size 500]
+
+or start it from the admin API (``POST /api/v1/admin/backfill``).
+"""
+
+import argparse
+import asyncio
+import fcntl
+import json
+import os
+import socket
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.config import settings
+from app.db.repositories.claim_repo import ClaimRepository
+from app.db.repositories.cost_repo import CostRepository
+from app.services.cost_service import CostService
+from app.services.decision_service import DecisionService
+from app.services.pricing_lookup import invalidate_pricing_lookup
+from app.services.response_cache import claim_response_cache
+from app.utils.logger import logger
+
+BACKFILL_COLUMNS = (
+    "id, damage_json, vehicle_company, vehicle_model, fraud_score, fraud_flags, "
+    "cost_breakdown, cost_total, decision, decision_confidence, risk_level"
+)
+
+
+def _load_json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def load_checkpoint(path: Optional[str] = None) -> dict | None:
+    try:
+        with open(path or settings.BACKFILL_CHECKPOINT_PATH, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+class BackfillRunningError(RuntimeError):
+    """Another process holds the backfill lock for this checkpoint."""
+
+
+def _lock_path(checkpoint_path: str) -> str:
+    return f"{checkpoint_path}.lock"
+
+
+def _try_lock(checkpoint_path: str) -> int | None:
+    """Open and exclusively lock the checkpoint's lock file; None if someone else holds it."""
+    fd = os.open(_lock_path(checkpoint_path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def backfill_running(checkpoint_path: Optional[str] = None) -> bool:
+    """Whether any process (not just this one) is running a backfill on the checkpoint."""
+    fd = _try_lock(checkpoint_path or settings.BACKFILL_CHECKPOINT_PATH)
+    if fd is None:
+        return True
+    os.close(fd)
+    return False
+
+
+class BackfillJob:
+    """One resumable backfill run; ``progress`` mirrors the checkpoint file."""
+
+    def __init__(
+        self,
+        claim_repo: ClaimRepository,
+        cost_service: CostService,
+        decision_service: DecisionService,
+        checkpoint_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False,
+    ):
+        self.claim_repo = claim_repo
+        self.cost_service = cost_service
+        self.decision_service = decision_service
+        self.checkpoint_path = checkpoint_path or settings.BACKFILL_CHECKPOINT_PATH
+        self.batch_size = max(1, batch_size or settings.BACKFILL_BATCH_SIZE)
+        self.dry_run = dry_run
+        self.progress: dict = {}
+        self._lock_fd: int | None = None
+
+    def acquire(self) -> None:
+        """Take the checkpoint lock for this run; raises BackfillRunningError if it is held."""
+        if self._lock_fd is None:
+            self._lock_fd = _try_lock(self.checkpoint_path)
+            if self._lock_fd is None:
+                raise BackfillRunningError("A backfill is already running.")
+
+    def release(self) -> None:
+        if self._lock_fd is not None:
+            # Closing the descriptor drops the flock
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _save_checkpoint(self) -> None:
+        self.progress["updated_at"] = datetime.now(timezone.utc).isoformat()
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(self.progress, fh, indent=2)
+        # Atomic replace: a crash mid-write never leaves a truncated checkpoint
+        os.replace(tmp_name, self.checkpoint_path)
+
+    def _recompute(self, claims: List[dict], priced: list) -> List[dict]:
+        """Updates for the claims whose recomputed cost or decision differs from what is stored."""
+        updates = []
+        for claim, (breakdown, cost_total) in zip(claims, priced):
+            decision = self.decision_service.make_decision(
+                fraud_score=int(claim.get("fraud_score") or 0),
+                cost_total=cost_total,
+                fraud_flags=claim.get("fraud_flags") or [],
+            )
+            breakdown_dicts = [c.model_dump() for c in breakdown]
+            unchanged = (
+                claim.get("cost_total") == cost_total
+                and claim.get("decision") == decision.decision
+                and claim.get("risk_level") == decision.risk_level
+                and float(claim.get("decision_confidence") or 0) == decision.confidence
+                and _load_json(claim.get("cost_breakdown")) == breakdown_dicts
+            )
+            if unchanged:
+                continue
+            updates.append({
+                "id": claim["id"],
+                "cost_breakdown": breakdown_dicts,
+                "cost_total": cost_total,
+                "decision": decision.decision,
+                "decision_confidence": decision.confidence,
+                "risk_level": decision.risk_level,
+            })
+        return updates
+
+    async def run(self, restart: bool = False) -> dict:
+        """Backfill all processed claims; the lock is taken here unless ``acquire`` already did."""
+        self.acquire()
+        try:
+            return await self._run(restart)
+        finally:
+            self.release()
+
+    async def _run(self, restart: bool) -> dict:
+        # Price against the tables as they are now, not a lookup compiled before the change
+        invalidate_pricing_lookup()
+        checkpoint = None if restart else load_checkpoint(self.checkpoint_path)
+        # A dry run's checkpoint must not make a real run skip claims (or vice versa)
+        if (
+            checkpoint
+            and not checkpoint.get("finished_at")
+            and checkpoint.get("dry_run", False) == self.dry_run
+        ):
+            self.progress = checkpoint
+            logger.info(
+                f"Resuming backfill after claim {checkpoint.get('last_id')} "
+                f"({checkpoint.get('scanned', 0)} claims already scanned)"
+            )
+        else:
+            self.progress = {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "last_id": None,
+                "scanned": 0,
+                "changed": 0,
+                "written": 0,
+                "dry_run": self.dry_run,
+                "finished_at": None,
+            }
+        # Which run is writing the checkpoint, so any worker can report on it
+        self.progress["owner"] = {
+            "run_id": uuid.uuid4().hex,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+        }
+        self._save_checkpoint()
+
+        while True:
+            claims = await self.claim_repo.list_page(
+                after_id=self.progress["last_id"],
+                limit=self.batch_size,
+                filters={"status": "processed"},
+                columns=BACKFILL_COLUMNS,
+            )
+            if not claims:
+                break
+
+            priced = await self.cost_service.estimate_costs(
+                {
+                    "damage_zones": _load_json(claim.get("damage_json")) or [],
+                    "vehicle_company": claim.get("vehicle_company"),
+                    "vehicle_model": claim.get("vehicle_model"),
+                }
+                for claim in claims
+            )
+            updates = self._recompute(claims, priced)
+            if updates and not self.dry_run:
+                self.progress["written"] += await self.claim_repo.bulk_update_pricing(updates)
+                await claim_response_cache.invalidate_many(update["id"] for update in updates)
+
+            self.progress["last_id"] = claims[-1]["id"]
+            self.progress["scanned"] += len(claims)
+            self.progress["changed"] += len(updates)
+            self._save_checkpoint()
+            logger.info(
+                f"Backfill: {self.progress['scanned']} scanned, {self.progress['changed']} changed "
+                f"(through claim {self.progress['last_id']})"
+            )
+            if len(claims) < self.batch_size:
+                break
+
+        self.progress["finished_at"] = datetime.now(timezone.utc).isoformat()
+        self._save_checkpoint()
+        logger.info(f"Backfill finished: {self.progress}")
+        return self.progress
+
+
+def create_backfill_job(
+    checkpoint_path: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> BackfillJob:
+    return BackfillJob(
+        claim_repo=ClaimRepository(),
+        cost_service=CostService(cost_repo=CostRepository()),
+        decision_service=DecisionService(),
+        checkpoint_path=checkpoint_path,
+        batch_size=batch_size,
+        dry_run=dry_run,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-price and re-decide processed claims")
+    parser.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE)
+    parser.add_argument("--checkpoint", default=settings.BACKFILL_CHECKPOINT_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Count changes without writing them")
+    parser.add_argument("--restart", action="store_true", help="Ignore an unfinished checkpoint")
+    args = parser.parse_args()
+
+    job = create_backfill_job(args.checkpoint, args.batch_size, args.dry_run)
+    try:
+        print(json.dumps(asyncio.run(job.run(restart=args.restart)), indent=2))
+    except BackfillRunningError as e:
+        parser.exit(1, f"{e}\n")
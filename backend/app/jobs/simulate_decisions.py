@@ -0,0 +1,43 @@
+"""Simulate decision thresholds over all processed claims.
+
+Run from ``backend/`` with comma-separated values for any threshold; every
+combination is evaluated and omitted thresholds keep their current value::
+
+    python -m app.jobs.simulate_decisions \\
+        --auto-approve-cost-max 10000,15000,20000,25000 --reject-fraud-min 70,80,90
+
+Prints one JSON object per setting with approval / review / reject rates
+and the cost totals per decision. The same simulation is available from the
+admin API (``POST /api/v1/admin/decisions/simulate``).
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import fields
+from app.db.repositories.claim_repo import ClaimRepository
+from app.services.decision_service import DecisionThresholds
+from app.services.decision_simulator import DecisionSimulator, threshold_grid
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+async def main(grid_values: dict) -> None:
+    grid = threshold_grid(**grid_values)
+    simulator = await DecisionSimulator.load(ClaimRepository())
+    for result in simulator.simulate(grid):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate decision thresholds over historical claims")
+    for field in fields(DecisionThresholds):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=_int_list,
+            help=f"comma-separated values (current: {field.default})",
+        )
+    args = parser.parse_args()
+    asyncio.run(main({f.name: getattr(args, f.name) for f in fields(DecisionThresholds)}))
@@ -1,10 +1,29 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.api.v1.router import router as v1_router
+from app.middleware.admission import AdmissionControlMiddleware, AdmissionController
+from app.middleware.body_limit import BodySizeLimitMiddleware
 from app.middleware.error_handler import global_exception_handler
 from app.middleware.rate_limiter import RateLimitMiddleware
+from app.middleware.rate_limit_backends import create_rate_limit_backend
 from app.config import settings
+from app.db.redis_client import close_redis_client
+from app.ml.inference_queue import inference_queue
+from app.services.claim_service import run_explanation_recovery
+from app.services.llm_providers import aclose_mock_client, start_mock_llm
+from app.services.report_service import report_pool
+from app.services.storage_backends import get_storage_backend
+from app.utils.background import drain as drain_background_tasks
+from app.utils.http_clients import SUPABASE_STORAGE, http_clients
+from app.utils.constants import (
+    ADMISSION_CONTROLLED_ROUTES,
+    MAX_IMAGE_SIZE,
+    MAX_REQUEST_BODY_SIZE,
+    RATE_LIMIT_LOOPBACK_EXEMPT_ROUTES,
+    RATE_LIMIT_ROUTE_COSTS,
+)
 from app.utils.logger import logger
 
 # Global ML model instances (loaded once at startup)
@@ -16,26 +35,44 @@ async def lifespan(app: FastAPI):
     """Load ML models on startup, cleanup on shutdown."""
     logger.info("Starting ClaimIQ backend...")
 
+    # Pooled outbound HTTP clients (one per upstream)
+    await http_clients.startup()
+    get_storage_backend()
+    if "mock" in (settings.VISION_LLM_PROVIDER, settings.LLM_HEDGE_PROVIDER):
+        await start_mock_llm()
+
     # Load YOLO model
     try:
         from app.ml.yolo_detector import YOLODetector
-        ml_models["yolo"] = YOLODetector()
+        ml_models["yolo"] = YOLODetector(http_client=http_clients.get(SUPABASE_STORAGE))
     except Exception as e:
         logger.warning(f"YOLO model failed to load: {e}. Damage detection will be unavailable.")
 
     # Load CLIP model
     try:
         from app.ml.clip_embedder import CLIPEmbedder
-        ml_models["clip"] = CLIPEmbedder()
+        ml_models["clip"] = CLIPEmbedder(http_client=http_clients.get(SUPABASE_STORAGE))
     except Exception as e:
         logger.warning(f"CLIP model failed to load: {e}. Fraud image similarity will be unavailable.")
 
     logger.info(f"ML models loaded: {list(ml_models.keys())}")
 
+    # Deferred explanations orphaned by an earlier restart would otherwise stay pending
+    explanation_recovery = asyncio.create_task(run_explanation_recovery())
+
     yield
 
     logger.info("Shutting down ClaimIQ backend...")
+    explanation_recovery.cancel()
+    # Let deferred work (e.g. AI explanations) finish before its clients are closed
+    await drain_background_tasks(timeout=settings.HTTP_LLM_TIMEOUT_SECONDS)
     ml_models.clear()
+    inference_queue.shutdown()
+    report_pool.shutdown()
+    await http_clients.aclose()
+    await aclose_mock_client()
+    await rate_limit_backend.close()
+    await close_redis_client()
 
 
 app = FastAPI(
@@ -55,8 +92,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admission control / load shedding for ML-heavy routes
+admission_controller = AdmissionController(
+    inference_queue,
+    max_inflight=settings.PIPELINE_MAX_INFLIGHT,
+    max_queue_depth=settings.INFERENCE_QUEUE_HIGH_WATERMARK,
+    retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    controller=admission_controller,
+    routes=ADMISSION_CONTROLLED_ROUTES,
+)
+
+# Reject oversized uploads before they are buffered (and before taking an admission slot)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=MAX_REQUEST_BODY_SIZE,
+    max_part_size=MAX_IMAGE_SIZE,
+)
+
 # Rate limiting
-app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT_PER_MINUTE)
+rate_limit_backend = create_rate_limit_backend(
+    settings.RATE_LIMIT_BACKEND,
+    requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+    burst=settings.RATE_LIMIT_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+)
+app.add_middleware(
+    RateLimitMiddleware,
+    requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+    backend=rate_limit_backend,
+    route_costs=RATE_LIMIT_ROUTE_COSTS,
+    loopback_exempt_routes=RATE_LIMIT_LOOPBACK_EXEMPT_ROUTES,
+)
 
 # Global error handler
 app.add_exception_handler(Exception, global_exception_handler)
@@ -71,5 +140,6 @@ async def health_check():
     return {
         "status": "healthy",
         "models_loaded": list(ml_models.keys()),
+        "load": admission_controller.stats(),
         "version": "1.0.0",
     }
@@ -0,0 +1,90 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.middleware.route_matching import compile_routes, match_route
+from app.ml.inference_queue import InferenceQueue
+from app.utils.logger import logger
+
+
+class AdmissionController:
+    """Track in-flight ML pipeline requests and decide whether to admit more.
+
+    A request is rejected once either the number of in-flight pipeline runs
+    reaches ``max_inflight`` or the inference queue is at ``max_queue_depth``.
+    """
+
+    def __init__(
+        self,
+        inference_queue: InferenceQueue,
+        max_inflight: int = 4,
+        max_queue_depth: int = 8,
+        retry_after_seconds: int = 5,
+    ):
+        self.inference_queue = inference_queue
+        self.max_inflight = max_inflight
+        self.max_queue_depth = max_queue_depth
+        self.retry_after_seconds = retry_after_seconds
+        self.inflight = 0
+        self.rejected = 0
+
+    def try_admit(self) -> bool:
+        if self.inflight >= self.max_inflight or self.inference_queue.depth >= self.max_queue_depth:
+            self.rejected += 1
+            return False
+        self.inflight += 1
+        return True
+
+    def release(self) -> None:
+        self.inflight = max(0, self.inflight - 1)
+
+    def stats(self) -> dict:
+        return {
+            "inflight_pipelines": self.inflight,
+            "max_inflight_pipelines": self.max_inflight,
+            "inference_queue_depth": self.inference_queue.depth,
+            "max_inference_queue_depth": self.max_queue_depth,
+            "rejected_total": self.rejected,
+        }
+
+
+class AdmissionControlMiddleware:
+    """Shed load on ML-heavy routes with 503 + Retry-After; other routes pass through.
+
+    Runs before the request body is read, so rejected uploads cost no memory.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        routes: list[tuple[str, str]],
+    ):
+        self.app = app
+        self.controller = controller
+        self.routes = compile_routes((method, path, True) for method, path in routes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not match_route(
+            self.routes, scope["method"], scope["path"], False
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.controller.try_admit():
+            logger.warning(
+                f"Shedding {scope['method']} {scope['path']}: {self.controller.stats()}"
+            )
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "error": "service_overloaded",
+                    "message": "Claim processing is at capacity. Please retry shortly.",
+                },
+                headers={"Retry-After": str(self.controller.retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
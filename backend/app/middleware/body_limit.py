@@ -0,0 +1,108 @@
+from multipart.multipart import parse_options_header
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.exceptions import PayloadTooLargeError
+
+# Allowance on top of max_part_size for a part's own headers (disposition, type)
+PART_HEADER_ALLOWANCE = 16 * 1024
+
+
+class _PartSizeTracker:
+    """Counts the bytes of the current multipart part as the body streams in.
+
+    A part starts after each boundary delimiter; the delimiter may be split
+    across chunks, so the tail of the previous chunk is kept for the search.
+    """
+
+    def __init__(self, boundary: bytes):
+        self.delimiter = b"\r\n--" + boundary
+        self._tail = b""
+        self.part_bytes = 0
+
+    def feed(self, chunk: bytes) -> int:
+        data = self._tail + chunk
+        index = data.rfind(self.delimiter)
+        if index >= 0:
+            self.part_bytes = len(data) - (index + len(self.delimiter))
+        else:
+            self.part_bytes += len(chunk)
+        self._tail = data[-(len(self.delimiter) - 1):]
+        return self.part_bytes
+
+
+class BodySizeLimitMiddleware:
+    """Rejects oversized request bodies before the app buffers or parses them.
+
+    A declared Content-Length over the limit is answered with 413 without
+    reading the body. Bodies without one (chunked) are counted as they
+    stream in and cut off as soon as they cross the limit. With
+    ``max_part_size``, each part of a multipart/form-data body is counted
+    too, so one oversized file is cut off as soon as it crosses the per-file
+    limit instead of being received (and spooled) whole first.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, max_part_size: int | None = None):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.max_part_size = max_part_size
+
+    def _part_tracker(self, headers: Headers) -> _PartSizeTracker | None:
+        if self.max_part_size is None:
+            return None
+        content_type, options = parse_options_header(headers.get("content-type", ""))
+        boundary = options.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            return None
+        return _PartSizeTracker(boundary)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            await self._reject(scope, receive, send, PayloadTooLargeError(self.max_body_size))
+            return
+
+        parts = self._part_tracker(headers)
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                # HTTPExceptions, so FastAPI's body parsing re-raises them as a 413
+                if received > self.max_body_size:
+                    raise PayloadTooLargeError(self.max_body_size)
+                if parts is not None and parts.feed(body) > self.max_part_size + PART_HEADER_ALLOWANCE:
+                    raise PayloadTooLargeError(self.max_part_size, subject="File size")
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except PayloadTooLargeError as e:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, e)
+
+    async def _reject(
+        self, scope: Scope, receive: Receive, send: Send, error: PayloadTooLargeError
+    ) -> None:
+        response = JSONResponse(
+            status_code=413,
+            content={"error": "payload_too_large", "message": error.detail},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,157 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from app.utils.logger import logger
+
+
+class GCRALimiter:
+    """Generic Cell Rate Algorithm (token bucket equivalent) with O(1) state per key.
+
+    Each key stores a single "theoretical arrival time" (TAT). A key whose TAT
+    is in the past has a full bucket, which is indistinguishable from having no
+    state at all, so such keys can be evicted without changing any decision.
+    Keys are kept in LRU order and capped at ``max_keys``.
+    """
+
+    def __init__(self, requests_per_minute: int = 60, burst: int | None = None, max_keys: int = 10000):
+        self.rpm = max(1, requests_per_minute)
+        self.burst = max(1, burst or self.rpm)
+        self.max_keys = max_keys
+        self.emission_interval = 60.0 / self.rpm
+        self.burst_tolerance = self.emission_interval * self.burst
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    def hit(self, key: str, cost: int = 1, now: float | None = None) -> tuple[bool, int, float]:
+        """Consume ``cost`` units for ``key``.
+
+        Returns ``(allowed, remaining, retry_after_seconds)``.
+        """
+        now = time.monotonic() if now is None else now
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + self.emission_interval * cost
+        allow_at = new_tat - self.burst_tolerance
+
+        if now < allow_at:
+            return False, 0, allow_at - now
+
+        self._tat[key] = new_tat
+        self._tat.move_to_end(key)
+        self._evict(now)
+
+        remaining = int((now - allow_at) / self.emission_interval)
+        return True, max(0, remaining), 0.0
+
+    def _evict(self, now: float) -> None:
+        # Drop idle keys (bucket already refilled) from the LRU end, bounded work per call
+        for _ in range(2):
+            if not self._tat:
+                break
+            oldest_key, oldest_tat = next(iter(self._tat.items()))
+            if oldest_tat > now:
+                break
+            del self._tat[oldest_key]
+
+        while len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class RateLimitBackend(ABC):
+    """Interface for rate-limit state stores."""
+
+    @abstractmethod
+    async def hit(self, key: str, cost: int = 1) -> tuple[bool, int, float]:
+        """Consume ``cost`` units for ``key``; return ``(allowed, remaining, retry_after)``."""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process state. Each uvicorn worker enforces its own limit."""
+
+    def __init__(self, requests_per_minute: int = 60, burst: int | None = None, max_keys: int = 10000):
+        self.limiter = GCRALimiter(requests_per_minute, burst=burst, max_keys=max_keys)
+
+    async def hit(self, key: str, cost: int = 1) -> tuple[bool, int, float]:
+        return self.limiter.hit(key, cost)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """GCRA state shared across workers and nodes through Redis.
+
+    The whole read-modify-write runs in one Lua script, using the Redis
+    server clock so nodes with skewed clocks still agree. Keys expire once the
+    bucket has refilled. If Redis is unreachable the backend degrades to a
+    per-process limiter instead of failing requests.
+    """
+
+    KEY_PREFIX = "claimiq:ratelimit:"
+
+    GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + emission * cost
+local allow_at = new_tat - tolerance
+if now < allow_at then
+    return {0, 0, math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.max(1, math.ceil(new_tat - now)))
+return {1, math.floor((now - allow_at) / emission), 0}
+"""
+
+    def __init__(self, redis_client, requests_per_minute: int = 60, burst: int | None = None, max_keys: int = 10000):
+        self.redis = redis_client
+        rpm = max(1, requests_per_minute)
+        self.emission_ms = 60000.0 / rpm
+        self.tolerance_ms = self.emission_ms * max(1, burst or rpm)
+        self._script = redis_client.register_script(self.GCRA_SCRIPT)
+        self._fallback = MemoryRateLimitBackend(requests_per_minute, burst=burst, max_keys=max_keys)
+        self._degraded = False
+
+    async def hit(self, key: str, cost: int = 1) -> tuple[bool, int, float]:
+        try:
+            allowed, remaining, retry_after_ms = await self._script(
+                keys=[self.KEY_PREFIX + key],
+                args=[self.emission_ms, self.tolerance_ms, cost],
+            )
+        except Exception as e:
+            if not self._degraded:
+                logger.warning(f"Redis rate limiter unavailable, using per-process limits: {e}")
+                self._degraded = True
+            return await self._fallback.hit(key, cost)
+
+        if self._degraded:
+            logger.info("Redis rate limiter recovered")
+            self._degraded = False
+        return bool(allowed), int(remaining), int(retry_after_ms) / 1000.0
+
+
+def create_rate_limit_backend(
+    backend: str,
+    requests_per_minute: int,
+    burst: int | None = None,
+    max_keys: int = 10000,
+) -> RateLimitBackend:
+    """Build the configured backend (``memory`` or ``redis``)."""
+    if backend == "redis":
+        from app.db.redis_client import get_redis_client
+
+        client = get_redis_client()
+        if client is not None:
+            logger.info("Rate limiting state shared via Redis")
+            return RedisRateLimitBackend(client, requests_per_minute, burst=burst, max_keys=max_keys)
+        logger.warning("RATE_LIMIT_BACKEND=redis but Redis is not configured; using in-memory limits")
+    elif backend != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{backend}'; using in-memory limits")
+
+    return MemoryRateLimitBackend(requests_per_minute, burst=burst, max_keys=max_keys)
@@ -1,39 +1,84 @@
-import time
-from collections import defaultdict
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import ipaddress
+import math
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.middleware.rate_limit_backends import MemoryRateLimitBackend, RateLimitBackend
+from app.middleware.route_matching import compile_routes, match_route
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory sliding window rate limiter per IP."""
+class RateLimitMiddleware:
+    """Per-IP rate limiter implemented as raw ASGI middleware.
 
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
+    State lives in a pluggable backend (in-memory or Redis). Each request
+    consumes a cost looked up from ``route_costs`` so expensive endpoints use
+    up more of the per-minute budget than cheap reads. Requests from a
+    loopback address to ``loopback_exempt_routes`` (the API calling itself)
+    are not limited.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        backend: RateLimitBackend | None = None,
+        route_costs: list[tuple[str, str, int]] | None = None,
+        loopback_exempt_routes: list[tuple[str, str]] | None = None,
+    ):
+        self.app = app
         self.rpm = requests_per_minute
-        self.requests: dict = defaultdict(list)
+        self.backend = backend or MemoryRateLimitBackend(requests_per_minute)
+        self.route_costs = compile_routes(route_costs or [])
+        self.loopback_exempt_routes = compile_routes(
+            (method, path, True) for method, path in loopback_exempt_routes or []
+        )
+
+    @staticmethod
+    def _is_loopback(client_ip: str) -> bool:
+        try:
+            return ipaddress.ip_address(client_ip).is_loopback
+        except ValueError:
+            return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host if request.client else "unknown"
-        now = time.time()
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        if (
+            self.loopback_exempt_routes
+            and self._is_loopback(client_ip)
+            and match_route(self.loopback_exempt_routes, scope["method"], scope["path"], False)
+        ):
+            await self.app(scope, receive, send)
+            return
 
-        # Clean entries older than 60 seconds
-        self.requests[client_ip] = [
-            t for t in self.requests[client_ip] if now - t < 60
-        ]
+        cost = match_route(self.route_costs, scope["method"], scope["path"], 1)
+        allowed, remaining, retry_after = await self.backend.hit(client_ip, cost)
 
-        if len(self.requests[client_ip]) >= self.rpm:
-            return JSONResponse(
+        if not allowed:
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "error": "rate_limit_exceeded",
                     "message": "Too many requests. Please try again later.",
                 },
+                headers={
+                    "Retry-After": str(max(1, math.ceil(retry_after))),
+                    "X-RateLimit-Limit": str(self.rpm),
+                    "X-RateLimit-Remaining": "0",
+                },
             )
+            await response(scope, receive, send)
+            return
 
-        self.requests[client_ip].append(now)
-        response = await call_next(request)
-        response.headers["X-RateLimit-Remaining"] = str(
-            self.rpm - len(self.requests[client_ip])
-        )
-        return response
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = str(self.rpm)
+                headers["X-RateLimit-Remaining"] = str(remaining)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
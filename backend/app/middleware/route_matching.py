@@ -0,0 +1,27 @@
+import re
+from typing import Iterable, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def compile_routes(entries: Iterable[tuple[str, str, T]]) -> list[tuple[str, re.Pattern, T]]:
+    """Compile ``(METHOD, "/path/*/segments", value)`` entries for matching.
+
+    ``*`` matches exactly one path segment; a trailing slash is optional.
+    """
+    compiled = []
+    for method, pattern, value in entries:
+        parts = [
+            "[^/]+" if segment == "*" else re.escape(segment)
+            for segment in pattern.strip("/").split("/")
+        ]
+        regex = re.compile("^/" + "/".join(parts) + "/?$")
+        compiled.append((method.upper(), regex, value))
+    return compiled
+
+
+def match_route(routes: Sequence[tuple[str, re.Pattern, T]], method: str, path: str, default: T) -> T:
+    for route_method, regex, value in routes:
+        if route_method == method and regex.match(path):
+            return value
+    return default
@@ -2,14 +2,17 @@ import io
 import httpx
 import numpy as np
 from PIL import Image
-from typing import List
+from typing import List, Optional
+from app.ml.inference_queue import inference_queue
+from app.utils.http_clients import SUPABASE_STORAGE, http_clients
 from app.utils.logger import logger
 
 
 class CLIPEmbedder:
     """Generate image embeddings using OpenAI CLIP ViT-B/32."""
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        self.http_client = http_client
         try:
             import torch
             import clip
@@ -27,17 +30,24 @@ class CLIPEmbedder:
     def is_available(self) -> bool:
         return self._available
 
-    async def get_embedding(self, image_url: str) -> List[float]:
-        """Generate CLIP embedding for an image URL."""
+    async def get_embedding(self, image: str | bytes) -> List[float]:
+        """Generate CLIP embedding for an image URL or encoded image bytes."""
         if not self._available:
             logger.warning("CLIP not available, returning empty embedding")
             return [0.0] * 512
 
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(image_url)
+        if isinstance(image, bytes):
+            content = image
+        else:
+            client = self.http_client or http_clients.get(SUPABASE_STORAGE)
+            resp = await client.get(image)
             resp.raise_for_status()
+            content = resp.content
 
-        image = Image.open(io.BytesIO(resp.content)).convert("RGB")
+        return await inference_queue.run(self._embed_sync, content)
+
+    def _embed_sync(self, content: bytes) -> List[float]:
+        image = Image.open(io.BytesIO(content)).convert("RGB")
         image_input = self.preprocess(image).unsqueeze(0).to(self.device)
 
         with self.torch.no_grad():
@@ -0,0 +1,55 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+from app.config import settings
+
+
+class InferenceQueue:
+    """Run blocking model inference off the event loop on a bounded thread pool.
+
+    Tracks how many calls are waiting for a worker and how many are running so
+    admission control can shed load before the queue grows unbounded.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = max(1, workers)
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self.queued = 0
+        self.active = 0
+
+    @property
+    def depth(self) -> int:
+        return self.queued + self.active
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on an inference worker and await the result."""
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+inference_queue = InferenceQueue(workers=settings.INFERENCE_WORKERS)
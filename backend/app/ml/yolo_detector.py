@@ -4,6 +4,8 @@ from PIL import Image
 from ultralytics import YOLO
 from typing import List, Dict, Tuple, Optional
 from app.config import resolve_yolo_model_path
+from app.ml.inference_queue import inference_queue
+from app.utils.http_clients import SUPABASE_STORAGE, http_clients
 from app.utils.logger import logger
 from app.utils.constants import MAX_IMAGE_DIMENSION
 
@@ -45,7 +47,8 @@ class YOLODetector:
         "crack": None,
     }
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        self.http_client = http_client
         model_path = resolve_yolo_model_path()
         self.model_path = model_path
         self.model = YOLO(model_path)
@@ -57,16 +60,34 @@ class YOLODetector:
         return detections
 
     async def detect_with_annotated_image(
-        self, image_url: str
+        self, image: str | bytes
     ) -> Tuple[List[Dict], Optional[bytes]]:
-        """Run detection and return both detections and a YOLO-annotated JPEG image."""
+        """Run detection and return both detections and a YOLO-annotated JPEG image.
+
+        ``image`` is either a URL to download or the encoded image bytes.
+        """
         logger.info(f"Running YOLO inference with model: {self.model_path}")
-        # Download image
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(image_url)
+        if isinstance(image, bytes):
+            content, label = image, "in-memory image"
+        else:
+            # Download image
+            client = self.http_client or http_clients.get(SUPABASE_STORAGE)
+            resp = await client.get(image)
             resp.raise_for_status()
+            content, label = resp.content, image
+
+        # Decode + predict + render are CPU-bound; run them on the inference pool
+        detections, annotated_bytes = await inference_queue.run(
+            self._detect_sync, content, label
+        )
+
+        logger.info(f"YOLO inference complete: {len(detections)} detections")
+        return detections, annotated_bytes
 
-        image = Image.open(io.BytesIO(resp.content)).convert("RGB")
+    def _detect_sync(
+        self, content: bytes, image_url: str
+    ) -> Tuple[List[Dict], Optional[bytes]]:
+        image = Image.open(io.BytesIO(content)).convert("RGB")
 
         # Resize if too large
         if max(image.size) > MAX_IMAGE_DIMENSION:
@@ -116,7 +137,6 @@ class YOLODetector:
         except Exception as e:
             logger.warning(f"Failed to render YOLO annotated image for {image_url}: {e}")
 
-        logger.info(f"YOLO inference complete: {len(detections)} detections")
         return detections, annotated_bytes
 
     def _infer_zone_from_bbox(
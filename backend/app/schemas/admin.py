@@ -0,0 +1,57 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+from app.utils.constants import DECISION_SIMULATION_MAX_SETTINGS, REPORT_EXPORT_MAX_CLAIMS
+
+
+class ReportExportRequest(BaseModel):
+    """Claims to export: explicit ``claim_ids``, or processed claims matching the filters."""
+
+    claim_ids: Optional[List[str]] = Field(None, min_length=1, max_length=REPORT_EXPORT_MAX_CLAIMS)
+    user_id: Optional[str] = None
+    decision: Optional[str] = None
+    risk_level: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    limit: int = Field(REPORT_EXPORT_MAX_CLAIMS, ge=1, le=REPORT_EXPORT_MAX_CLAIMS)
+
+    @model_validator(mode="after")
+    def _ids_or_filters(self):
+        has_filters = any(
+            v is not None
+            for v in (self.user_id, self.decision, self.risk_level, self.created_from, self.created_to)
+        )
+        if self.claim_ids and has_filters:
+            raise ValueError("Pass either claim_ids or filters, not both")
+        return self
+
+
+class BackfillRequest(BaseModel):
+    dry_run: bool = False
+    restart: bool = False
+    batch_size: Optional[int] = Field(None, ge=1, le=5000)
+
+
+class DecisionSimulationRequest(BaseModel):
+    """Threshold values to try; every combination is simulated. Omitted ones keep their current value."""
+
+    auto_approve_fraud_max: Optional[List[int]] = Field(None, min_length=1)
+    auto_approve_cost_max: Optional[List[int]] = Field(None, min_length=1)
+    reject_fraud_min: Optional[List[int]] = Field(None, min_length=1)
+    high_cost_threshold: Optional[List[int]] = Field(None, min_length=1)
+
+    @model_validator(mode="after")
+    def _grid_size(self):
+        size = 1
+        for values in (
+            self.auto_approve_fraud_max,
+            self.auto_approve_cost_max,
+            self.reject_fraud_min,
+            self.high_cost_threshold,
+        ):
+            size *= len(set(values or [0]))
+        if size > DECISION_SIMULATION_MAX_SETTINGS:
+            raise ValueError(
+                f"Grid has {size} threshold settings; at most {DECISION_SIMULATION_MAX_SETTINGS} allowed"
+            )
+        return self
@@ -3,6 +3,7 @@ from typing import Optional, List
 from datetime import datetime
 from app.schemas.damage import DamageZone
 from app.schemas.cost import CostBreakdown
+from app.utils.constants import MAX_IMAGES_PER_CLAIM
 
 
 class ClaimCreateRequest(BaseModel):
@@ -14,10 +15,36 @@ class ClaimCreateRequest(BaseModel):
     location: Optional[str] = Field(None, max_length=200)
 
 
+class ClaimFromUploadsRequest(ClaimCreateRequest):
+    object_paths: List[str] = Field(..., min_length=1, max_length=MAX_IMAGES_PER_CLAIM)
+
+
+class UploadUrlFile(BaseModel):
+    filename: Optional[str] = Field(None, max_length=255)
+    content_type: str
+    size: Optional[int] = Field(None, ge=0)
+
+
+class UploadUrlRequest(BaseModel):
+    files: List[UploadUrlFile] = Field(..., min_length=1, max_length=MAX_IMAGES_PER_CLAIM)
+
+
+class SignedUpload(BaseModel):
+    path: str
+    signed_url: str
+    token: str
+
+
+class UploadUrlResponse(BaseModel):
+    uploads: List[SignedUpload]
+    expires_in: int
+
+
 class ClaimResponse(BaseModel):
     id: str
     user_id: str
     image_urls: List[str]
+    thumbnail_urls: Optional[List[Optional[str]]] = None
     user_description: Optional[str] = None
     policy_number: str
     vehicle_company: Optional[str] = None
@@ -26,6 +53,7 @@ class ClaimResponse(BaseModel):
     damage_zones: Optional[List[DamageZone]] = None
     damage_severity_score: Optional[int] = None
     ai_explanation: Optional[str] = None
+    explanation_status: Optional[str] = None  # pending | ready | failed (deferred explanations)
     cost_breakdown: Optional[List[CostBreakdown]] = None
     cost_total: Optional[int] = None
     fraud_score: Optional[int] = None
@@ -39,3 +67,4 @@ class ClaimResponse(BaseModel):
 
 class ClaimProcessResponse(ClaimResponse):
     processing_time_ms: int
+    degraded_stages: List[str] = Field(default_factory=list)
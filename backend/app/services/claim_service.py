@@ -1,13 +1,28 @@
+import asyncio
+import json
 import time
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, List, Optional
 from app.services.damage_service import DamageService
 from app.services.cost_service import CostService
 from app.services.fraud_service import FraudService
 from app.services.decision_service import DecisionService
-from app.services.vision_llm_service import VisionLLMService
+from app.services.vision_llm_service import ExplanationFallbackError, VisionLLMService
 from app.services.storage_service import StorageService
+from app.services.report_service import ReportService
+from app.services.response_cache import claim_response_cache
+from app.services.explanation_stream import explanation_streams
 from app.db.repositories.claim_repo import ClaimRepository
 from app.schemas.claim import ClaimProcessResponse
+from app.schemas.damage import DamageZone
+from app.config import settings
+from app.utils.background import spawn
+from app.utils.constants import (
+    EXPLANATION_PENDING_STALE_SECONDS,
+    EXPLANATION_RECOVERY_INTERVAL_SECONDS,
+)
+from app.utils.deadline import Deadline, parse_degradation_ladder
+from app.utils.image_processing import inference_urls, parse_image_variants
 from app.utils.logger import logger
 from app.utils.scoring import compute_overall_severity_score
 
@@ -23,6 +38,8 @@ class ClaimService:
         decision_service: DecisionService,
         vision_llm_service: VisionLLMService,
         claim_repo: ClaimRepository,
+        storage_service: StorageService | None = None,
+        report_service: ReportService | None = None,
     ):
         self.damage_service = damage_service
         self.cost_service = cost_service
@@ -30,6 +47,85 @@ class ClaimService:
         self.decision_service = decision_service
         self.vision_llm_service = vision_llm_service
         self.claim_repo = claim_repo
+        self.storage_service = storage_service or StorageService()
+        self.report_service = report_service or ReportService()
+
+    async def _upload_overlays(
+        self,
+        claim_id: str,
+        user_id: str,
+        image_urls: List[str],
+        overlay_images: dict[int, bytes],
+        deadline: Deadline,
+    ) -> List[str]:
+        """Upload annotated images concurrently; any that fail keep their original URL."""
+        try:
+            uploaded = await asyncio.wait_for(
+                self.storage_service.upload_processed_images(
+                    overlay_images, user_id=user_id, claim_id=claim_id
+                ),
+                timeout=deadline.timeout(settings.HTTP_STORAGE_TIMEOUT_SECONDS),
+            )
+        except asyncio.TimeoutError:
+            deadline.record("overlay_upload", "timed out, kept original images")
+            return image_urls.copy()
+
+        processed_image_urls = []
+        for idx, original_url in enumerate(image_urls):
+            result = uploaded.get(idx)
+            if isinstance(result, str):
+                processed_image_urls.append(result)
+                continue
+            if result is not None:
+                logger.error(
+                    f"[{claim_id[:8]}] Failed to upload processed image {idx + 1}: {result}"
+                )
+            processed_image_urls.append(original_url)
+        return processed_image_urls
+
+    async def _join_image_uploads(
+        self, claim_id: str, image_uploads: Awaitable[List[dict]]
+    ) -> List[dict]:
+        """Wait for the concurrent original/variant uploads and record their URLs on the claim."""
+        image_variants = await image_uploads
+        await self.claim_repo.update_images(
+            claim_id,
+            image_urls=[v["original"] for v in image_variants],
+            image_variants=image_variants,
+        )
+        return image_variants
+
+    async def _complete_explanation(self, claim_id: str, explain_kwargs: dict) -> None:
+        """Generate a deferred explanation and patch it onto the processed claim."""
+        logger.info(f"[{claim_id[:8]}] Generating deferred AI explanation...")
+        try:
+            ai_explanation = await self.vision_llm_service.explain_damage(
+                allow_fallback=False, **explain_kwargs
+            )
+            explanation_status = "ready"
+        except ExplanationFallbackError as e:
+            # Still store the template text, but mark the explanation as not the LLM's
+            logger.warning(f"[{claim_id[:8]}] Deferred explanation fell back to template: {e}")
+            ai_explanation, explanation_status = e.fallback, "failed"
+        except Exception as e:
+            logger.error(f"[{claim_id[:8]}] Deferred explanation failed: {e}")
+            ai_explanation, explanation_status = None, "failed"
+
+        try:
+            await self.claim_repo.update_explanation(claim_id, ai_explanation, explanation_status)
+        finally:
+            await claim_response_cache.invalidate(claim_id)
+            explanation_streams.finish(claim_id, "processed", ai_explanation)
+        logger.info(f"[{claim_id[:8]}] Deferred explanation {explanation_status}")
+
+    async def _prerender_report(self, claim_id: str) -> None:
+        """Render the processed claim's PDF into storage so downloads are a plain fetch."""
+        # Re-read the row: processed_at and the serialised fields are set by the database write
+        claim = await self.claim_repo.get_by_id(claim_id)
+        if not claim or claim.get("status") != "processed":
+            return
+        path = await self.report_service.store_report(claim)
+        logger.info(f"[{claim_id[:8]}] Report pre-rendered to {path}")
 
     @staticmethod
     def _compute_damage_severity_score(damage_zones: List[dict]) -> int | None:
@@ -43,6 +139,8 @@ class ClaimService:
         user_id: str,
         vehicle_company: str | None = None,
         vehicle_model: str | None = None,
+        image_bytes: Optional[List[bytes]] = None,
+        image_uploads: Optional[Awaitable[List[dict]]] = None,
     ) -> ClaimProcessResponse:
         """
         Full claim processing pipeline:
@@ -52,11 +150,32 @@ class ClaimService:
         4. Fraud Detection — CLIP similarity + frequency + inconsistency
         5. Decision Engine — approve / review / reject
         6. Persist all results
+
+        The whole run shares one latency budget (CLAIM_LATENCY_BUDGET_MS).
+        When it runs low, optional stages are dropped in ladder order (LLM ->
+        template fallback, overlay upload, CLIP similarity) and reported in
+        ``degraded_stages``. The explanation is streamed to clients watching
+        the claim (see ``explanation_streams``) as the LLM generates it.
+        With DEFERRED_EXPLANATION the decision is persisted and returned
+        without waiting for the LLM (``explanation_status="pending"``); the
+        explanation is generated in the background and patched on afterwards.
+
+        For a just-submitted claim the caller can pass the decoded inference
+        images as ``image_bytes`` together with ``image_uploads``, the still
+        running storage upload. Detection and the CLIP embeddings then run on
+        the in-memory bytes while the upload is in flight, and the stored URLs
+        are joined in before anything that needs them.
         """
         start_time = time.time()
+        deadline = Deadline(
+            settings.CLAIM_LATENCY_BUDGET_MS,
+            parse_degradation_ladder(settings.CLAIM_DEGRADATION_LADDER),
+        )
 
-        # Update status to processing
+        # Update status to processing and drop any cached response for a reprocess
         await self.claim_repo.update_status(claim_id, "processing")
+        await claim_response_cache.invalidate(claim_id)
+        explanation_streams.start(claim_id)
 
         try:
             # 1. Fetch claim data
@@ -67,50 +186,63 @@ class ClaimService:
             if claim["status"] == "processed":
                 raise ValueError(f"Claim {claim_id} has already been processed")
 
-            image_urls = claim["image_urls"]
-            effective_vehicle_company = vehicle_company or claim.get("vehicle_company")
-            effective_vehicle_model = vehicle_model or claim.get("vehicle_model")
-
             # 2. Damage Detection
             logger.info(f"[{claim_id[:8]}] Running damage detection...")
-            damage_zones, overlay_images = await self.damage_service.detect_damage_with_overlays(image_urls)
+            if image_bytes is not None:
+                model_sources: List[str | bytes] = list(image_bytes)
+            else:
+                # ML stages read the upright, downscaled variant generated at upload
+                model_sources = inference_urls(
+                    claim["image_urls"], parse_image_variants(claim.get("image_variants"))
+                )
+            # CLIP embeddings for the fraud check run alongside detection, and with it
+            # overlap the storage upload of a just-submitted claim
+            (damage_zones, overlay_images), embeddings = await asyncio.gather(
+                self.damage_service.detect_damage_with_overlays(model_sources),
+                self.fraud_service.embed_images(model_sources, deadline),
+            )
 
-            processed_image_urls = image_urls.copy()
-            if overlay_images:
-                storage_service = StorageService()
-                processed_image_urls = []
-
-                for idx, original_url in enumerate(image_urls):
-                    overlay = overlay_images.get(original_url)
-                    if not overlay:
-                        processed_image_urls.append(original_url)
-                        continue
-
-                    try:
-                        overlay_url = await storage_service.upload_processed_image(
-                            image_bytes=overlay,
-                            user_id=user_id,
-                            claim_id=claim_id,
-                            index=idx,
-                        )
-                        processed_image_urls.append(overlay_url)
-                    except Exception as e:
-                        logger.error(
-                            f"[{claim_id[:8]}] Failed to upload processed image {idx + 1}: {e}"
-                        )
-                        processed_image_urls.append(original_url)
+            if image_uploads is not None:
+                uploads, image_uploads = image_uploads, None
+                image_variants = await self._join_image_uploads(claim_id, uploads)
+                image_urls = [v["original"] for v in image_variants]
             else:
+                image_variants = parse_image_variants(claim.get("image_variants"))
+                image_urls = claim["image_urls"]
+            model_urls = inference_urls(image_urls, image_variants)
+            effective_vehicle_company = vehicle_company or claim.get("vehicle_company")
+            effective_vehicle_model = vehicle_model or claim.get("vehicle_model")
+
+            processed_image_urls = image_urls.copy()
+            if overlay_images and deadline.allows("overlay_upload"):
+                processed_image_urls = await self._upload_overlays(
+                    claim_id, user_id, image_urls, overlay_images, deadline
+                )
+            elif not overlay_images:
                 logger.warning(
                     f"[{claim_id[:8]}] No YOLO overlay images generated; keeping original image URLs"
                 )
 
-            # 3. Vision LLM Explanation
-            logger.info(f"[{claim_id[:8]}] Generating AI explanation...")
-            ai_explanation = await self.vision_llm_service.explain_damage(
-                image_urls=image_urls,
+            # 3. Vision LLM Explanation (or later, in the background, when deferred)
+            explain_kwargs = dict(
+                image_urls=model_urls,
                 damage_zones=damage_zones,
                 user_description=claim.get("user_description"),
+                image_sources=model_sources,
+                on_token=(
+                    explanation_streams.publisher(claim_id)
+                    if settings.LLM_STREAMING_ENABLED
+                    else None
+                ),
             )
+            if settings.DEFERRED_EXPLANATION:
+                ai_explanation, explanation_status = None, "pending"
+            else:
+                logger.info(f"[{claim_id[:8]}] Generating AI explanation...")
+                ai_explanation = await self.vision_llm_service.explain_damage(
+                    deadline=deadline, **explain_kwargs
+                )
+                explanation_status = None
 
             # 4. Cost Estimation
             logger.info(f"[{claim_id[:8]}] Calculating costs...")
@@ -125,9 +257,12 @@ class ClaimService:
             fraud_result = await self.fraud_service.analyze(
                 claim_id=claim_id,
                 user_id=user_id,
-                image_urls=image_urls,
+                image_urls=model_urls,
                 damage_zones=damage_zones,
                 user_description=claim.get("user_description"),
+                deadline=deadline,
+                image_sources=model_sources,
+                embeddings=embeddings,
             )
 
             # 6. Decision Engine
@@ -153,11 +288,23 @@ class ClaimService:
                 decision=decision_result.decision,
                 decision_confidence=decision_result.confidence,
                 risk_level=decision_result.risk_level,
+                explanation_status=explanation_status,
             )
+            await claim_response_cache.invalidate(claim_id)
+            if settings.REPORT_PRERENDER:
+                spawn(self._prerender_report(claim_id), name=f"report-{claim_id[:8]}")
+            if explanation_status == "pending":
+                spawn(
+                    self._complete_explanation(claim_id, explain_kwargs),
+                    name=f"explanation-{claim_id[:8]}",
+                )
+            else:
+                explanation_streams.finish(claim_id, "processed", ai_explanation)
 
             logger.info(
                 f"[{claim_id[:8]}] Processing complete in {processing_time_ms}ms — "
                 f"decision: {decision_result.decision}"
+                + (f", degraded: {deadline.degraded_stages}" if deadline.degraded_stages else "")
             )
 
             # Build response
@@ -169,6 +316,7 @@ class ClaimService:
                 id=claim_id,
                 user_id=user_id,
                 image_urls=processed_image_urls,
+                thumbnail_urls=[v.get("thumbnail") for v in image_variants] or None,
                 user_description=claim.get("user_description"),
                 policy_number=claim["policy_number"],
                 vehicle_company=effective_vehicle_company,
@@ -177,6 +325,7 @@ class ClaimService:
                 damage_zones=damage_zone_dicts,
                 damage_severity_score=damage_severity_score,
                 ai_explanation=ai_explanation,
+                explanation_status=explanation_status,
                 cost_breakdown=cost_breakdown_dicts,
                 cost_total=cost_total,
                 fraud_score=fraud_result.fraud_score,
@@ -187,9 +336,65 @@ class ClaimService:
                 created_at=str(claim["created_at"]),
                 processed_at=str(claim.get("processed_at", "")),
                 processing_time_ms=processing_time_ms,
+                degraded_stages=deadline.degraded_stages,
             )
 
         except Exception as e:
             logger.error(f"[{claim_id[:8]}] Processing failed: {e}")
+            if image_uploads is not None:
+                # Still attach the images so the claim can be reprocessed later
+                try:
+                    await self._join_image_uploads(claim_id, image_uploads)
+                except Exception as upload_error:
+                    logger.error(f"[{claim_id[:8]}] Image upload failed: {upload_error}")
             await self.claim_repo.update_status(claim_id, "error")
+            explanation_streams.finish(claim_id, "error", None)
             raise
+
+
+async def recover_stale_explanations(
+    claim_repo: Optional[ClaimRepository] = None,
+    vision_llm_service: Optional[VisionLLMService] = None,
+) -> int:
+    """Give deferred explanations lost with their worker the template fallback.
+
+    A deferred explanation task dies with its process (restart, or the
+    shutdown drain timing out), leaving the claim pending forever. Claims
+    still pending EXPLANATION_PENDING_STALE_SECONDS after processing are
+    marked ``failed`` with the template text, unless the task finished in the
+    meantime. Returns the number of claims recovered.
+    """
+    claim_repo = claim_repo or ClaimRepository()
+    vision_llm_service = vision_llm_service or VisionLLMService()
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=EXPLANATION_PENDING_STALE_SECONDS)
+    recovered = 0
+    batch_size = 100
+    after_id = None
+    while True:
+        rows = await claim_repo.list_stale_pending_explanations(
+            cutoff.isoformat(), after_id, limit=batch_size
+        )
+        for row in rows:
+            damage_json = row.get("damage_json") or []
+            if isinstance(damage_json, str):
+                damage_json = json.loads(damage_json)
+            text = vision_llm_service.fallback_explanation([DamageZone(**z) for z in damage_json])
+            await claim_repo.update_explanation(row["id"], text, "failed", only_if_pending=True)
+            await claim_response_cache.invalidate(row["id"])
+            recovered += 1
+        if len(rows) < batch_size:
+            break
+        after_id = rows[-1]["id"]
+    if recovered:
+        logger.warning(f"Marked {recovered} stale pending explanations as failed (template fallback)")
+    return recovered
+
+
+async def run_explanation_recovery() -> None:
+    """Run ``recover_stale_explanations`` at startup and every EXPLANATION_RECOVERY_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await recover_stale_explanations()
+        except Exception as e:
+            logger.warning(f"Stale explanation recovery failed: {e}")
+        await asyncio.sleep(EXPLANATION_RECOVERY_INTERVAL_SECONDS)
@@ -1,18 +1,14 @@
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 from app.db.repositories.cost_repo import CostRepository
 from app.schemas.damage import DamageZone
 from app.schemas.cost import CostBreakdown
+from app.services.pricing_lookup import PricingLookup, get_pricing_lookup
 from app.utils.logger import logger
 
 
 class CostService:
     """Estimate repair costs from detected damage categories and quantities."""
 
-    SEVERITY_MAP = {
-        "minor": "minor_cost",
-        "moderate": "moderate_cost",
-        "severe": "severe_cost",
-    }
     SEVERITY_RANK = {"minor": 1, "moderate": 2, "severe": 3}
 
     def __init__(self, cost_repo: CostRepository):
@@ -25,51 +21,75 @@ class CostService:
         vehicle_model: str | None = None,
     ) -> Tuple[List[CostBreakdown], int]:
         """Calculate cost by summing each detected damage category from pricing data."""
+        [(breakdowns, total)] = await self.estimate_costs([
+            {
+                "damage_zones": damage_zones,
+                "vehicle_company": vehicle_company,
+                "vehicle_model": vehicle_model,
+            }
+        ])
+        logger.info(f"Cost estimated: {len(breakdowns)} zones, total ₹{total}")
+        return breakdowns, total
+
+    async def estimate_costs(
+        self, claims: Iterable[dict]
+    ) -> List[Tuple[List[CostBreakdown], int]]:
+        """Price many claims against one compiled pricing lookup (re-pricing, what-if runs).
+
+        Each claim is a mapping with ``damage_zones`` (DamageZone models or
+        dicts, e.g. a stored ``damage_json``) and optional ``vehicle_company``
+        / ``vehicle_model``. Returns ``(breakdowns, total)`` per claim, in order.
+        """
+        pricing = await get_pricing_lookup(self.cost_repo)
+        return [
+            self._price_claim(
+                pricing,
+                claim.get("damage_zones") or [],
+                claim.get("vehicle_company"),
+                claim.get("vehicle_model"),
+            )
+            for claim in claims
+        ]
+
+    def _price_claim(
+        self,
+        pricing: PricingLookup,
+        damage_zones: List[DamageZone | dict],
+        vehicle_company: str | None,
+        vehicle_model: str | None,
+    ) -> Tuple[List[CostBreakdown], int]:
+        brand_id, model_id = pricing.vehicle_ids(vehicle_company, vehicle_model)
         breakdowns: List[CostBreakdown] = []
         total = 0
 
-        grouped_by_damage_type: dict[str, List[DamageZone]] = {}
+        grouped_by_damage_type: dict[str, list] = {}
         for zone in damage_zones:
-            damage_type = (getattr(zone, "damage_type", None) or "unknown").strip().lower()
+            damage_type = (_zone_field(zone, "damage_type") or "unknown").strip().lower()
             grouped_by_damage_type.setdefault(damage_type, []).append(zone)
 
         for damage_type, zones in grouped_by_damage_type.items():
-            primary_zone = zones[0]
-            severity = max(
-                (z.severity for z in zones),
+            severity = str(max(
+                (_zone_field(z, "severity") for z in zones),
                 key=lambda s: self.SEVERITY_RANK.get(str(s).lower(), 2),
-            )
+            )).lower()
             quantity = sum(
-                max(1, int(getattr(z, "detections_count", 1) or 1)) for z in zones
+                max(1, int(_zone_field(z, "detections_count") or 1)) for z in zones
             )
 
-            cost_entry = await self.cost_repo.get_by_zone_or_default(primary_zone.zone)
-            damage_type_cost = await self.cost_repo.get_by_damage_type(
-                damage_type,
-                vehicle_company=vehicle_company,
-                vehicle_model=vehicle_model,
+            unit_repair_cost = pricing.mapped_price(
+                brand_id, model_id, pricing.damage_type_id(damage_type)
             )
-
-            if damage_type_cost is not None:
-                unit_repair_cost = int(damage_type_cost)
-                logger.info(
-                    "Using mapped pricing for "
-                    f"damage_type='{damage_type}', company='{vehicle_company}', model='{vehicle_model}': "
-                    f"₹{unit_repair_cost} x {quantity}"
+            if unit_repair_cost is None:
+                unit_repair_cost = pricing.zone_unit_cost(
+                    _zone_field(zones[0], "zone"), severity
                 )
-            else:
-                severity_col = self.SEVERITY_MAP.get(str(severity).lower(), "moderate_cost")
-                base_cost = int(cost_entry[severity_col])
-                labor = cost_entry.get("labor_cost", 2000)
-                multiplier = cost_entry.get("regional_multiplier", 1.0)
-                unit_repair_cost = int((base_cost + labor) * multiplier)
 
             zone_total = int(unit_repair_cost * quantity)
 
             breakdowns.append(
                 CostBreakdown(
                     zone=damage_type,
-                    severity=str(severity).lower(),
+                    severity=severity,
                     damage_type=damage_type,
                     quantity=quantity,
                     unit_repair_cost=unit_repair_cost,
@@ -82,5 +102,10 @@ class CostService:
 
             total += zone_total
 
-        logger.info(f"Cost estimated: {len(breakdowns)} zones, total ₹{total}")
         return breakdowns, total
+
+
+def _zone_field(zone: DamageZone | dict, name: str):
+    if isinstance(zone, dict):
+        return zone.get(name)
+    return getattr(zone, name, None)
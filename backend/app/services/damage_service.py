@@ -24,24 +24,27 @@ class DamageService:
     def __init__(self, detector: YOLODetector):
         self.detector = detector
 
-    async def detect_damage(self, image_urls: List[str]) -> List[DamageZone]:
+    async def detect_damage(self, images: List[str | bytes]) -> List[DamageZone]:
         """Run YOLO detection on all uploaded images and return zone-level results."""
-        damages, _ = await self.detect_damage_with_overlays(image_urls)
+        damages, _ = await self.detect_damage_with_overlays(images)
         return damages
 
     async def detect_damage_with_overlays(
-        self, image_urls: List[str]
-    ) -> tuple[List[DamageZone], dict[str, bytes]]:
-        """Run YOLO detection and return zone results + annotated image bytes per source URL."""
+        self, images: List[str | bytes]
+    ) -> tuple[List[DamageZone], dict[int, bytes]]:
+        """Run YOLO detection and return zone results + annotated image bytes per image index.
+
+        Each image is a URL to download or already-loaded encoded bytes.
+        """
         zone_metrics: dict[str, dict[str, List[float]]] = {}
-        overlay_images: dict[str, bytes] = {}
+        overlay_images: dict[int, bytes] = {}
 
-        for url in image_urls:
+        for idx, image in enumerate(images):
             try:
-                detections, annotated_bytes = await self.detector.detect_with_annotated_image(url)
+                detections, annotated_bytes = await self.detector.detect_with_annotated_image(image)
 
                 if annotated_bytes:
-                    overlay_images[url] = annotated_bytes
+                    overlay_images[idx] = annotated_bytes
 
                 for det in detections:
                     zone = det["zone"]
@@ -53,10 +56,11 @@ class DamageService:
                     zone_metrics[zone]["bbox"].append(det["bbox"])
                     zone_metrics[zone]["class"].append(str(det.get("class_name", "")))
             except Exception as e:
-                logger.error(f"Damage detection failed for {url}: {e}")
+                label = image if isinstance(image, str) else f"image {idx + 1}"
+                logger.error(f"Damage detection failed for {label}: {e}")
 
         aggregated = self._aggregate_zone_metrics(zone_metrics)
-        logger.info(f"Detected {len(aggregated)} damaged zones from {len(image_urls)} images")
+        logger.info(f"Detected {len(aggregated)} damaged zones from {len(images)} images")
         return aggregated, overlay_images
 
     def _classify_severity(self, confidence: float, area_ratio: float, quantity: int) -> str:
@@ -1,4 +1,6 @@
+from dataclasses import dataclass
 from typing import List
+import numpy as np
 from app.schemas.decision import DecisionResult
 from app.utils.constants import (
     DECISION_AUTO_APPROVE_FRAUD_MAX,
@@ -8,9 +10,85 @@ from app.utils.constants import (
 )
 
 
+# Codes used by the vectorised evaluator (index into these tuples)
+DECISIONS = ("pre_approved", "manual_review", "rejected")
+RISK_LEVELS = ("low", "medium", "high", "critical")
+PRE_APPROVED, MANUAL_REVIEW, REJECTED = range(3)
+LOW, MEDIUM, HIGH, CRITICAL = range(4)
+
+
+@dataclass(frozen=True)
+class DecisionThresholds:
+    auto_approve_fraud_max: int = DECISION_AUTO_APPROVE_FRAUD_MAX
+    auto_approve_cost_max: int = DECISION_AUTO_APPROVE_COST_MAX
+    reject_fraud_min: int = DECISION_REJECT_FRAUD_MIN
+    high_cost_threshold: int = DECISION_HIGH_COST_THRESHOLD
+
+
+def decision_masks(
+    fraud_scores: np.ndarray,
+    cost_totals: np.ndarray,
+    has_duplicate: np.ndarray,
+    thresholds: DecisionThresholds = DecisionThresholds(),
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Boolean ``(reject, review, approve)`` masks for the rules that decide each claim.
+
+    The rules apply in the same order as ``DecisionService.make_decision``,
+    each only to claims no earlier rule decided. Claims in none of the masks
+    fall through to the default manual review.
+    """
+    reject = (fraud_scores > thresholds.reject_fraud_min) | has_duplicate
+    review = ~reject & (
+        (fraud_scores >= thresholds.auto_approve_fraud_max)
+        | (cost_totals > thresholds.high_cost_threshold)
+    )
+    approve = (
+        ~(reject | review)
+        & (fraud_scores < thresholds.auto_approve_fraud_max)
+        & (cost_totals <= thresholds.auto_approve_cost_max)
+    )
+    return reject, review, approve
+
+
+def evaluate_decisions(
+    fraud_scores: np.ndarray,
+    cost_totals: np.ndarray,
+    has_duplicate: np.ndarray,
+    thresholds: DecisionThresholds = DecisionThresholds(),
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorised ``DecisionService.make_decision`` over arrays of claims.
+
+    Returns ``(decision_codes, confidences, risk_codes)``; codes index
+    ``DECISIONS`` and ``RISK_LEVELS``.
+    """
+    fraud = np.asarray(fraud_scores, dtype=np.float64)
+    duplicate = np.asarray(has_duplicate, dtype=bool)
+    reject, review, approve = decision_masks(
+        fraud, np.asarray(cost_totals, dtype=np.float64), duplicate, thresholds
+    )
+    fallback = ~(reject | review | approve)
+
+    decisions = np.full(fraud.shape, MANUAL_REVIEW, dtype=np.int8)
+    decisions[reject] = REJECTED
+    decisions[approve] = PRE_APPROVED
+
+    inverse = np.round(1.0 - fraud / 100, 2)
+    confidences = np.where(reject, np.minimum(0.95, fraud / 100), inverse)
+    confidences[fallback] = 0.75
+
+    risks = np.full(fraud.shape, MEDIUM, dtype=np.int8)
+    risks[reject] = np.where(duplicate[reject], CRITICAL, HIGH)
+    risks[review & (fraud >= 50)] = HIGH
+    risks[approve] = LOW
+    return decisions, confidences, risks
+
+
 class DecisionService:
     """Rule-based decision engine for claim approval."""
 
+    def __init__(self, thresholds: DecisionThresholds = DecisionThresholds()):
+        self.thresholds = thresholds
+
     def make_decision(
         self,
         fraud_score: int,
@@ -24,9 +102,10 @@ class DecisionService:
         - Manual Review: everything else
         """
         has_duplicate = any("Duplicate" in f for f in fraud_flags)
+        t = self.thresholds
 
         # REJECT
-        if fraud_score > DECISION_REJECT_FRAUD_MIN or has_duplicate:
+        if fraud_score > t.reject_fraud_min or has_duplicate:
             return DecisionResult(
                 decision="rejected",
                 confidence=min(0.95, fraud_score / 100),
@@ -34,7 +113,7 @@ class DecisionService:
             )
 
         # MANUAL REVIEW (high fraud or high cost)
-        if fraud_score >= DECISION_AUTO_APPROVE_FRAUD_MAX or cost_total > DECISION_HIGH_COST_THRESHOLD:
+        if fraud_score >= t.auto_approve_fraud_max or cost_total > t.high_cost_threshold:
             confidence = round(1.0 - (fraud_score / 100), 2)
             return DecisionResult(
                 decision="manual_review",
@@ -43,7 +122,7 @@ class DecisionService:
             )
 
         # AUTO APPROVE
-        if fraud_score < DECISION_AUTO_APPROVE_FRAUD_MAX and cost_total <= DECISION_AUTO_APPROVE_COST_MAX:
+        if fraud_score < t.auto_approve_fraud_max and cost_total <= t.auto_approve_cost_max:
             return DecisionResult(
                 decision="pre_approved",
                 confidence=round(1.0 - (fraud_score / 100), 2),
@@ -0,0 +1,140 @@
+import asyncio
+import itertools
+import time
+from dataclasses import asdict, fields
+from typing import Iterable, List, Optional
+import numpy as np
+from app.db.repositories.claim_repo import ClaimRepository
+from app.services.decision_service import DecisionThresholds, decision_masks
+from app.utils.constants import DECISION_SIMULATION_BATCH_SIZE, DECISION_SIMULATION_CACHE_SECONDS
+from app.utils.logger import logger
+
+SIMULATION_COLUMNS = "id, fraud_score, fraud_flags, cost_total"
+
+
+def threshold_grid(**values: Optional[Iterable[int]]) -> List[DecisionThresholds]:
+    """Every combination of the given threshold values (``DecisionThresholds`` field names).
+
+    A field left out (or None) keeps its current value.
+    """
+    axes = []
+    for field in fields(DecisionThresholds):
+        options = values.get(field.name)
+        axes.append(list(dict.fromkeys(options)) if options else [field.default])
+    return [DecisionThresholds(*combo) for combo in itertools.product(*axes)]
+
+
+class DecisionSimulator:
+    """Replay historical claims through alternative decision thresholds.
+
+    Processed claims are loaded once into NumPy arrays (fraud score, cost
+    total, duplicate flag); each threshold setting is then a handful of
+    vectorised comparisons over all of them, so a grid of hundreds of
+    settings over the full history takes seconds rather than a Python loop
+    per claim and setting.
+    """
+
+    def __init__(self, fraud_scores: np.ndarray, cost_totals: np.ndarray, has_duplicate: np.ndarray):
+        self.fraud_scores = np.asarray(fraud_scores, dtype=np.float64)
+        self.cost_totals = np.asarray(cost_totals, dtype=np.float64)
+        self.has_duplicate = np.asarray(has_duplicate, dtype=bool)
+
+    @property
+    def claim_count(self) -> int:
+        return int(self.fraud_scores.size)
+
+    @staticmethod
+    def _columns(claims: List[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count = len(claims)
+        return (
+            np.fromiter((c.get("fraud_score") or 0 for c in claims), np.float64, count),
+            np.fromiter((c.get("cost_total") or 0 for c in claims), np.float64, count),
+            np.fromiter(
+                (any("Duplicate" in f for f in c.get("fraud_flags") or []) for c in claims),
+                bool,
+                count,
+            ),
+        )
+
+    @classmethod
+    def from_claims(cls, claims: Iterable[dict]) -> "DecisionSimulator":
+        return cls(*cls._columns(list(claims)))
+
+    @classmethod
+    def _load_sync(cls, claim_repo: ClaimRepository) -> "DecisionSimulator":
+        """All processed claims, read in keyset batches (blocking: ``load`` runs this in a thread).
+
+        Each page is turned into array chunks straight away and dropped, so
+        only three numbers per claim are held rather than every row.
+        """
+        chunks: List[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        after_id = None
+        while True:
+            page = claim_repo.fetch_page(
+                after_id=after_id,
+                limit=DECISION_SIMULATION_BATCH_SIZE,
+                filters={"status": "processed"},
+                columns=SIMULATION_COLUMNS,
+            )
+            if page:
+                chunks.append(cls._columns(page))
+                after_id = page[-1]["id"]
+            if len(page) < DECISION_SIMULATION_BATCH_SIZE:
+                break
+        if not chunks:
+            chunks.append(cls._columns([]))
+        simulator = cls(*(np.concatenate(column) for column in zip(*chunks)))
+        logger.info(f"Decision simulator loaded {simulator.claim_count} processed claims")
+        return simulator
+
+    @classmethod
+    async def load(cls, claim_repo: ClaimRepository) -> "DecisionSimulator":
+        """All processed claims, read in a worker thread so the sync client can't block the loop."""
+        return await asyncio.to_thread(cls._load_sync, claim_repo)
+
+    def simulate(self, grid: Iterable[DecisionThresholds]) -> List[dict]:
+        """Decision rates and cost totals for each threshold setting, in grid order."""
+        total = max(1, self.claim_count)
+        results = []
+        for thresholds in grid:
+            reject, review, approve = decision_masks(
+                self.fraud_scores, self.cost_totals, self.has_duplicate, thresholds
+            )
+            # Claims no rule matched fall back to manual review
+            review = ~(reject | approve)
+            counts = {
+                "pre_approved": int(np.count_nonzero(approve)),
+                "manual_review": int(np.count_nonzero(review)),
+                "rejected": int(np.count_nonzero(reject)),
+            }
+            cost_totals = {
+                "pre_approved": int(self.cost_totals @ approve),
+                "manual_review": int(self.cost_totals @ review),
+                "rejected": int(self.cost_totals @ reject),
+            }
+            results.append({
+                "thresholds": asdict(thresholds),
+                "approval_rate": round(counts["pre_approved"] / total, 4),
+                "review_rate": round(counts["manual_review"] / total, 4),
+                "reject_rate": round(counts["rejected"] / total, 4),
+                "counts": counts,
+                "cost_totals": cost_totals,
+            })
+        return results
+
+
+_simulator: Optional[DecisionSimulator] = None
+_loaded_at: float = 0
+_load_lock = asyncio.Lock()
+
+
+async def get_decision_simulator(claim_repo: ClaimRepository) -> DecisionSimulator:
+    """Process-wide loaded simulator, reloaded from ``claim_repo`` every DECISION_SIMULATION_CACHE_SECONDS."""
+    global _simulator, _loaded_at
+    if _simulator is not None and time.monotonic() - _loaded_at < DECISION_SIMULATION_CACHE_SECONDS:
+        return _simulator
+    async with _load_lock:
+        if _simulator is None or time.monotonic() - _loaded_at >= DECISION_SIMULATION_CACHE_SECONDS:
+            _simulator = await DecisionSimulator.load(claim_repo)
+            _loaded_at = time.monotonic()
+    return _simulator
@@ -0,0 +1,121 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Optional
+from app.config import settings
+from app.utils.logger import logger
+
+
+class ExplanationCache:
+    """Two-tier cache of Vision LLM explanations.
+
+    Entries are keyed on everything that determines the LLM's answer: hashes
+    of the image bytes, the damage summary, the user description, the
+    provider, the model and the prompt version. An in-process LRU serves repeats on the same
+    worker; Redis (when ``REDIS_URL`` is configured) shares entries across
+    workers and restarts. Both tiers expire entries after ``ttl_seconds``.
+    Redis failures are logged once and treated as misses.
+    """
+
+    KEY_PREFIX = "claimiq:llm:"
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 604800, redis_client=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._degraded = False
+
+    @staticmethod
+    def make_key(
+        images: List[bytes],
+        damage_summary: str,
+        user_description: Optional[str],
+        provider: str,
+        model: str,
+        prompt_version: str,
+    ) -> str:
+        digest = hashlib.sha256()
+        for image in images:
+            digest.update(hashlib.sha256(image).digest())
+        for part in (damage_summary, user_description or "", provider, model, prompt_version):
+            encoded = part.encode("utf-8")
+            # Length-prefix each part so adjacent fields can't run together
+            digest.update(len(encoded).to_bytes(4, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            explanation, stored_at = entry
+            if time.monotonic() - stored_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return explanation
+            self._entries.pop(key, None)
+
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        self._redis_recovered()
+        if raw is None:
+            return None
+
+        explanation = raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+        self._remember(key, explanation)
+        return explanation
+
+    async def put(self, key: str, explanation: str) -> None:
+        self._remember(key, explanation)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(
+                self.KEY_PREFIX + key,
+                explanation.encode("utf-8"),
+                ex=max(1, int(self.ttl_seconds)),
+            )
+        except Exception as e:
+            self._redis_failed(e)
+            return
+        self._redis_recovered()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _remember(self, key: str, explanation: str) -> None:
+        self._entries[key] = (explanation, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _redis_failed(self, error: Exception) -> None:
+        if not self._degraded:
+            logger.warning(f"Redis explanation cache unavailable, using in-process cache only: {error}")
+            self._degraded = True
+
+    def _redis_recovered(self) -> None:
+        if self._degraded:
+            logger.info("Redis explanation cache recovered")
+            self._degraded = False
+
+
+_cache: ExplanationCache | None = None
+
+
+def get_explanation_cache() -> ExplanationCache:
+    """Get the shared explanation cache, built from settings on first use."""
+    global _cache
+    if _cache is None:
+        from app.db.redis_client import get_redis_client
+
+        _cache = ExplanationCache(
+            max_entries=settings.LLM_CACHE_SIZE,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            redis_client=get_redis_client(),
+        )
+    return _cache
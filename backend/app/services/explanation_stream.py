@@ -0,0 +1,100 @@
+import asyncio
+from typing import AsyncIterator, Callable, List, Optional
+
+
+class ExplanationSubscription:
+    """One client's view of a claim's explanation stream.
+
+    Registered as soon as it is created, so nothing published afterwards is
+    missed; text published before it was created is replayed as one token.
+    """
+
+    def __init__(self, hub: "ExplanationStreamHub", claim_id: str, backlog: str):
+        self._hub = hub
+        self.claim_id = claim_id
+        self.queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+        if backlog:
+            self.queue.put_nowait(("token", {"text": backlog}))
+
+    async def events(self, keepalive_seconds: float) -> AsyncIterator[tuple[str, dict]]:
+        """Yield ``("token", {"text"})`` events, then one ``("done", {"status", "ai_explanation"})``.
+
+        A ``("ping", {})`` is yielded whenever nothing arrives for
+        ``keepalive_seconds``.
+        """
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield "ping", {}
+                continue
+            yield event
+            if event[0] == "done":
+                return
+
+    def close(self) -> None:
+        self._hub._unsubscribe(self)
+
+
+class _Channel:
+    def __init__(self):
+        self.parts: List[str] = []
+        self.subscribers: set[ExplanationSubscription] = set()
+
+
+class ExplanationStreamHub:
+    """In-process fan-out of Vision LLM tokens to clients watching a claim.
+
+    The pipeline publishes tokens as the provider streams them and finishes
+    the channel with the claim status and the explanation it persisted (which
+    may be the template fallback). Channels live on the worker that processes
+    the claim, so a client only sees live tokens when its request lands on
+    that worker; everyone else gets the persisted explanation once the claim
+    is processed.
+    """
+
+    def __init__(self):
+        self._channels: dict[str, _Channel] = {}
+
+    def start(self, claim_id: str) -> None:
+        """Reset any text left over from an earlier run of the same claim."""
+        channel = self._channels.get(claim_id)
+        if channel is not None:
+            channel.parts.clear()
+
+    def publisher(self, claim_id: str) -> Callable[[str], None]:
+        return lambda text: self.publish(claim_id, text)
+
+    def publish(self, claim_id: str, text: str) -> None:
+        if not text:
+            return
+        channel = self._channels.setdefault(claim_id, _Channel())
+        channel.parts.append(text)
+        for subscription in channel.subscribers:
+            subscription.queue.put_nowait(("token", {"text": text}))
+
+    def finish(self, claim_id: str, status: str, explanation: Optional[str]) -> None:
+        channel = self._channels.pop(claim_id, None)
+        if channel is None:
+            return
+        done = {"status": status, "ai_explanation": explanation}
+        for subscription in channel.subscribers:
+            subscription.queue.put_nowait(("done", done))
+
+    def subscribe(self, claim_id: str) -> ExplanationSubscription:
+        channel = self._channels.setdefault(claim_id, _Channel())
+        subscription = ExplanationSubscription(self, claim_id, "".join(channel.parts))
+        channel.subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: ExplanationSubscription) -> None:
+        channel = self._channels.get(subscription.claim_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers and not channel.parts:
+            # Nobody is watching and nothing has been generated yet
+            self._channels.pop(subscription.claim_id, None)
+
+
+explanation_streams = ExplanationStreamHub()
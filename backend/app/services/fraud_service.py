@@ -1,9 +1,11 @@
+import asyncio
 from typing import List, Optional
 from app.ml.clip_embedder import CLIPEmbedder
 from app.db.repositories.claim_repo import ClaimRepository
 from app.db.repositories.fraud_repo import FraudRepository
 from app.schemas.damage import DamageZone
 from app.schemas.fraud import FraudAnalysis
+from app.utils.deadline import Deadline
 from app.utils.constants import (
     FRAUD_SIMILARITY_THRESHOLD,
     FRAUD_FREQUENCY_LIMIT,
@@ -26,6 +28,34 @@ class FraudService:
         self.claim_repo = claim_repo
         self.fraud_repo = fraud_repo
 
+    async def embed_images(
+        self,
+        images: List[str | bytes],
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[List[Optional[List[float]]]]:
+        """CLIP embeddings for ``images`` (bytes or URLs), the first half of the similarity check.
+
+        Split from ``analyze`` so the embeddings can be computed while other
+        work (detection, storage uploads) is in flight. Returns None when the
+        check is skipped; an image whose embedding failed gets None.
+        """
+        if not self.clip_embedder.is_available:
+            logger.info("CLIP not available, skipping image similarity check")
+            return None
+        if deadline is not None and not deadline.allows("clip"):
+            logger.info("Latency budget low, skipping image similarity check")
+            return None
+
+        async def embed(idx: int, image: str | bytes) -> Optional[List[float]]:
+            try:
+                return await self.clip_embedder.get_embedding(image)
+            except Exception as e:
+                label = image if isinstance(image, str) else f"image {idx + 1}"
+                logger.warning(f"CLIP embedding failed for {label}: {e}")
+                return None
+
+        return list(await asyncio.gather(*(embed(i, image) for i, image in enumerate(images))))
+
     async def analyze(
         self,
         claim_id: str,
@@ -33,12 +63,19 @@ class FraudService:
         image_urls: List[str],
         damage_zones: List[DamageZone],
         user_description: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        image_sources: Optional[List[str | bytes]] = None,
+        embeddings: Optional[List[Optional[List[float]]]] = None,
     ) -> FraudAnalysis:
         """
         Multi-signal fraud analysis:
         1. Image similarity (CLIP embeddings) — duplicate detection
         2. Claim frequency analysis
         3. Damage-description inconsistency
+
+        ``embeddings`` from an earlier ``embed_images`` call are used as is;
+        otherwise ``image_sources`` (already-loaded image bytes, or URLs) are
+        embedded instead of downloading ``image_urls`` when given.
         """
         reuse_score = 0.0
         ai_gen_score = 0.0
@@ -46,36 +83,35 @@ class FraudService:
         flags: List[str] = []
 
         # --- Signal 1: Image Similarity (CLIP) ---
-        if self.clip_embedder.is_available:
-            for url in image_urls:
-                try:
-                    embedding = await self.clip_embedder.get_embedding(url)
-
-                    match = await self.fraud_repo.find_similar_embedding(
-                        embedding,
-                        threshold=FRAUD_SIMILARITY_THRESHOLD,
-                        exclude_claim_id=claim_id,
-                    )
+        if embeddings is None:
+            embeddings = await self.embed_images(image_sources or image_urls, deadline)
+        for idx, embedding in enumerate(embeddings or []):
+            if embedding is None:
+                continue
+            try:
+                match = await self.fraud_repo.find_similar_embedding(
+                    embedding,
+                    threshold=FRAUD_SIMILARITY_THRESHOLD,
+                    exclude_claim_id=claim_id,
+                )
 
-                    if match:
-                        reuse_score = max(reuse_score, float(match["similarity"]))
-                        flags.append(
-                            f"Duplicate image detected "
-                            f"(similarity: {match['similarity']:.2f}, "
-                            f"matched claim: {match['claim_id'][:8]}...)"
-                        )
-
-                    # Store embedding for future comparisons
-                    await self.fraud_repo.store_embedding(
-                        claim_id=claim_id,
-                        embedding=embedding,
-                        similarity_score=match["similarity"] if match else 0.0,
-                        matched_claim_id=match["claim_id"] if match else None,
+                if match:
+                    reuse_score = max(reuse_score, float(match["similarity"]))
+                    flags.append(
+                        f"Duplicate image detected "
+                        f"(similarity: {match['similarity']:.2f}, "
+                        f"matched claim: {match['claim_id'][:8]}...)"
                     )
-                except Exception as e:
-                    logger.warning(f"CLIP fraud check failed for {url}: {e}")
-        else:
-            logger.info("CLIP not available, skipping image similarity check")
+
+                # Store embedding for future comparisons
+                await self.fraud_repo.store_embedding(
+                    claim_id=claim_id,
+                    embedding=embedding,
+                    similarity_score=match["similarity"] if match else 0.0,
+                    matched_claim_id=match["claim_id"] if match else None,
+                )
+            except Exception as e:
+                logger.warning(f"CLIP fraud check failed for image {idx + 1}: {e}")
 
         # --- Signal 2: Claim Frequency ---
         try:
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+from app.config import settings
+
+
+class ProviderSaturatedError(Exception):
+    """The provider already has as many calls waiting as its governor allows."""
+
+
+class ProviderGovernor:
+    """Concurrency limit and adaptive timeout for one Vision LLM provider.
+
+    At most ``max_concurrency`` calls run at once and at most ``max_queue``
+    wait for a slot; beyond that calls are refused immediately so the claim
+    can use its template fallback instead of queueing behind a slow provider.
+    Latencies of recent calls drive the timeout (twice the p99, clamped to
+    ``[min_timeout, max_timeout]``) and the hedging delay (the p95). Until
+    enough calls have been seen the timeout is ``max_timeout`` and there is
+    no hedging delay.
+    """
+
+    MIN_SAMPLES = 20
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 8,
+        max_queue: int = 16,
+        min_timeout: float = 5.0,
+        max_timeout: float = 30.0,
+        window: int = 200,
+    ):
+        self.name = name
+        self.max_queue = max_queue
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.queued = 0
+        self.active = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.queued >= self.max_queue
+
+    def percentile(self, q: float) -> float | None:
+        if len(self._latencies) < self.MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, 2 * p99))
+
+    def hedge_delay(self) -> float | None:
+        return self.percentile(0.95)
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Await ``fn(*args)`` within a concurrency slot and the adaptive timeout."""
+        if self.saturated:
+            raise ProviderSaturatedError(f"{self.name} has {self.queued} calls queued")
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        timeout = self.timeout()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(*args), timeout=timeout)
+        except asyncio.TimeoutError:
+            # A timed-out call took at least this long; let it raise the percentiles
+            self._latencies.append(timeout)
+            raise
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+        self._latencies.append(time.monotonic() - started)
+        return result
+
+
+class ProviderGovernors:
+    """One governor per provider name, created from settings on first use."""
+
+    def __init__(self):
+        self._governors: dict[str, ProviderGovernor] = {}
+
+    def get(self, name: str) -> ProviderGovernor:
+        governor = self._governors.get(name)
+        if governor is None:
+            governor = ProviderGovernor(
+                name,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                max_queue=settings.LLM_MAX_QUEUE,
+                min_timeout=settings.LLM_MIN_TIMEOUT_SECONDS,
+                max_timeout=settings.HTTP_LLM_TIMEOUT_SECONDS,
+            )
+            self._governors[name] = governor
+        return governor
+
+
+llm_governors = ProviderGovernors()
@@ -0,0 +1,346 @@
+import asyncio
+import base64
+import json
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, List, Optional
+import httpx
+from app.config import settings
+from app.utils.http_clients import GEMINI, OPENAI, http_clients
+from app.utils.logger import logger
+
+TokenCallback = Callable[[str], None]
+
+
+class VisionLLMProvider(ABC):
+    """Interface for a Vision LLM backend: one image plus prompts in, text out."""
+
+    name: str = ""
+    # Whether answers may go in the explanation cache (the mock's must not)
+    caches_explanations: bool = True
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ):
+        self.http_client = http_client
+        self.api_key = api_key
+        self.base_url = (base_url or "").rstrip("/")
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def accepts_model(self, model: str) -> bool:
+        """Whether ``model`` names one of this provider's models (used for auto-selection)."""
+        return True
+
+    @abstractmethod
+    async def generate(
+        self,
+        image_bytes: bytes,
+        system_prompt: str,
+        prompt: str,
+        model: str,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        """Return the model's answer for a JPEG image and prompts.
+
+        With ``on_token`` the provider's streaming mode is used and each text
+        fragment is passed to it as it arrives; the full text is still returned.
+        """
+
+    @staticmethod
+    async def _sse_events(response: httpx.Response) -> AsyncIterator[dict]:
+        """Decode the JSON ``data:`` payloads of a server-sent event stream."""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if not data or data == "[DONE]":
+                continue
+            yield json.loads(data)
+
+
+class OpenAIProvider(VisionLLMProvider):
+    """OpenAI Chat Completions (and API-compatible servers) with an inline image."""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(
+            http_client or http_clients.get(OPENAI),
+            api_key if api_key is not None else settings.OPENAI_API_KEY,
+            base_url or settings.OPENAI_BASE_URL,
+        )
+
+    def accepts_model(self, model: str) -> bool:
+        return "gpt" in model or "openai" in model
+
+    async def generate(
+        self,
+        image_bytes: bytes,
+        system_prompt: str,
+        prompt: str,
+        model: str,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+        body = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": f"data:image/jpeg;base64,{image_b64}"},
+                        },
+                    ],
+                },
+            ],
+            "max_tokens": 700,
+        }
+        url = f"{self.base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        if on_token is None:
+            response = await self.http_client.post(url, headers=headers, json=body)
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+
+        parts: List[str] = []
+        async with self.http_client.stream(
+            "POST", url, headers=headers, json={**body, "stream": True}
+        ) as response:
+            response.raise_for_status()
+            async for event in self._sse_events(response):
+                choices = event.get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text:
+                    parts.append(text)
+                    on_token(text)
+        return "".join(parts)
+
+
+class GeminiProvider(VisionLLMProvider):
+    """Google Gemini generateContent / streamGenerateContent with inline image data."""
+
+    name = "gemini"
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ):
+        super().__init__(
+            http_client or http_clients.get(GEMINI),
+            api_key if api_key is not None else settings.GEMINI_API_KEY,
+            base_url or settings.GEMINI_BASE_URL,
+        )
+
+    def accepts_model(self, model: str) -> bool:
+        return "gemini" in model
+
+    async def generate(
+        self,
+        image_bytes: bytes,
+        system_prompt: str,
+        prompt: str,
+        model: str,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
+        body = {
+            "contents": [
+                {
+                    "parts": [
+                        {"text": f"{system_prompt}\n\n{prompt}"},
+                        {
+                            "inline_data": {
+                                "mime_type": "image/jpeg",
+                                "data": image_b64,
+                            }
+                        },
+                    ]
+                }
+            ],
+            "generationConfig": {
+                "maxOutputTokens": 900,
+                "temperature": 0.3,
+            },
+        }
+
+        if on_token is None:
+            response = await self.http_client.post(
+                f"{self.base_url}/models/{model}:generateContent?key={self.api_key}",
+                json=body,
+            )
+            response.raise_for_status()
+            return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+        parts: List[str] = []
+        async with self.http_client.stream(
+            "POST",
+            f"{self.base_url}/models/{model}:streamGenerateContent?alt=sse&key={self.api_key}",
+            json=body,
+        ) as response:
+            response.raise_for_status()
+            async for event in self._sse_events(response):
+                candidates = event.get("candidates") or [{}]
+                content = candidates[0].get("content") or {}
+                text = "".join(p.get("text", "") for p in content.get("parts") or [])
+                if text:
+                    parts.append(text)
+                    on_token(text)
+        return "".join(parts)
+
+
+class MockProvider(OpenAIProvider):
+    """Offline stand-in speaking the OpenAI wire format, for load tests and development.
+
+    Requests go to the mock app (``app.services.mock_llm``) served in-process
+    on a loopback port (started by ``start_mock_llm`` in the app lifespan),
+    or to a standalone mock server at ``MOCK_LLM_URL``.
+    Latency, error rate and answer length come from the MOCK_LLM_* settings.
+    """
+
+    name = "mock"
+    caches_explanations = False
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ):
+        if http_client is None:
+            http_client, base_url = _mock_client(base_url)
+        super().__init__(http_client, api_key or "mock", base_url or "http://mock-llm/v1")
+
+    def accepts_model(self, model: str) -> bool:
+        return model.startswith("mock")
+
+
+_mock_http_client: Optional[httpx.AsyncClient] = None
+_mock_base_url = ""
+_mock_server = None
+_mock_server_thread: Optional[threading.Thread] = None
+
+
+def _start_mock_server():
+    """Serve the mock app under uvicorn on an ephemeral loopback port, in a daemon thread.
+
+    A real socket is what makes streamed tokens arrive as they are sent;
+    httpx's ASGI transport buffers the whole response body.
+    """
+    global _mock_server, _mock_server_thread
+    import uvicorn
+    from app.services.mock_llm import create_mock_llm_app
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(
+        uvicorn.Config(create_mock_llm_app(), log_level="warning", lifespan="off")
+    )
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, name="mock-llm", daemon=True
+    )
+    thread.start()
+    give_up_at = time.monotonic() + 5
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > give_up_at:
+            server.should_exit = True
+            raise RuntimeError("mock LLM server did not start")
+        time.sleep(0.01)
+    _mock_server, _mock_server_thread = server, thread
+    return sock.getsockname()[1]
+
+
+def _in_process_mock_client(reason: str) -> None:
+    global _mock_http_client, _mock_base_url
+    from app.services.mock_llm import create_mock_llm_app
+
+    logger.warning(
+        f"{reason}; calling the mock LLM app in-process"
+        + ("; streamed tokens will arrive all at once" if settings.LLM_STREAMING_ENABLED else "")
+    )
+    _mock_http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_mock_llm_app()),
+        timeout=settings.HTTP_LLM_TIMEOUT_SECONDS,
+    )
+    _mock_base_url = "http://mock-llm/v1"
+
+
+async def start_mock_llm() -> None:
+    """Start the in-process mock server (called from the app lifespan when the mock is configured).
+
+    Startup waits on the server thread, so it runs in a worker thread rather
+    than on the event loop. Nothing to do when MOCK_LLM_URL points elsewhere.
+    """
+    global _mock_http_client, _mock_base_url
+    if settings.MOCK_LLM_URL or _mock_http_client is not None:
+        return
+    try:
+        port = await asyncio.to_thread(_start_mock_server)
+    except Exception as e:
+        _in_process_mock_client(f"Mock LLM server unavailable ({e})")
+        return
+    _mock_http_client = httpx.AsyncClient(timeout=settings.HTTP_LLM_TIMEOUT_SECONDS)
+    _mock_base_url = f"http://127.0.0.1:{port}/v1"
+    logger.info(f"Mock LLM serving on {_mock_base_url}")
+
+
+def _mock_client(base_url: Optional[str]) -> tuple[httpx.AsyncClient, str]:
+    if base_url or settings.MOCK_LLM_URL:
+        return http_clients.get(OPENAI), base_url or f"{settings.MOCK_LLM_URL.rstrip('/')}/v1"
+    if _mock_http_client is None:
+        # Outside the app lifespan (scripts, tests): never block here starting a server
+        _in_process_mock_client("Mock LLM server not started")
+    return _mock_http_client, _mock_base_url
+
+
+async def aclose_mock_client() -> None:
+    """Close the in-process mock's client and stop its server, if either was started."""
+    global _mock_http_client, _mock_server, _mock_server_thread
+    if _mock_http_client is not None:
+        await _mock_http_client.aclose()
+        _mock_http_client = None
+    if _mock_server is not None:
+        _mock_server.should_exit = True
+        await asyncio.to_thread(_mock_server_thread.join, 5)
+        _mock_server, _mock_server_thread = None, None
+
+
+PROVIDERS: dict[str, type[VisionLLMProvider]] = {}
+
+
+def register_provider(provider_cls: type[VisionLLMProvider]) -> type[VisionLLMProvider]:
+    """Make a provider selectable by its ``name`` (VISION_LLM_PROVIDER / LLM_HEDGE_PROVIDER)."""
+    PROVIDERS[provider_cls.name] = provider_cls
+    return provider_cls
+
+
+for _provider_cls in (OpenAIProvider, GeminiProvider, MockProvider):
+    register_provider(_provider_cls)
+
+
+def create_provider(name: str, **kwargs) -> VisionLLMProvider:
+    provider_cls = PROVIDERS.get(name)
+    if provider_cls is None:
+        raise ValueError(
+            f"Unknown Vision LLM provider '{name}'; expected one of {sorted(PROVIDERS)}"
+        )
+    return provider_cls(**kwargs)
@@ -0,0 +1,124 @@
+"""Offline mock of the OpenAI Chat Completions API for load tests.
+
+Used in-process by ``MockProvider``, or run standalone so several API workers
+(or other tools) can share it::
+
+    python -m app.services.mock_llm --port 8100
+
+and point ``MOCK_LLM_URL`` at it. Each request waits a latency drawn from a
+log-normal distribution (median ``MOCK_LLM_LATENCY_MS``, shape
+``MOCK_LLM_LATENCY_SIGMA``), fails with a 503 at ``MOCK_LLM_ERROR_RATE``, and
+answers with ``MOCK_LLM_RESPONSE_WORDS`` words. With ``MOCK_LLM_SEED`` the
+sequence of latencies and failures is reproducible.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.config import settings
+
+_SECTIONS = [
+    "Observed Damage:",
+    "Severity Rationale:",
+    "Likely Incident Pattern:",
+    "Repair Recommendations:",
+    "Safety/Driveability Notes:",
+]
+_VOCABULARY = (
+    "the panel shows visible deformation with paint transfer along the lower edge "
+    "consistent with a low speed impact and localized scratches near the bumper "
+    "inspection recommended before refinishing and replacement of damaged trim"
+).split()
+
+
+def mock_explanation(words: int) -> str:
+    """A deterministic answer in the five-section format with about ``words`` words."""
+    per_section = max(1, words // len(_SECTIONS))
+    sections = []
+    for idx, heading in enumerate(_SECTIONS):
+        body = " ".join(_VOCABULARY[(idx + i) % len(_VOCABULARY)] for i in range(per_section))
+        sections.append(f"{heading} {body.capitalize()}.")
+    return "\n\n".join(sections)
+
+
+def create_mock_llm_app(
+    latency_ms: Optional[float] = None,
+    latency_sigma: Optional[float] = None,
+    error_rate: Optional[float] = None,
+    response_words: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """Build the mock app; arguments default to the MOCK_LLM_* settings."""
+    latency_ms = settings.MOCK_LLM_LATENCY_MS if latency_ms is None else latency_ms
+    latency_sigma = settings.MOCK_LLM_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+    error_rate = settings.MOCK_LLM_ERROR_RATE if error_rate is None else error_rate
+    response_words = settings.MOCK_LLM_RESPONSE_WORDS if response_words is None else response_words
+    rng = random.Random(settings.MOCK_LLM_SEED if seed is None else seed)
+    answer = mock_explanation(response_words)
+
+    app = FastAPI(title="Mock Vision LLM", docs_url=None, redoc_url=None)
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        # Draw both up front so the sequence doesn't depend on request interleaving
+        latency = rng.lognormvariate(0.0, latency_sigma) * latency_ms / 1000
+        failed = rng.random() < error_rate
+        model = body.get("model", "mock")
+
+        if failed:
+            await asyncio.sleep(latency / 2)
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"message": "mock provider overloaded", "type": "server_error"}},
+            )
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "object": "chat.completion",
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+
+        async def chunks():
+            words = answer.split(" ")
+            # Roughly a fifth of the latency to the first token, the rest spread over the answer
+            await asyncio.sleep(latency * 0.2)
+            step = latency * 0.8 / len(words)
+            for idx, word in enumerate(words):
+                delta = {"content": word if idx == 0 else f" {word}"}
+                chunk = {
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(step)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the mock Vision LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+    uvicorn.run(create_mock_llm_app(), host=args.host, port=args.port)
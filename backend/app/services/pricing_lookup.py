@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import Optional
+from app.db.repositories.cost_repo import CostRepository
+from app.utils.constants import PRICING_LOOKUP_TTL_SECONDS
+from app.utils.logger import logger
+
+# Bits per interned ID inside a packed (brand, model, damage_type) key
+_ID_BITS = 20
+SEVERITY_COLUMNS = ("minor_cost", "moderate_cost", "severe_cost")
+SEVERITY_INDEX = {"minor": 0, "moderate": 1, "severe": 2}
+
+
+class PricingLookup:
+    """Cost tables compiled once for fast, allocation-light repeated pricing.
+
+    Brands, models and damage types are interned to small integer IDs and
+    prices are stored under packed integer keys, so pricing a damage type is
+    a couple of int-keyed dict probes instead of string normalisation and
+    awaited repository calls. Zone costs are pre-multiplied into one unit
+    cost per severity. ID 0 means "not in the pricing data".
+    """
+
+    def __init__(self, tables: dict):
+        self._brand_ids: dict[str, int] = {}
+        self._model_ids: dict[str, int] = {}
+        self._damage_type_ids: dict[str, int] = {}
+        # Raw damage-type labels seen so far -> ID, to skip re-normalising them
+        self._raw_damage_types: dict[str, int] = {}
+
+        self.default_prices: dict[int, int] = {}
+        self.brand_prices: dict[int, int] = {}
+        self.model_prices: dict[int, int] = {}
+        for damage_type, price in tables["damage_type"].items():
+            self.default_prices[self._intern(self._damage_type_ids, damage_type)] = price
+        for (brand, damage_type), price in tables["brand"].items():
+            key = self._pack(
+                self._intern(self._brand_ids, brand), 0,
+                self._intern(self._damage_type_ids, damage_type),
+            )
+            self.brand_prices[key] = price
+        for (brand, model, damage_type), price in tables["model"].items():
+            key = self._pack(
+                self._intern(self._brand_ids, brand),
+                self._intern(self._model_ids, model),
+                self._intern(self._damage_type_ids, damage_type),
+            )
+            self.model_prices[key] = price
+
+        self.zone_unit_costs = {
+            zone: self._unit_costs(row) for zone, row in tables["zones"].items()
+        }
+        self.fallback_unit_costs = self._unit_costs(CostRepository.FALLBACK)
+        self._missing_zones: set[str] = set()
+
+    @staticmethod
+    def _intern(ids: dict[str, int], key: str) -> int:
+        return ids.setdefault(key, len(ids) + 1)
+
+    @staticmethod
+    def _pack(brand_id: int, model_id: int, damage_type_id: int) -> int:
+        return (((brand_id << _ID_BITS) | model_id) << _ID_BITS) | damage_type_id
+
+    @staticmethod
+    def _unit_costs(row: dict) -> tuple[int, int, int]:
+        labor = row.get("labor_cost", 2000)
+        multiplier = row.get("regional_multiplier", 1.0)
+        return tuple(int((int(row[col]) + labor) * multiplier) for col in SEVERITY_COLUMNS)
+
+    def damage_type_id(self, damage_type: str) -> int:
+        damage_type_id = self._raw_damage_types.get(damage_type)
+        if damage_type_id is None:
+            normalized = CostRepository._normalize_damage_type(damage_type)
+            damage_type_id = self._damage_type_ids.get(normalized, 0)
+            if damage_type_id:
+                # Only known labels are memoised, so arbitrary input can't grow the table
+                self._raw_damage_types[damage_type] = damage_type_id
+        return damage_type_id
+
+    def vehicle_ids(
+        self, vehicle_company: Optional[str], vehicle_model: Optional[str]
+    ) -> tuple[int, int]:
+        brand_id = self._brand_ids.get(CostRepository._normalize_vehicle_key(vehicle_company), 0)
+        if not brand_id:
+            return 0, 0
+        return brand_id, self._model_ids.get(CostRepository._normalize_vehicle_key(vehicle_model), 0)
+
+    def mapped_price(self, brand_id: int, model_id: int, damage_type_id: int) -> int | None:
+        """Pricing-table price, most specific first: model, brand, then damage-type default."""
+        if not damage_type_id:
+            return None
+        if model_id:
+            price = self.model_prices.get(self._pack(brand_id, model_id, damage_type_id))
+            if price is not None:
+                return price
+        if brand_id:
+            price = self.brand_prices.get(self._pack(brand_id, 0, damage_type_id))
+            if price is not None:
+                return price
+        return self.default_prices.get(damage_type_id)
+
+    def zone_unit_cost(self, zone: str, severity: str) -> int:
+        costs = self.zone_unit_costs.get(zone)
+        if costs is None:
+            if zone not in self._missing_zones:
+                self._missing_zones.add(zone)
+                logger.warning(f"Zone '{zone}' not in cost_table, using fallback")
+            costs = self.fallback_unit_costs
+        return costs[SEVERITY_INDEX.get(severity, 1)]
+
+
+_lookup: Optional[PricingLookup] = None
+_compiled_at: float = 0
+_compile_lock = asyncio.Lock()
+
+
+async def get_pricing_lookup(cost_repo: CostRepository) -> PricingLookup:
+    """Process-wide compiled lookup, rebuilt from ``cost_repo`` every PRICING_LOOKUP_TTL_SECONDS."""
+    global _lookup, _compiled_at
+    if _lookup is not None and time.monotonic() - _compiled_at < PRICING_LOOKUP_TTL_SECONDS:
+        return _lookup
+    async with _compile_lock:
+        if _lookup is None or time.monotonic() - _compiled_at >= PRICING_LOOKUP_TTL_SECONDS:
+            _lookup = PricingLookup(await cost_repo.get_pricing_tables())
+            _compiled_at = time.monotonic()
+            logger.info(
+                "Pricing lookup compiled: "
+                f"{len(_lookup.model_prices)} model-level, {len(_lookup.brand_prices)} brand-level, "
+                f"{len(_lookup.default_prices)} damage-type prices, {len(_lookup.zone_unit_costs)} zones"
+            )
+    return _lookup
+
+
+def invalidate_pricing_lookup() -> None:
+    """Force the next lookup to be recompiled (e.g. right after pricing data changed)."""
+    global _lookup
+    _lookup = None
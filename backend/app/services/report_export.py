@@ -0,0 +1,148 @@
+import asyncio
+import zipfile
+from typing import AsyncIterator, List, Optional
+from app.config import settings
+from app.db.repositories.claim_repo import ClaimRepository
+from app.schemas.admin import ReportExportRequest
+from app.services.report_service import ReportService
+from app.utils.constants import REPORT_EXPORT_BATCH_SIZE
+from app.utils.logger import logger
+
+
+class _ZipSink:
+    """Write-only file object that buffers what ZipFile writes until it is drained.
+
+    It has no ``seek``/``tell``, so ZipFile streams entries with data
+    descriptors instead of rewinding to patch headers.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ReportExporter:
+    """Stream many claim reports as one ZIP archive.
+
+    Claims are read in keyset batches and at most ``window`` reports are in
+    flight at once (rendered on the report pool, or fetched when already
+    pre-rendered). Each PDF is written to the archive as soon as it is ready
+    and the bytes are handed to the client, so memory stays bounded by the
+    window rather than the size of the export.
+    """
+
+    def __init__(
+        self,
+        claim_repo: ClaimRepository,
+        report_service: Optional[ReportService] = None,
+        window: Optional[int] = None,
+    ):
+        self.claim_repo = claim_repo
+        self.report_service = report_service or ReportService()
+        self.window = max(1, window or settings.REPORT_WORKERS * 2)
+
+    async def iter_claims(
+        self, request: ReportExportRequest
+    ) -> AsyncIterator[tuple[str, dict | None]]:
+        """Yield ``(claim_id, row)`` for each requested claim; row is None if it doesn't exist."""
+        if request.claim_ids:
+            claim_ids = list(dict.fromkeys(request.claim_ids))
+            for start in range(0, len(claim_ids), REPORT_EXPORT_BATCH_SIZE):
+                batch = claim_ids[start:start + REPORT_EXPORT_BATCH_SIZE]
+                rows = {row["id"]: row for row in await self.claim_repo.get_by_ids(batch)}
+                for claim_id in batch:
+                    yield claim_id, rows.get(claim_id)
+            return
+
+        filters = {"status": "processed"}
+        for column in ("user_id", "decision", "risk_level"):
+            value = getattr(request, column)
+            if value is not None:
+                filters[column] = value
+        created_from = request.created_from.isoformat() if request.created_from else None
+        created_to = request.created_to.isoformat() if request.created_to else None
+
+        remaining = request.limit
+        after_id = None
+        while remaining > 0:
+            rows = await self.claim_repo.list_page(
+                after_id=after_id,
+                limit=min(REPORT_EXPORT_BATCH_SIZE, remaining),
+                filters=filters,
+                created_from=created_from,
+                created_to=created_to,
+            )
+            for row in rows:
+                yield row["id"], row
+            if len(rows) < REPORT_EXPORT_BATCH_SIZE:
+                return
+            remaining -= len(rows)
+            after_id = rows[-1]["id"]
+
+    async def _report_bytes(self, claim: dict) -> bytes:
+        stored = await self.report_service.open_stored_report(claim)
+        if stored is not None:
+            return b"".join([chunk async for chunk in stored])
+        return (await self.report_service.generate_pdf(claim)).getvalue()
+
+    async def stream_zip(self, request: ReportExportRequest) -> AsyncIterator[bytes]:
+        """Yield the ZIP archive in chunks; claims that fail are listed in ``export_errors.txt``."""
+        sink = _ZipSink()
+        errors: List[str] = []
+        in_flight: dict[asyncio.Task, str] = {}
+        exported = 0
+
+        def write_finished(done: set[asyncio.Task]) -> None:
+            nonlocal exported
+            for task in done:
+                claim_id = in_flight.pop(task)
+                if task.exception() is not None:
+                    logger.error(f"Report export failed for claim {claim_id}: {task.exception()}")
+                    errors.append(f"{claim_id}: {task.exception()}")
+                    continue
+                archive.writestr(f"ClaimIQ_Report_{claim_id}.pdf", task.result())
+                exported += 1
+
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            try:
+                async for claim_id, claim in self.iter_claims(request):
+                    if claim is None:
+                        errors.append(f"{claim_id}: not found")
+                        continue
+                    if claim.get("status") != "processed":
+                        errors.append(f"{claim_id}: not processed (status {claim.get('status')})")
+                        continue
+                    if len(in_flight) >= self.window:
+                        done, _ = await asyncio.wait(
+                            in_flight, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        write_finished(done)
+                        yield sink.drain()
+                    task = asyncio.create_task(self._report_bytes(claim))
+                    in_flight[task] = claim_id
+
+                while in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    write_finished(done)
+                    yield sink.drain()
+
+                if errors:
+                    archive.writestr("export_errors.txt", "\n".join(errors) + "\n")
+            finally:
+                # Client went away (or the claim query failed): stop outstanding renders
+                for task in in_flight:
+                    task.cancel()
+
+        logger.info(f"Report export finished: {exported} reports, {len(errors)} errors")
+        yield sink.drain()
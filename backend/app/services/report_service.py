@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
 import io
-from typing import Optional
+import json
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Optional
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
@@ -11,124 +16,283 @@ from reportlab.platypus import (
     TableStyle,
 )
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from app.config import settings
+from app.services.storage_backends import StorageBackend, get_storage_backend
 from app.utils.logger import logger
 
+# Claim fields that appear in the report; a change to any of them yields a new report version
+REPORT_FIELDS = (
+    "id",
+    "status",
+    "policy_number",
+    "created_at",
+    "processed_at",
+    "cost_breakdown",
+    "cost_total",
+    "fraud_score",
+    "risk_level",
+    "fraud_flags",
+    "decision",
+    "decision_confidence",
+)
+
+# Styles are immutable once built, so build them once per process instead of per report
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = ParagraphStyle(
+    "CustomTitle",
+    parent=_STYLES["Heading1"],
+    fontSize=20,
+    spaceAfter=12,
+    textColor=colors.HexColor("#1a1a2e"),
+)
+_HEADING_STYLE = ParagraphStyle(
+    "CustomHeading",
+    parent=_STYLES["Heading2"],
+    fontSize=14,
+    spaceAfter=8,
+    textColor=colors.HexColor("#16213e"),
+)
+
+
+def _table_style(header: bool) -> TableStyle:
+    return TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e0e0e0") if header else colors.HexColor("#f5f5f5")),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 6),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ])
+
+
+_TABLE_STYLES = {header: _table_style(header) for header in (False, True)}
+
+
+def _make_table(data: list, header: bool = False) -> Table:
+    """Create a styled table."""
+    table = Table(data, hAlign="LEFT")
+    table.setStyle(_TABLE_STYLES[header])
+    return table
+
+
+def render_claim_pdf(claim: dict) -> bytes:
+    """Render the PDF report for a processed claim (blocking; run it in the report pool).
+
+    A plain top-level function of a plain dict so it can be sent to a process pool.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=20 * mm,
+        rightMargin=20 * mm,
+        topMargin=20 * mm,
+        bottomMargin=20 * mm,
+    )
+
+    elements = []
+
+    # Title
+    elements.append(Paragraph("ClaimIQ — Claim Report", _TITLE_STYLE))
+    elements.append(Spacer(1, 6 * mm))
+
+    # Claim Info
+    elements.append(Paragraph("Claim Information", _HEADING_STYLE))
+    claim_info = [
+        ["Claim ID", str(claim.get("id", "N/A"))],
+        ["Status", str(claim.get("status", "N/A")).upper()],
+        ["Policy Number", str(claim.get("policy_number", "N/A"))],
+        ["Created", str(claim.get("created_at", "N/A"))],
+        ["Processed", str(claim.get("processed_at", "N/A"))],
+    ]
+    elements.append(_make_table(claim_info))
+    elements.append(Spacer(1, 6 * mm))
+
+    # Cost Breakdown
+    elements.append(Paragraph("Cost Breakdown", _HEADING_STYLE))
+    cost_breakdown = claim.get("cost_breakdown")
+    if cost_breakdown:
+        if isinstance(cost_breakdown, str):
+            cost_breakdown = json.loads(cost_breakdown)
+
+        cost_data = [["Damage Type", "Severity", "Qty", "Unit Cost", "Total"]]
+        for c in cost_breakdown:
+            damage_type = str(c.get("damage_type") or c.get("zone") or "unknown")
+            quantity = int(c.get("quantity", 1) or 1)
+            unit_cost = int(c.get("unit_repair_cost", c.get("base_cost", 0)) or 0)
+            cost_data.append([
+                damage_type,
+                str(c.get("severity", "N/A")).capitalize(),
+                str(quantity),
+                f"₹{unit_cost:,}",
+                f"₹{c.get('total', 0):,}",
+            ])
+        cost_data.append(["", "", "", "TOTAL", f"₹{claim.get('cost_total', 0):,}"])
+        elements.append(_make_table(cost_data, header=True))
+    else:
+        elements.append(Paragraph("No cost data available.", _STYLES["Normal"]))
+    elements.append(Spacer(1, 6 * mm))
+
+    # Fraud Analysis
+    elements.append(Paragraph("Fraud Analysis", _HEADING_STYLE))
+    fraud_info = [
+        ["Fraud Score", f"{claim.get('fraud_score', 0)} / 100"],
+        ["Risk Level", str(claim.get('risk_level', 'N/A')).capitalize()],
+    ]
+    fraud_flags = claim.get("fraud_flags", [])
+    if fraud_flags:
+        fraud_info.append(["Flags", ", ".join(fraud_flags)])
+    elements.append(_make_table(fraud_info))
+    elements.append(Spacer(1, 6 * mm))
+
+    # Decision
+    elements.append(Paragraph("Decision", _HEADING_STYLE))
+    decision_info = [
+        ["Decision", str(claim.get("decision", "N/A")).replace("_", " ").title()],
+        ["Confidence", f"{float(claim.get('decision_confidence', 0)):.0%}"],
+        ["Risk Level", str(claim.get('risk_level', 'N/A')).capitalize()],
+    ]
+    elements.append(_make_table(decision_info))
+    elements.append(Spacer(1, 6 * mm))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+class ReportPool:
+    """Bounded pool rendering PDFs off the event loop.
+
+    ``REPORT_EXECUTOR=process`` sidesteps the GIL for CPU-bound reportlab
+    layout; ``thread`` avoids the worker start-up cost and suits small
+    deployments. Workers are started lazily on the first report.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 2):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown REPORT_EXECUTOR '{kind}'; expected 'thread' or 'process'")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Fresh interpreters: forking a process that already runs threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="report"
+                )
+        return self._executor
+
+    async def render(self, claim: dict) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), render_claim_pdf, claim)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+report_pool = ReportPool(kind=settings.REPORT_EXECUTOR, workers=settings.REPORT_WORKERS)
+
 
 class ReportService:
-    """Generate PDF claim reports."""
+    """Generate PDF claim reports and keep rendered copies in storage.
+
+    Stored reports are keyed by a hash of the claim fields they show and the
+    template version, so a stored object never goes stale: reprocessing a
+    claim (or changing the layout) simply produces a new key. Storing a new
+    version removes the claim's older ones.
+    """
+
+    BUCKET = "claim-reports"
+    # Bump when the report layout changes so stored PDFs are re-rendered
+    TEMPLATE_VERSION = "1"
+
+    def __init__(
+        self,
+        pool: Optional[ReportPool] = None,
+        backend: Optional[StorageBackend] = None,
+    ):
+        self.pool = pool or report_pool
+        self._backend = backend
+
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend or get_storage_backend()
+
+    @classmethod
+    def report_version(cls, claim: dict) -> str:
+        """Content version of a claim's report; also used as its ETag."""
+        fields = {name: claim.get(name) for name in REPORT_FIELDS}
+        payload = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(f"{cls.TEMPLATE_VERSION}:{payload}".encode()).hexdigest()[:32]
+
+    @staticmethod
+    def report_folder(user_id: str, claim_id: str) -> str:
+        return f"{user_id}/{claim_id}"
+
+    @classmethod
+    def report_path(cls, claim: dict, version: Optional[str] = None) -> str:
+        version = version or cls.report_version(claim)
+        return f"{cls.report_folder(claim['user_id'], claim['id'])}/{version}.pdf"
 
     async def generate_pdf(self, claim: dict) -> io.BytesIO:
         """Generate a PDF report for a processed claim."""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            leftMargin=20 * mm,
-            rightMargin=20 * mm,
-            topMargin=20 * mm,
-            bottomMargin=20 * mm,
-        )
-
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=20,
-            spaceAfter=12,
-            textColor=colors.HexColor("#1a1a2e"),
-        )
-        heading_style = ParagraphStyle(
-            "CustomHeading",
-            parent=styles["Heading2"],
-            fontSize=14,
-            spaceAfter=8,
-            textColor=colors.HexColor("#16213e"),
-        )
-
-        elements = []
-
-        # Title
-        elements.append(Paragraph("ClaimIQ — Claim Report", title_style))
-        elements.append(Spacer(1, 6 * mm))
-
-        # Claim Info
-        elements.append(Paragraph("Claim Information", heading_style))
-        claim_info = [
-            ["Claim ID", str(claim.get("id", "N/A"))],
-            ["Status", str(claim.get("status", "N/A")).upper()],
-            ["Policy Number", str(claim.get("policy_number", "N/A"))],
-            ["Created", str(claim.get("created_at", "N/A"))],
-            ["Processed", str(claim.get("processed_at", "N/A"))],
-        ]
-        elements.append(self._make_table(claim_info))
-        elements.append(Spacer(1, 6 * mm))
-
-        # Cost Breakdown
-        elements.append(Paragraph("Cost Breakdown", heading_style))
-        cost_breakdown = claim.get("cost_breakdown")
-        if cost_breakdown:
-            if isinstance(cost_breakdown, str):
-                import json
-                cost_breakdown = json.loads(cost_breakdown)
-
-            cost_data = [["Damage Type", "Severity", "Qty", "Unit Cost", "Total"]]
-            for c in cost_breakdown:
-                damage_type = str(c.get("damage_type") or c.get("zone") or "unknown")
-                quantity = int(c.get("quantity", 1) or 1)
-                unit_cost = int(c.get("unit_repair_cost", c.get("base_cost", 0)) or 0)
-                cost_data.append([
-                    damage_type,
-                    str(c.get("severity", "N/A")).capitalize(),
-                    str(quantity),
-                    f"₹{unit_cost:,}",
-                    f"₹{c.get('total', 0):,}",
-                ])
-            cost_data.append(["", "", "", "TOTAL", f"₹{claim.get('cost_total', 0):,}"])
-            elements.append(self._make_table(cost_data, header=True))
-        else:
-            elements.append(Paragraph("No cost data available.", styles["Normal"]))
-        elements.append(Spacer(1, 6 * mm))
-
-        # Fraud Analysis
-        elements.append(Paragraph("Fraud Analysis", heading_style))
-        fraud_info = [
-            ["Fraud Score", f"{claim.get('fraud_score', 0)} / 100"],
-            ["Risk Level", str(claim.get('risk_level', 'N/A')).capitalize()],
-        ]
-        fraud_flags = claim.get("fraud_flags", [])
-        if fraud_flags:
-            fraud_info.append(["Flags", ", ".join(fraud_flags)])
-        elements.append(self._make_table(fraud_info))
-        elements.append(Spacer(1, 6 * mm))
-
-        # Decision
-        elements.append(Paragraph("Decision", heading_style))
-        decision_info = [
-            ["Decision", str(claim.get("decision", "N/A")).replace("_", " ").title()],
-            ["Confidence", f"{float(claim.get('decision_confidence', 0)):.0%}"],
-            ["Risk Level", str(claim.get('risk_level', 'N/A')).capitalize()],
-        ]
-        elements.append(self._make_table(decision_info))
-        elements.append(Spacer(1, 6 * mm))
-
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
+        pdf = await self.pool.render(claim)
         logger.info(f"PDF report generated for claim {claim.get('id')}")
-        return buffer
-
-    def _make_table(self, data: list, header: bool = False) -> Table:
-        """Create a styled table."""
-        table = Table(data, hAlign="LEFT")
-        style_commands = [
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e0e0e0") if header else colors.HexColor("#f5f5f5")),
-            ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, -1), 9),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ("TOPPADDING", (0, 0), (-1, -1), 6),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ]
-        table.setStyle(TableStyle(style_commands))
-        return table
+        return io.BytesIO(pdf)
+
+    async def store_report(self, claim: dict, pdf: Optional[bytes] = None) -> str:
+        """Render (unless ``pdf`` is given) and store a claim's report; returns its key."""
+        if pdf is None:
+            pdf = (await self.generate_pdf(claim)).getvalue()
+        path = self.report_path(claim)
+        # The key is derived from the content, so overwriting only ever rewrites the same bytes
+        await self.backend.put(self.BUCKET, path, pdf, "application/pdf", upsert=True)
+        await self._delete_reports(claim["user_id"], claim["id"], keep=path)
+        return path
+
+    async def delete_reports(self, user_id: str, claim_id: str) -> None:
+        """Remove every stored report of a claim (best effort)."""
+        await self._delete_reports(user_id, claim_id)
+
+    async def _delete_reports(
+        self, user_id: str, claim_id: str, keep: Optional[str] = None
+    ) -> None:
+        try:
+            paths = await self.backend.list_paths(self.BUCKET, self.report_folder(user_id, claim_id))
+            stale = [p for p in paths if p != keep]
+            if stale:
+                await self.backend.delete(self.BUCKET, stale)
+                logger.info(f"Deleted {len(stale)} stored report(s) for claim {claim_id}")
+        except Exception as e:
+            logger.warning(f"Failed to delete stored reports for claim {claim_id}: {e}")
+
+    async def open_stored_report(
+        self, claim: dict, version: Optional[str] = None
+    ) -> AsyncIterator[bytes] | None:
+        """Stream of the stored report, or None if this version hasn't been rendered yet."""
+        stream = self.backend.stream(self.BUCKET, self.report_path(claim, version))
+        try:
+            # Pull the first chunk now so a missing object is reported here, not mid-response
+            first = await stream.__anext__()
+        except (FileNotFoundError, StopAsyncIteration):
+            await stream.aclose()
+            return None
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+
+        return chunks()
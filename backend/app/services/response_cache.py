@@ -0,0 +1,174 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from app.config import settings
+from app.utils.logger import logger
+
+
+@dataclass
+class CachedClaimResponse:
+    user_id: str
+    processed_at: str
+    etag: str
+    body: bytes
+    stored_at: float
+    # Shared invalidation version the entry was read under (None without Redis)
+    version: Optional[int] = None
+
+
+class ClaimResponseCache:
+    """In-process LRU cache of serialised responses for processed claims.
+
+    Processed claim rows rarely change (reprocessing, deletes, re-pricing
+    backfills), so the JSON body is cached per claim id and tagged with an
+    ETag derived from the claim id, ``processed_at`` and the body itself, so
+    in-place rewrites such as a backfill also change it.
+
+    Invalidation is shared through Redis (when ``REDIS_URL`` is configured):
+    ``invalidate`` bumps a per-claim version key, and a hit is only served if
+    that version still matches the one read before the row was fetched, so
+    every worker (and the backfill CLI) invalidates every worker. Without
+    Redis, or while it is failing, invalidation is local to the process and
+    the TTL bounds how long other workers may serve a stale entry.
+    """
+
+    VERSION_KEY_PREFIX = "claimiq:claim-version:"
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300, redis_client=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._redis_client = redis_client
+        self._entries: "OrderedDict[str, CachedClaimResponse]" = OrderedDict()
+        self._degraded = False
+
+    @property
+    def redis(self):
+        if self._redis_client is not None:
+            return self._redis_client
+        from app.db.redis_client import get_redis_client
+
+        return get_redis_client()
+
+    @staticmethod
+    def make_etag(claim_id: str, processed_at: str, body: bytes) -> str:
+        digest = hashlib.sha256(f"{claim_id}:{processed_at}:".encode("utf-8") + body).hexdigest()
+        return f'"{digest[:32]}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Evaluate an If-None-Match header against a strong ETag."""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*":
+                return True
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == etag:
+                return True
+        return False
+
+    async def version(self, claim_id: str) -> Optional[int]:
+        """Current shared version of a claim; read it before fetching the row to cache."""
+        redis = self.redis
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self.VERSION_KEY_PREFIX + claim_id)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        self._redis_recovered()
+        return int(raw or 0)
+
+    async def get(self, claim_id: str, user_id: str) -> CachedClaimResponse | None:
+        entry = self._entries.get(claim_id)
+        if entry is None:
+            return None
+
+        if time.monotonic() - entry.stored_at > self.ttl_seconds:
+            self._entries.pop(claim_id, None)
+            return None
+
+        # Never leak another user's claim through the cache
+        if entry.user_id != user_id:
+            return None
+
+        version = await self.version(claim_id)
+        if version is not None and version != entry.version:
+            # Invalidated by another worker since this entry was read
+            self._entries.pop(claim_id, None)
+            return None
+
+        self._entries.move_to_end(claim_id)
+        return entry
+
+    def put(
+        self,
+        claim_id: str,
+        user_id: str,
+        processed_at: str,
+        body: bytes,
+        version: Optional[int] = None,
+    ) -> CachedClaimResponse:
+        entry = CachedClaimResponse(
+            user_id=user_id,
+            processed_at=processed_at,
+            etag=self.make_etag(claim_id, processed_at, body),
+            body=body,
+            stored_at=time.monotonic(),
+            version=version,
+        )
+        self._entries[claim_id] = entry
+        self._entries.move_to_end(claim_id)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def invalidate(self, claim_id: str) -> None:
+        await self.invalidate_many([claim_id])
+
+    async def invalidate_many(self, claim_ids: Iterable[str]) -> None:
+        """Drop claims here and bump their shared versions so other workers drop them too."""
+        claim_ids = list(claim_ids)
+        for claim_id in claim_ids:
+            self._entries.pop(claim_id, None)
+
+        redis = self.redis
+        if redis is None or not claim_ids:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for claim_id in claim_ids:
+                    key = self.VERSION_KEY_PREFIX + claim_id
+                    pipe.incr(key)
+                    # Outlives any entry read under the old version
+                    pipe.expire(key, max(1, int(self.ttl_seconds)) * 2)
+                await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+            return
+        self._redis_recovered()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _redis_failed(self, error: Exception) -> None:
+        if not self._degraded:
+            logger.warning(f"Redis claim cache invalidation unavailable, invalidating locally only: {error}")
+            self._degraded = True
+
+    def _redis_recovered(self) -> None:
+        if self._degraded:
+            logger.info("Redis claim cache invalidation recovered")
+            self._degraded = False
+
+
+claim_response_cache = ClaimResponseCache(
+    max_entries=settings.CLAIM_RESPONSE_CACHE_SIZE,
+    ttl_seconds=settings.CLAIM_RESPONSE_CACHE_TTL_SECONDS,
+)
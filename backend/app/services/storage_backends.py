@@ -0,0 +1,374 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import mimetypes
+import os
+import secrets
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+import httpx
+from app.config import settings
+from app.utils.constants import UPLOAD_CHUNK_SIZE
+from app.utils.http_clients import SUPABASE_STORAGE, http_clients
+from app.utils.logger import logger
+from app.utils.upload_validation import SpooledImage
+
+ObjectContent = bytes | SpooledImage | AsyncIterator[bytes]
+
+
+class ObjectExistsError(Exception):
+    """Raised by ``put`` when the key is taken and ``upsert`` is False."""
+
+
+class StorageBackend(ABC):
+    """Interface for object stores holding claim images (and derived files)."""
+
+    # Seconds a signed upload URL stays valid
+    signed_upload_expires_in: int = 0
+
+    @abstractmethod
+    async def put(
+        self,
+        bucket: str,
+        path: str,
+        content: ObjectContent,
+        content_type: str,
+        upsert: bool = False,
+    ) -> None:
+        """Store ``content`` at ``path``; raises ObjectExistsError if it exists and not ``upsert``."""
+
+    @abstractmethod
+    def stream(self, bucket: str, path: str) -> AsyncIterator[bytes]:
+        """Async iterator over the object's bytes; raises FileNotFoundError if missing."""
+
+    @abstractmethod
+    async def stat(self, bucket: str, path: str) -> dict | None:
+        """``{"size", "content_type"}`` for an object, or None if it doesn't exist."""
+
+    @abstractmethod
+    async def delete(self, bucket: str, paths: List[str]) -> None:
+        """Delete the objects at ``paths``; missing ones are ignored."""
+
+    @abstractmethod
+    async def list_paths(self, bucket: str, prefix: str) -> List[str]:
+        """Keys of the objects directly under the ``prefix`` folder (empty if there are none)."""
+
+    @abstractmethod
+    def public_url(self, bucket: str, path: str) -> str:
+        """URL the object is served from (only readable for public buckets)."""
+
+    def path_from_public_url(self, bucket: str, url: str) -> str | None:
+        prefix = self.public_url(bucket, "")
+        return url[len(prefix):].split("?", 1)[0] if url.startswith(prefix) else None
+
+    @abstractmethod
+    async def create_signed_upload_url(self, bucket: str, path: str) -> dict:
+        """``{"path", "signed_url", "token"}`` for a direct client upload."""
+
+
+class SupabaseStorageBackend(StorageBackend):
+    """Supabase Storage over its REST API, using the pooled storage HTTP client."""
+
+    # Fixed by Supabase Storage; it cannot be shortened per request
+    signed_upload_expires_in = 2 * 60 * 60
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        self._http = http_client
+        self.base_url = f"{settings.SUPABASE_URL}/storage/v1"
+        service_key = settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_ANON_KEY
+        self.headers = {
+            "apikey": service_key,
+            "Authorization": f"Bearer {service_key}",
+        }
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self._http or http_clients.get(SUPABASE_STORAGE)
+
+    async def put(self, bucket, path, content, content_type, upsert=False) -> None:
+        headers = {
+            **self.headers,
+            "Content-Type": content_type,
+            "x-upsert": "true" if upsert else "false",
+        }
+        if isinstance(content, SpooledImage):
+            # Stream from the spool instead of materialising the whole file
+            headers["Content-Length"] = str(content.size)
+            content = content.iter_chunks()
+        r = await self.http.post(
+            f"{self.base_url}/object/{bucket}/{path}",
+            headers=headers,
+            content=content,
+        )
+        if r.status_code == 409 or (r.status_code == 400 and "Duplicate" in r.text):
+            raise ObjectExistsError(f"{bucket}/{path}")
+        r.raise_for_status()
+
+    async def stream(self, bucket, path) -> AsyncIterator[bytes]:
+        async with self.http.stream(
+            "GET",
+            f"{self.base_url}/object/authenticated/{bucket}/{path}",
+            headers=self.headers,
+        ) as r:
+            if r.status_code in (400, 404):
+                raise FileNotFoundError(f"{bucket}/{path}")
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes(UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+    async def stat(self, bucket, path) -> dict | None:
+        r = await self.http.head(
+            f"{self.base_url}/object/authenticated/{bucket}/{path}",
+            headers=self.headers,
+        )
+        # Storage answers 400 rather than 404 for some missing objects
+        if r.status_code in (400, 404):
+            return None
+        r.raise_for_status()
+        return {
+            "size": int(r.headers.get("content-length", 0)),
+            "content_type": r.headers.get("content-type", "").split(";")[0].strip().lower(),
+        }
+
+    async def delete(self, bucket, paths) -> None:
+        r = await self.http.request(
+            "DELETE",
+            f"{self.base_url}/object/{bucket}",
+            headers=self.headers,
+            json={"prefixes": paths},
+        )
+        r.raise_for_status()
+
+    async def list_paths(self, bucket, prefix) -> List[str]:
+        prefix = prefix.strip("/")
+        paths: List[str] = []
+        offset, page_size = 0, 1000
+        while True:
+            r = await self.http.post(
+                f"{self.base_url}/object/list/{bucket}",
+                headers=self.headers,
+                json={"prefix": prefix, "limit": page_size, "offset": offset},
+            )
+            r.raise_for_status()
+            entries = r.json()
+            # Sub-folders are listed too, without an id
+            paths.extend(f"{prefix}/{e['name']}" for e in entries if e.get("id"))
+            if len(entries) < page_size:
+                return paths
+            offset += len(entries)
+
+    def public_url(self, bucket, path) -> str:
+        return f"{self.base_url}/object/public/{bucket}/{path}"
+
+    async def create_signed_upload_url(self, bucket, path) -> dict:
+        r = await self.http.post(
+            f"{self.base_url}/object/upload/sign/{bucket}/{path}",
+            headers={**self.headers, "x-upsert": "false"},
+        )
+        r.raise_for_status()
+        relative_url = r.json()["url"]
+        token = parse_qs(urlsplit(relative_url).query).get("token", [""])[0]
+        return {
+            "path": path,
+            "signed_url": f"{self.base_url}{relative_url}",
+            "token": token,
+        }
+
+
+class LocalStorageBackend(StorageBackend):
+    """Content-addressed object store on the local filesystem.
+
+    Bytes are written once to ``blobs/<sha256[:2]>/<sha256>``. Each object
+    key under ``objects/<bucket>/`` is a hard link to its blob, so identical
+    uploads share one copy on disk while every key keeps its own name. A
+    blob is removed when its last key is deleted. Objects are served by the
+    ``/api/v1/storage`` routes.
+    """
+
+    # Buckets readable without a token through the serving route
+    PUBLIC_BUCKETS = {"claim-images"}
+
+    def __init__(
+        self,
+        root: str,
+        public_base_url: str,
+        signing_key: Optional[str] = None,
+        signed_upload_expires_in: int = 600,
+    ):
+        self.root = Path(root).resolve()
+        self.blobs_dir = self.root / "blobs"
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        for d in (self.blobs_dir, self.objects_dir, self.tmp_dir):
+            d.mkdir(parents=True, exist_ok=True)
+        self.public_base_url = public_base_url.rstrip("/")
+        if not signing_key:
+            logger.warning(
+                "LOCAL_STORAGE_SIGNING_KEY not set; signed upload URLs are only valid in this process"
+            )
+        self._signing_key = (signing_key or secrets.token_hex(32)).encode()
+        self.signed_upload_expires_in = signed_upload_expires_in
+        # Serialises link/unlink so a blob isn't collected while a new key links to it
+        self._link_lock = threading.Lock()
+
+    def object_path(self, bucket: str, path: str) -> Path:
+        """Filesystem path of an object key; rejects keys that escape the bucket."""
+        bucket_dir = (self.objects_dir / bucket).resolve()
+        target = (bucket_dir / path).resolve()
+        if bucket_dir.parent != self.objects_dir or not path or bucket_dir not in target.parents:
+            raise ValueError(f"Invalid object path: {bucket}/{path}")
+        return target
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    async def _chunks(self, content: ObjectContent) -> AsyncIterator[bytes]:
+        if isinstance(content, bytes):
+            yield content
+        elif isinstance(content, SpooledImage):
+            async for chunk in content.iter_chunks():
+                yield chunk
+        else:
+            async for chunk in content:
+                yield chunk
+
+    async def put(self, bucket, path, content, content_type, upsert=False) -> None:
+        target = self.object_path(bucket, path)
+        if target.exists() and not upsert:
+            raise ObjectExistsError(f"{bucket}/{path}")
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                async for chunk in self._chunks(content):
+                    digest.update(chunk)
+                    await asyncio.to_thread(tmp.write, chunk)
+            await asyncio.to_thread(self._commit, tmp_name, digest.hexdigest(), target, upsert)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
+    def _commit(self, tmp_name: str, digest: str, target: Path, upsert: bool) -> None:
+        with self._link_lock:
+            self._commit_locked(tmp_name, digest, target, upsert)
+
+    def _commit_locked(self, tmp_name: str, digest: str, target: Path, upsert: bool) -> None:
+        blob = self._blob_path(digest)
+        if not blob.exists():
+            blob.parent.mkdir(exist_ok=True)
+            os.replace(tmp_name, blob)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            if not upsert:
+                raise ObjectExistsError(str(target))
+            self._unlink_key(target)
+        os.link(blob, target)
+
+    async def stream(self, bucket, path) -> AsyncIterator[bytes]:
+        target = self.object_path(bucket, path)
+        with await asyncio.to_thread(open, target, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+    async def stat(self, bucket, path) -> dict | None:
+        try:
+            st = await asyncio.to_thread(os.stat, self.object_path(bucket, path))
+        except (FileNotFoundError, ValueError):
+            return None
+        return {"size": st.st_size, "content_type": self.content_type(path)}
+
+    @staticmethod
+    def content_type(path: str) -> str:
+        return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    def _unlink_key(self, target: Path) -> None:
+        # With hard links the blob is the only other link once this is the last key
+        if target.stat().st_nlink <= 2:
+            digest = hashlib.sha256()
+            with open(target, "rb") as f:
+                while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+            target.unlink()
+            self._blob_path(digest.hexdigest()).unlink(missing_ok=True)
+        else:
+            target.unlink()
+
+    def _delete_sync(self, bucket: str, paths: List[str]) -> None:
+        with self._link_lock:
+            for path in paths:
+                try:
+                    self._unlink_key(self.object_path(bucket, path))
+                except FileNotFoundError:
+                    continue
+
+    async def delete(self, bucket, paths) -> None:
+        await asyncio.to_thread(self._delete_sync, bucket, paths)
+
+    def _list_sync(self, bucket: str, prefix: str) -> List[str]:
+        try:
+            folder = self.object_path(bucket, prefix)
+            return [f"{prefix}/{entry.name}" for entry in folder.iterdir() if entry.is_file()]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+    async def list_paths(self, bucket, prefix) -> List[str]:
+        return await asyncio.to_thread(self._list_sync, bucket, prefix.strip("/"))
+
+    def public_url(self, bucket, path) -> str:
+        return f"{self.public_base_url}/api/v1/storage/{bucket}/{path}"
+
+    def _sign(self, bucket: str, path: str, expires: int) -> str:
+        mac = hmac.new(self._signing_key, f"{bucket}/{path}:{expires}".encode(), hashlib.sha256)
+        return base64.urlsafe_b64encode(mac.digest()).decode().rstrip("=")
+
+    def verify_upload_token(self, bucket: str, path: str, token: str) -> bool:
+        expires_str, _, signature = token.partition(".")
+        if not expires_str.isdigit() or int(expires_str) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._sign(bucket, path, int(expires_str)))
+
+    async def create_signed_upload_url(self, bucket, path) -> dict:
+        self.object_path(bucket, path)
+        expires = int(time.time()) + self.signed_upload_expires_in
+        token = f"{expires}.{self._sign(bucket, path, expires)}"
+        return {
+            "path": path,
+            "signed_url": (
+                f"{self.public_base_url}/api/v1/storage/upload/{bucket}/{path}?token={token}"
+            ),
+            "token": token,
+        }
+
+
+def create_storage_backend(backend: str) -> StorageBackend:
+    """Build the configured backend (``supabase`` or ``local``)."""
+    if backend == "local":
+        logger.info(f"Using local content-addressed storage at {settings.LOCAL_STORAGE_DIR}")
+        return LocalStorageBackend(
+            settings.LOCAL_STORAGE_DIR,
+            public_base_url=settings.LOCAL_STORAGE_PUBLIC_URL,
+            signing_key=settings.LOCAL_STORAGE_SIGNING_KEY,
+            signed_upload_expires_in=settings.LOCAL_STORAGE_SIGNED_UPLOAD_SECONDS,
+        )
+    if backend != "supabase":
+        logger.warning(f"Unknown STORAGE_BACKEND '{backend}'; using Supabase storage")
+    return SupabaseStorageBackend()
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_storage_backend() -> StorageBackend:
+    """Process-wide storage backend, created on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_storage_backend(settings.STORAGE_BACKEND)
+    return _backend
@@ -1,53 +1,244 @@
+import asyncio
 import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Iterable, List, Optional, TypeVar
 from fastapi import UploadFile
-from app.db.supabase_client import get_supabase_client
+from app.config import settings
+from app.ml.inference_queue import inference_queue
+from app.services.storage_backends import StorageBackend, get_storage_backend
 from app.utils.logger import logger
-from app.utils.constants import ALLOWED_IMAGE_TYPES, MAX_IMAGE_SIZE
+from app.utils.constants import MAX_IMAGE_SIZE
+from app.utils.image_processing import ImageVariants, normalise_image
+from app.utils.upload_validation import SpooledImage, iter_upload_file, spool_image_stream
+
+T = TypeVar("T")
+
+CONTENT_TYPE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png"}
+
+
+async def gather_bounded(
+    coros: Iterable[Awaitable[T]], limit: int
+) -> List[T | BaseException]:
+    """Run awaitables concurrently, at most ``limit`` at a time.
+
+    Results keep input order; a failure is returned in place of its result
+    instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(coro: Awaitable[T]) -> T:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(_run(c) for c in coros), return_exceptions=True)
+
+
+@dataclass
+class PreparedImage:
+    """A validated, decoded upload that has not been written to storage yet."""
+
+    file_path: str
+    original: SpooledImage
+    variants: ImageVariants
+
+    def close(self) -> None:
+        self.original.close()
 
 
 class StorageService:
+    """Claim image storage on top of the configured storage backend."""
+
     BUCKET = "claim-images"
 
-    def __init__(self):
-        self.client = get_supabase_client()
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or get_storage_backend()
 
-    async def upload_image(self, file: UploadFile, user_id: str) -> str:
-        """Upload an image to Supabase Storage and return its public URL."""
-        # Validate file type
-        if file.content_type not in ALLOWED_IMAGE_TYPES:
-            raise ValueError(f"Invalid file type: {file.content_type}. Only JPG/PNG accepted.")
-
-        # Read file content
-        content = await file.read()
-
-        # Validate file size
-        if len(content) > MAX_IMAGE_SIZE:
-            raise ValueError(f"File size exceeds {MAX_IMAGE_SIZE // (1024*1024)}MB limit.")
-
-        # Generate unique path
-        ext = file.filename.split(".")[-1] if file.filename else "jpg"
-        file_path = f"{user_id}/{uuid.uuid4().hex}.{ext}"
-
-        # Upload to Supabase Storage
-        self.client.storage.from_(self.BUCKET).upload(
-            path=file_path,
-            file=content,
-            file_options={"content-type": file.content_type},
-        )
+    def get_public_url(self, file_path: str) -> str:
+        return self.backend.public_url(self.BUCKET, file_path)
 
-        # Get public URL
-        public_url = self.client.storage.from_(self.BUCKET).get_public_url(file_path)
+    def path_from_public_url(self, url: str) -> str | None:
+        return self.backend.path_from_public_url(self.BUCKET, url)
 
+    @staticmethod
+    def new_object_path(
+        user_id: str, filename: Optional[str] = None, content_type: Optional[str] = None
+    ) -> str:
+        if content_type in CONTENT_TYPE_EXTENSIONS:
+            ext = CONTENT_TYPE_EXTENSIONS[content_type]
+        elif filename and "." in filename:
+            ext = filename.split(".")[-1]
+        else:
+            ext = "jpg"
+        return f"{user_id}/{uuid.uuid4().hex}.{ext}"
+
+    async def _put_object(
+        self,
+        file_path: str,
+        content: bytes | SpooledImage,
+        content_type: str,
+    ) -> str:
+        await self.backend.put(self.BUCKET, file_path, content, content_type)
+        return self.get_public_url(file_path)
+
+    @staticmethod
+    def variant_path(file_path: str, variant: str) -> str:
+        """Path of a derived variant (``inference`` / ``thumbnail``) stored next to the original."""
+        return f"{file_path.rsplit('.', 1)[0]}_{variant}.jpg"
+
+    async def _read_validated(self, file: UploadFile) -> SpooledImage:
+        """Stream and validate an upload; type comes from the file's bytes, not the client."""
+        return await spool_image_stream(iter_upload_file(file), max_size=MAX_IMAGE_SIZE)
+
+    async def upload_image(self, file: UploadFile, user_id: str) -> str:
+        """Upload an image to the storage backend and return its public URL."""
+        image = await self._read_validated(file)
+        try:
+            # Generate unique path
+            file_path = self.new_object_path(user_id, file.filename, image.content_type)
+
+            public_url = await self._put_object(file_path, image, image.content_type)
+        finally:
+            image.close()
         logger.info(f"Image uploaded: {file_path}")
         return public_url
 
+    async def _put_variants(self, file_path: str, variants: ImageVariants) -> dict:
+        inference_url, thumbnail_url = await asyncio.gather(
+            self._put_object(self.variant_path(file_path, "inference"), variants.inference, "image/jpeg"),
+            self._put_object(self.variant_path(file_path, "thumbnail"), variants.thumbnail, "image/jpeg"),
+        )
+        return {
+            "original": self.get_public_url(file_path),
+            "inference": inference_url,
+            "thumbnail": thumbnail_url,
+        }
+
+    async def store_variants(self, file_path: str, image: SpooledImage) -> dict:
+        """Normalise an original image and store its inference and thumbnail variants.
+
+        Returns ``{"original", "inference", "thumbnail"}`` public URLs.
+        Raises ``ValueError`` if the content is not a decodable image.
+        """
+        variants = await inference_queue.run(normalise_image, image.open())
+        return await self._put_variants(file_path, variants)
+
+    async def _discard_ingest(self, file_path: str, include_original: bool) -> None:
+        paths = [
+            self.variant_path(file_path, "inference"),
+            self.variant_path(file_path, "thumbnail"),
+        ]
+        await self.delete_images([file_path, *paths] if include_original else paths)
+
+    async def delete_ingested(self, ingested: List[dict]) -> None:
+        """Delete originals and variants returned by the ingest methods (best effort)."""
+        paths = [
+            path
+            for variants in ingested
+            for url in variants.values()
+            if (path := self.path_from_public_url(url))
+        ]
+        await self.delete_images(paths)
+
+    async def prepare_image(self, file: UploadFile, user_id: str) -> PreparedImage:
+        """Validate and decode an upload without writing anything to storage yet.
+
+        Raises ``ValueError`` for files that are not acceptable images.
+        """
+        image = await self._read_validated(file)
+        try:
+            variants = await inference_queue.run(normalise_image, image.open())
+        except BaseException:
+            image.close()
+            raise
+        return PreparedImage(
+            file_path=self.new_object_path(user_id, file.filename, image.content_type),
+            original=image,
+            variants=variants,
+        )
+
+    async def prepare_images(
+        self, files: List[UploadFile], user_id: str
+    ) -> List[PreparedImage | BaseException]:
+        """Prepare several uploads concurrently; one failure does not affect the others."""
+        return await gather_bounded(
+            (self.prepare_image(file=f, user_id=user_id) for f in files),
+            settings.STORAGE_UPLOAD_CONCURRENCY,
+        )
+
+    async def store_prepared(self, prepared: PreparedImage) -> dict:
+        """Upload a prepared original and its variants; on failure nothing is left behind."""
+        try:
+            results = await asyncio.gather(
+                self._put_object(prepared.file_path, prepared.original, prepared.original.content_type),
+                self._put_variants(prepared.file_path, prepared.variants),
+                return_exceptions=True,
+            )
+        finally:
+            prepared.close()
+        failure = next((r for r in results if isinstance(r, BaseException)), None)
+        if failure is not None:
+            await self._discard_ingest(prepared.file_path, include_original=True)
+            raise failure
+
+        logger.info(f"Image ingested: {prepared.file_path}")
+        return results[1]
+
+    async def store_prepared_images(self, prepared: List[PreparedImage]) -> List[dict]:
+        """Upload prepared images concurrently, all or nothing.
+
+        Returns ``{"original", "inference", "thumbnail"}`` URLs per image, in order.
+        """
+        results = await gather_bounded(
+            (self.store_prepared(p) for p in prepared),
+            settings.STORAGE_UPLOAD_CONCURRENCY,
+        )
+        stored = [r for r in results if isinstance(r, dict)]
+        failure = next((r for r in results if not isinstance(r, dict)), None)
+        if failure is not None:
+            await self.delete_ingested(stored)
+            raise failure
+        return stored
+
+    async def ingest_stored_image(self, file_path: str) -> dict:
+        """Validate and generate variants for an original uploaded directly to storage.
+
+        The object's declared content type came from the client, so the bytes
+        are sniffed the same way as a multipart upload.
+        """
+        image = await spool_image_stream(
+            self.backend.stream(self.BUCKET, file_path), max_size=MAX_IMAGE_SIZE
+        )
+        try:
+            variants = await self.store_variants(file_path, image)
+        except Exception:
+            await self._discard_ingest(file_path, include_original=False)
+            raise
+        finally:
+            image.close()
+        logger.info(f"Image ingested: {file_path}")
+        return variants
+
+    async def create_signed_upload_url(self, file_path: str) -> dict:
+        """Issue a signed URL the client can PUT the object to directly."""
+        return await self.backend.create_signed_upload_url(self.BUCKET, file_path)
+
+    async def get_object_metadata(self, file_path: str) -> dict | None:
+        """Return ``{"size", "content_type"}`` for a stored object, or None if it doesn't exist."""
+        return await self.backend.stat(self.BUCKET, file_path)
+
     async def delete_image(self, file_path: str) -> None:
-        """Delete an image from Supabase Storage."""
+        """Delete an image from the storage backend."""
+        await self.delete_images([file_path])
+
+    async def delete_images(self, file_paths: List[str]) -> None:
+        """Delete images from the storage backend (best effort)."""
+        if not file_paths:
+            return
         try:
-            self.client.storage.from_(self.BUCKET).remove([file_path])
-            logger.info(f"Image deleted: {file_path}")
+            await self.backend.delete(self.BUCKET, file_paths)
+            logger.info(f"Images deleted: {file_paths}")
         except Exception as e:
-            logger.warning(f"Failed to delete image {file_path}: {e}")
+            logger.warning(f"Failed to delete images {file_paths}: {e}")
 
     async def upload_processed_image(
         self,
@@ -61,12 +252,25 @@ class StorageService:
             f"{user_id}/{claim_id}/processed_{index + 1}_{uuid.uuid4().hex[:8]}.jpg"
         )
 
-        self.client.storage.from_(self.BUCKET).upload(
-            path=file_path,
-            file=image_bytes,
-            file_options={"content-type": "image/jpeg"},
-        )
-
-        public_url = self.client.storage.from_(self.BUCKET).get_public_url(file_path)
+        public_url = await self._put_object(file_path, image_bytes, "image/jpeg")
         logger.info(f"Processed image uploaded: {file_path}")
         return public_url
+
+    async def upload_processed_images(
+        self,
+        images: dict[int, bytes],
+        user_id: str,
+        claim_id: str,
+    ) -> dict[int, str | BaseException]:
+        """Upload annotated images concurrently, keyed by source image index."""
+        indices = list(images.keys())
+        results = await gather_bounded(
+            (
+                self.upload_processed_image(
+                    image_bytes=images[i], user_id=user_id, claim_id=claim_id, index=i
+                )
+                for i in indices
+            ),
+            settings.STORAGE_UPLOAD_CONCURRENCY,
+        )
+        return dict(zip(indices, results))
@@ -1,11 +1,31 @@
+import asyncio
 import httpx
-import base64
-from typing import List, Optional
+from typing import Callable, List, Optional
 from app.config import settings
 from app.schemas.damage import DamageZone
+from app.services.explanation_cache import ExplanationCache, get_explanation_cache
+from app.services.llm_governor import ProviderGovernors, ProviderSaturatedError, llm_governors
+from app.services.llm_providers import (
+    GeminiProvider,
+    OpenAIProvider,
+    VisionLLMProvider,
+    create_provider,
+)
+from app.utils.constants import LLM_IMAGE_JPEG_QUALITY, LLM_IMAGE_MAX_DIMENSION
+from app.utils.deadline import Deadline
+from app.utils.image_processing import build_llm_image
+from app.utils.http_clients import SUPABASE_STORAGE, http_clients
 from app.utils.logger import logger
 
 
+class ExplanationFallbackError(Exception):
+    """The LLM gave no explanation; ``fallback`` holds the template text instead."""
+
+    def __init__(self, reason: str, fallback: str):
+        super().__init__(reason)
+        self.fallback = fallback
+
+
 class VisionLLMService:
     """Generate natural language damage explanation using Vision LLM."""
 
@@ -20,99 +40,289 @@ class VisionLLMService:
         "Avoid legal conclusions and avoid mentioning internal model names. "
         "Target approximately 180-260 words."
     )
+    # Part of the explanation cache key: bump whenever either prompt changes
+    PROMPT_VERSION = "1"
 
-    def __init__(self):
-        self.openai_key = settings.OPENAI_API_KEY
-        self.gemini_key = settings.GEMINI_API_KEY
+    def __init__(
+        self,
+        openai_client: Optional[httpx.AsyncClient] = None,
+        gemini_client: Optional[httpx.AsyncClient] = None,
+        storage_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ExplanationCache] = None,
+        governors: Optional[ProviderGovernors] = None,
+        providers: Optional[dict[str, VisionLLMProvider]] = None,
+    ):
+        self.provider_name = settings.VISION_LLM_PROVIDER
         self.model = settings.VISION_LLM_MODEL
+        self.hedge_provider_name = settings.LLM_HEDGE_PROVIDER
+        self.hedge_model = settings.LLM_HEDGE_MODEL
+        self.providers: dict[str, VisionLLMProvider] = {
+            "openai": OpenAIProvider(http_client=openai_client),
+            "gemini": GeminiProvider(http_client=gemini_client),
+            **(providers or {}),
+        }
+        self.storage_client = storage_client or http_clients.get(SUPABASE_STORAGE)
+        if cache is None and settings.LLM_CACHE_ENABLED:
+            cache = get_explanation_cache()
+        self.cache = cache
+        self.governors = governors or llm_governors
 
     async def explain_damage(
         self,
         image_urls: List[str],
         damage_zones: List[DamageZone],
         user_description: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        image_sources: Optional[List[str | bytes]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        allow_fallback: bool = True,
     ) -> str:
-        """Generate AI explanation of detected damage."""
+        """Generate AI explanation of detected damage.
+
+        With a deadline, the LLM call is skipped or cut short in favour of the
+        template fallback when the claim's latency budget runs low. Answers are
+        cached on the image content and the prompt inputs, so a reprocess or
+        resubmission of the same evidence skips the LLM call.
+
+        The image is sent inline, downscaled and re-encoded for the provider:
+        the first claim image, or all of them tiled into one grid with
+        LLM_IMAGE_TILING. ``image_sources`` (already-loaded image bytes, or
+        URLs) spare a download of ``image_urls`` when given.
+
+        Calls go through a per-provider governor (concurrency cap, adaptive
+        timeout); a saturated provider means the template fallback right away.
+        With ``on_token`` the provider's streaming mode is used and each text
+        fragment is passed to it as it arrives; the full text is still returned.
+
+        Whenever the template is used instead of an LLM answer, it is returned
+        as the explanation, or with ``allow_fallback=False`` raised as
+        ``ExplanationFallbackError`` so the caller can tell the two apart.
+        """
+        def fallback(reason: str) -> str:
+            text = self.fallback_explanation(damage_zones)
+            if not allow_fallback:
+                raise ExplanationFallbackError(reason, text)
+            return text
+
         damage_summary = self._build_damage_summary(damage_zones)
+        sources = image_sources or image_urls
+        tiled = settings.LLM_IMAGE_TILING and len(sources) > 1
+        subject = (
+            f"these {len(sources)} vehicle damage photos (tiled into one grid image)"
+            if tiled
+            else "this vehicle damage image"
+        )
 
         user_prompt = (
-            f"Analyze this vehicle damage image.\n\n"
+            f"Analyze {subject}.\n\n"
             f"Detected damage categories: {damage_summary}\n"
             f"{'User description: ' + user_description if user_description else ''}\n\n"
             "Provide a detailed professional assessment using the required 5-section format."
         )
 
+        if deadline is not None and not deadline.allows("llm"):
+            return fallback("latency budget exhausted")
+
+        providers = self._providers()
+        if not providers:
+            logger.warning("No Vision LLM API key configured, using fallback")
+            return fallback("no Vision LLM provider configured")
+
         try:
-            if self.openai_key and ("gpt" in self.model or "openai" in self.model):
-                return await self._call_openai(image_urls[0], user_prompt)
-            elif self.gemini_key:
-                return await self._call_gemini(image_urls[0], user_prompt)
+            call = self._generate(
+                providers,
+                sources=sources if tiled else sources[:1],
+                damage_summary=damage_summary,
+                user_description=user_description,
+                prompt=user_prompt,
+                on_token=on_token,
+            )
+            if deadline is None:
+                return await call
+            return await asyncio.wait_for(
+                call, timeout=deadline.timeout(settings.HTTP_LLM_TIMEOUT_SECONDS)
+            )
+        except asyncio.TimeoutError:
+            if deadline is not None:
+                deadline.record("llm", "timed out, used template fallback")
             else:
-                logger.warning("No Vision LLM API key configured, using fallback")
-                return self._fallback_explanation(damage_zones)
+                logger.warning("Vision LLM timed out, using fallback")
+            return fallback("timed out")
+        except ProviderSaturatedError as e:
+            if deadline is not None:
+                deadline.record("llm", "provider saturated, used template fallback")
+            logger.warning(f"Vision LLM saturated, using fallback: {e}")
+            return fallback(f"provider saturated: {e}")
         except Exception as e:
             logger.error(f"Vision LLM failed: {e}")
-            return self._fallback_explanation(damage_zones)
-
-    async def _call_openai(self, image_url: str, prompt: str) -> str:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {self.openai_key}"},
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {"role": "system", "content": self.SYSTEM_PROMPT},
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": prompt},
-                                {"type": "image_url", "image_url": {"url": image_url}},
-                            ],
-                        },
-                    ],
-                    "max_tokens": 700,
-                },
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-
-    async def _call_gemini(self, image_url: str, prompt: str) -> str:
-        async with httpx.AsyncClient(timeout=30) as client:
-            image_resp = await client.get(image_url)
-            image_resp.raise_for_status()
-
-        image_bytes = image_resp.content
-        image_b64 = base64.b64encode(image_bytes).decode("utf-8")
-
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                f"https://generativelanguage.googleapis.com/v1beta/models/"
-                f"{self.model}:generateContent?key={self.gemini_key}",
-                json={
-                    "contents": [
-                        {
-                            "parts": [
-                                {"text": f"{self.SYSTEM_PROMPT}\n\n{prompt}"},
-                                {
-                                    "inline_data": {
-                                        "mime_type": "image/jpeg",
-                                        "data": image_b64,
-                                    }
-                                },
-                            ]
-                        }
-                    ],
-                    "generationConfig": {
-                        "maxOutputTokens": 900,
-                        "temperature": 0.3,
-                    },
-                },
-            )
-            response.raise_for_status()
-            return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+            return fallback(str(e))
+
+    def _provider(self, name: str) -> VisionLLMProvider | None:
+        provider = self.providers.get(name)
+        if provider is None:
+            try:
+                provider = self.providers[name] = create_provider(name)
+            except ValueError as e:
+                logger.warning(str(e))
+                return None
+        return provider if provider.is_configured else None
+
+    def _providers(self) -> List[tuple[str, str]]:
+        """(provider, model) pairs to try: the configured one, then the hedge if set up."""
+        primary = self.provider_name
+        if primary == "auto":
+            openai = self._provider("openai")
+            primary = "openai" if openai and openai.accepts_model(self.model) else "gemini"
+        if self._provider(primary) is None:
+            return []
+        providers = [(primary, self.model)]
+
+        if self.hedge_model:
+            hedge = self.hedge_provider_name or ("gemini" if primary == "openai" else "openai")
+            if hedge != primary and self._provider(hedge) is not None:
+                providers.append((hedge, self.hedge_model))
+        return providers
+
+    async def _generate(
+        self,
+        providers: List[tuple[str, str]],
+        sources: List[str | bytes],
+        damage_summary: str,
+        user_description: Optional[str],
+        prompt: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        images = list(await asyncio.gather(*(self._load_image(s) for s in sources)))
+
+        cache_keys: dict[tuple[str, str], str] = {}
+        if self.cache is not None:
+            # Keyed per provider and model: a hedge's (or the mock's) answer must
+            # not pass for the primary's
+            for provider, model in providers:
+                if not self.providers[provider].caches_explanations:
+                    continue
+                cache_keys.setdefault((provider, model), ExplanationCache.make_key(
+                    images,
+                    damage_summary,
+                    user_description,
+                    provider=provider,
+                    model=model,
+                    prompt_version=self.PROMPT_VERSION,
+                ))
+            for key in cache_keys.values():
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    logger.info("Vision LLM explanation served from cache")
+                    if on_token is not None:
+                        on_token(cached)
+                    return cached
+
+        explanation, winner = await self._call_hedged(providers, images, prompt, on_token)
+
+        if winner in cache_keys:
+            await self.cache.put(cache_keys[winner], explanation)
+        return explanation
+
+    async def _call_hedged(
+        self,
+        providers: List[tuple[str, str]],
+        images: List[bytes],
+        prompt: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> tuple[str, tuple[str, str]]:
+        """Call the first provider that isn't saturated; hedge to the next one if it is slow.
+
+        The hedge starts once the first call has run for its provider's p95
+        latency, or straight away if the first call fails. Whichever answers
+        first wins and the other call is cancelled. When streaming, only the
+        call that produces text first is forwarded to ``on_token``. Returns the
+        explanation and the (provider, model) pair that produced it.
+        """
+        available = [p for p in providers if not self.governors.get(p[0]).saturated]
+        if not available:
+            raise ProviderSaturatedError("all Vision LLM providers are saturated")
+
+        first, hedge = available[0], (available[1] if len(available) > 1 else None)
+        delay = self.governors.get(first[0]).hedge_delay() if hedge else None
+        errors: List[BaseException] = []
+        streaming_provider: List[str] = []
+
+        def forward(provider: str) -> Optional[Callable[[str], None]]:
+            if on_token is None:
+                return None
+
+            def emit(text: str) -> None:
+                if not streaming_provider:
+                    streaming_provider.append(provider)
+                if streaming_provider[0] == provider:
+                    on_token(text)
+
+            return emit
+
+        task = asyncio.ensure_future(
+            self._call_provider(*first, images, prompt, forward(first[0]))
+        )
+        # Which (provider, model) each call runs, so the winner's answer is cached under it
+        calls = {task: first}
+        pending = {task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), calls[task]
+                    errors.append(task.exception())
+                if hedge is not None and not done and streaming_provider:
+                    # Already streaming to the client: a slow stream beats starting over
+                    hedge, delay = None, None
+                if hedge is not None:
+                    reason = f"failed ({errors[-1]})" if done else f"slower than {delay:.1f}s"
+                    logger.info(f"Vision LLM {first[0]} {reason}, hedging to {hedge[0]}")
+                    task = asyncio.ensure_future(
+                        self._call_provider(*hedge, images, prompt, forward(hedge[0]))
+                    )
+                    calls[task] = hedge
+                    pending.add(task)
+                    hedge, delay = None, None
+            raise errors[0]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call_provider(
+        self,
+        provider: str,
+        model: str,
+        images: List[bytes],
+        prompt: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        # Not on inference_queue: a resize must not queue behind (or count as) model inference
+        payload = await asyncio.to_thread(
+            build_llm_image,
+            images,
+            LLM_IMAGE_MAX_DIMENSION.get(provider, max(LLM_IMAGE_MAX_DIMENSION.values())),
+            LLM_IMAGE_JPEG_QUALITY,
+        )
+        return await self.governors.get(provider).call(
+            self.providers[provider].generate,
+            payload,
+            self.SYSTEM_PROMPT,
+            prompt,
+            model,
+            on_token,
+        )
+
+    async def _load_image(self, source: str | bytes) -> bytes:
+        if isinstance(source, bytes):
+            return source
+        image_resp = await self.storage_client.get(source)
+        image_resp.raise_for_status()
+        return image_resp.content
 
-    def _fallback_explanation(self, damage_zones: List[DamageZone]) -> str:
+    def fallback_explanation(self, damage_zones: List[DamageZone]) -> str:
         """Template-based fallback when LLM is unavailable."""
         if not damage_zones:
             return (
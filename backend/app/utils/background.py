@@ -0,0 +1,26 @@
+import asyncio
+from typing import Coroutine
+from app.utils.logger import logger
+
+# The event loop only keeps weak references to tasks; hold them until they finish
+_tasks: set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine, name: str | None = None) -> asyncio.Task:
+    """Run ``coro`` in the background, logging (not raising) any failure."""
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+def _finished(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed: {task.exception()}")
+
+
+async def drain(timeout: float) -> None:
+    """Give in-flight background tasks up to ``timeout`` seconds to finish (used at shutdown)."""
+    if _tasks:
+        await asyncio.wait(set(_tasks), timeout=timeout)
@@ -13,9 +13,42 @@ MAX_IMAGE_SIZE = 10 * 1024 * 1024
 # Max images per claim
 MAX_IMAGES_PER_CLAIM = 5
 
+# Largest request body accepted (a full multipart claim upload plus form fields)
+MAX_REQUEST_BODY_SIZE = MAX_IMAGES_PER_CLAIM * MAX_IMAGE_SIZE + 1024 * 1024
+
+# Uploads are read in chunks and kept in memory only up to the spool threshold
+UPLOAD_CHUNK_SIZE = 256 * 1024
+UPLOAD_SPOOL_THRESHOLD = 1024 * 1024
+
 # Max image dimension (resize before ML inference)
 MAX_IMAGE_DIMENSION = 1920
 
+# Stored image variants generated at upload time
+THUMBNAIL_DIMENSION = 320
+INFERENCE_JPEG_QUALITY = 90
+THUMBNAIL_JPEG_QUALITY = 80
+
+# Images sent inline to the Vision LLM, sized to the resolution each provider
+# actually works at (OpenAI high detail: 768px short side; Gemini: 768px tiles)
+LLM_IMAGE_MAX_DIMENSION = {"openai": 1024, "gemini": 768, "mock": 1024}
+LLM_IMAGE_JPEG_QUALITY = 80
+
+# Explanation SSE stream: keep-alive comment interval and max time a client waits
+EXPLANATION_STREAM_KEEPALIVE_SECONDS = 15
+EXPLANATION_STREAM_MAX_SECONDS = 300
+
+# Deferred explanations still pending this long after processing were lost (worker
+# restart, shutdown drain timeout) and get the template fallback; checked on this interval
+EXPLANATION_PENDING_STALE_SECONDS = 600
+EXPLANATION_RECOVERY_INTERVAL_SECONDS = 300
+
+# Seconds a compiled pricing lookup is reused before being rebuilt from the cost tables
+PRICING_LOOKUP_TTL_SECONDS = 600
+
+# Admin ZIP export of claim reports: max claims per archive and rows fetched per query
+REPORT_EXPORT_MAX_CLAIMS = 1000
+REPORT_EXPORT_BATCH_SIZE = 100
+
 # Fraud thresholds
 FRAUD_SIMILARITY_THRESHOLD = 0.92
 FRAUD_FREQUENCY_LIMIT = 3
@@ -26,3 +59,34 @@ DECISION_AUTO_APPROVE_FRAUD_MAX = 30
 DECISION_AUTO_APPROVE_COST_MAX = 15000  # INR
 DECISION_REJECT_FRAUD_MIN = 80
 DECISION_HIGH_COST_THRESHOLD = 50000  # INR
+
+# Decision threshold simulator: max threshold combinations per run, claims read per query,
+# and seconds the loaded claim arrays are reused across admin requests
+DECISION_SIMULATION_MAX_SETTINGS = 5000
+DECISION_SIMULATION_BATCH_SIZE = 1000
+DECISION_SIMULATION_CACHE_SECONDS = 300
+
+# Rate-limit cost per request (in units of RATE_LIMIT_PER_MINUTE); unlisted routes cost 1
+# "*" matches one path segment.
+RATE_LIMIT_ROUTE_COSTS = [
+    ("POST", "/api/v1/claims", 5),
+    ("POST", "/api/v1/claims/from-uploads", 5),
+    ("POST", "/api/v1/claims/*/process", 5),
+    ("GET", "/api/v1/claims/*/report", 2),
+    ("POST", "/api/v1/admin/reports/export", 20),
+    ("POST", "/api/v1/admin/decisions/simulate", 10),
+]
+
+# Routes loopback clients may call without rate limiting: this API's own ML
+# stages fetching local storage objects. Everyone else pays the normal cost.
+RATE_LIMIT_LOOPBACK_EXEMPT_ROUTES = [
+    ("GET", "/api/v1/storage/*/*/*"),
+    ("GET", "/api/v1/storage/*/*/*/*"),
+]
+
+# Routes that run the ML pipeline and are subject to admission control
+ADMISSION_CONTROLLED_ROUTES = [
+    ("POST", "/api/v1/claims"),
+    ("POST", "/api/v1/claims/from-uploads"),
+    ("POST", "/api/v1/claims/*/process"),
+]
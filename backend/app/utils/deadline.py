@@ -0,0 +1,63 @@
+import time
+from typing import List, Optional
+from app.utils.logger import logger
+
+
+def parse_degradation_ladder(spec: str) -> list[tuple[str, int]]:
+    """Parse ``"llm:8000,overlay_upload:4000,clip:3000"`` into ``[(stage, min_ms), ...]``."""
+    ladder = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        stage, _, min_ms = item.partition(":")
+        try:
+            ladder.append((stage.strip(), int(min_ms)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid degradation ladder entry '{item}'")
+    return ladder
+
+
+class Deadline:
+    """End-to-end latency budget for one claim, passed through every pipeline stage.
+
+    Optional stages are listed in a degradation ladder, in the order they
+    should be given up, each with the minimum remaining budget (ms) it needs.
+    A stage whose minimum is no longer available is skipped (or downgraded to
+    its cheap fallback) and recorded in ``degraded_stages``.
+    """
+
+    def __init__(self, budget_ms: int, ladder: Optional[list[tuple[str, int]]] = None):
+        self.budget_ms = budget_ms
+        self.ladder = dict(ladder or [])
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_ms / 1000
+        self.degraded_stages: List[str] = []
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000)
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started_at) * 1000)
+
+    def timeout(self, default_seconds: float) -> float:
+        """Seconds a stage may wait: its own default, capped by the remaining budget."""
+        return max(0.05, min(default_seconds, self.remaining_ms() / 1000))
+
+    def allows(self, stage: str) -> bool:
+        """Whether an optional stage still fits the budget; records a skip when it doesn't."""
+        min_ms = self.ladder.get(stage)
+        if min_ms is None:
+            return True
+
+        remaining = self.remaining_ms()
+        if remaining >= min_ms:
+            return True
+
+        self.record(stage, f"skipped ({int(remaining)}ms left, needs {min_ms}ms)")
+        return False
+
+    def record(self, stage: str, action: str) -> None:
+        entry = f"{stage}: {action}"
+        self.degraded_stages.append(entry)
+        logger.warning(f"Latency budget degradation — {entry}")
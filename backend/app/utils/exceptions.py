@@ -33,6 +33,14 @@ class InvalidImageError(HTTPException):
         )
 
 
+class PayloadTooLargeError(HTTPException):
+    def __init__(self, max_size: int, subject: str = "Request body"):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{subject} exceeds {max_size // (1024 * 1024)}MB limit.",
+        )
+
+
 class MLModelError(HTTPException):
     def __init__(self, model_name: str, detail: str):
         super().__init__(
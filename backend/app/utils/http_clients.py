@@ -0,0 +1,77 @@
+import httpx
+from app.config import settings
+from app.utils.logger import logger
+
+# Upstream names
+SUPABASE_AUTH = "supabase_auth"
+SUPABASE_STORAGE = "supabase_storage"
+OPENAI = "openai"
+GEMINI = "gemini"
+
+
+class HTTPClientRegistry:
+    """One pooled, keep-alive ``httpx.AsyncClient`` per upstream.
+
+    Clients are created at startup by the app lifespan and closed on shutdown,
+    so connections (DNS, TCP and TLS setup) are reused across requests. Outside
+    the lifespan (scripts, CLI jobs) clients are created lazily on first use.
+    """
+
+    def __init__(self):
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    @staticmethod
+    def _read_timeout(name: str) -> float:
+        return {
+            SUPABASE_AUTH: settings.HTTP_SUPABASE_TIMEOUT_SECONDS,
+            SUPABASE_STORAGE: settings.HTTP_STORAGE_TIMEOUT_SECONDS,
+            OPENAI: settings.HTTP_LLM_TIMEOUT_SECONDS,
+            GEMINI: settings.HTTP_LLM_TIMEOUT_SECONDS,
+        }.get(name, settings.HTTP_SUPABASE_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _http2_enabled() -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is missing; using HTTP/1.1")
+            return False
+        return True
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        timeout = httpx.Timeout(
+            self._read_timeout(name),
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        )
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=self._http2_enabled())
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for an upstream, creating it if needed."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create(name)
+            self._clients[name] = client
+        return client
+
+    async def startup(self) -> None:
+        for name in (SUPABASE_AUTH, SUPABASE_STORAGE, OPENAI, GEMINI):
+            self.get(name)
+        logger.info(f"HTTP client pools ready: {list(self._clients.keys())}")
+
+    async def aclose(self) -> None:
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client '{name}': {e}")
+        self._clients.clear()
+
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,117 @@
+import io
+import json
+import math
+from dataclasses import dataclass
+from typing import BinaryIO, List
+from PIL import Image, ImageOps
+from app.utils.constants import (
+    INFERENCE_JPEG_QUALITY,
+    MAX_IMAGE_DIMENSION,
+    THUMBNAIL_DIMENSION,
+    THUMBNAIL_JPEG_QUALITY,
+)
+
+
+@dataclass
+class ImageVariants:
+    inference: bytes  # upright, metadata-free JPEG no larger than MAX_IMAGE_DIMENSION
+    thumbnail: bytes  # small JPEG for list views
+    width: int
+    height: int
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buf = io.BytesIO()
+    # No exif/icc passed through, so metadata (GPS, device info) is dropped
+    image.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def normalise_image(source: bytes | BinaryIO) -> ImageVariants:
+    """Decode an uploaded photo once and derive the stored variants.
+
+    JPEGs are decoded through ``draft`` so libjpeg's DCT scaling does most of
+    the downscale for large phone photos. EXIF orientation is applied to the
+    pixels before the metadata is dropped. Raises ``ValueError`` if the bytes
+    are not a decodable image.
+    """
+    try:
+        image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+        if image.format == "JPEG" and max(image.size) > MAX_IMAGE_DIMENSION:
+            ratio = MAX_IMAGE_DIMENSION / max(image.size)
+            image.draft("RGB", (int(image.width * ratio), int(image.height * ratio)))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except Exception as e:
+        raise ValueError(f"Could not decode image: {e}") from e
+
+    # draft only reduces by powers of two; finish the resize exactly
+    image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.Resampling.LANCZOS)
+    inference = _encode_jpeg(image, INFERENCE_JPEG_QUALITY)
+
+    thumb = image.copy()
+    thumb.thumbnail((THUMBNAIL_DIMENSION, THUMBNAIL_DIMENSION), Image.Resampling.BICUBIC, reducing_gap=2.0)
+    thumbnail = _encode_jpeg(thumb, THUMBNAIL_JPEG_QUALITY)
+
+    return ImageVariants(
+        inference=inference,
+        thumbnail=thumbnail,
+        width=image.width,
+        height=image.height,
+    )
+
+
+def _decode_downscaled(content: bytes, max_dimension: int) -> Image.Image:
+    image = Image.open(io.BytesIO(content))
+    if image.format == "JPEG" and max(image.size) > max_dimension:
+        ratio = max_dimension / max(image.size)
+        image.draft("RGB", (int(image.width * ratio), int(image.height * ratio)))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    return image
+
+
+def build_llm_image(images: List[bytes], max_dimension: int, quality: int) -> bytes:
+    """Encode the image(s) sent inline to a Vision LLM.
+
+    A single image is downscaled to ``max_dimension`` on its long side. Several
+    images are tiled into one near-square grid of that overall size, each
+    scaled to fit its cell, so the provider sees every photo for the token
+    cost of one.
+    """
+    if len(images) == 1:
+        return _encode_jpeg(_decode_downscaled(images[0], max_dimension), quality)
+
+    cols = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / cols)
+    cell = max_dimension // cols
+    composite = Image.new("RGB", (cell * cols, cell * rows), (0, 0, 0))
+    for idx, content in enumerate(images):
+        tile = _decode_downscaled(content, cell)
+        col, row = idx % cols, idx // cols
+        composite.paste(
+            tile,
+            (col * cell + (cell - tile.width) // 2, row * cell + (cell - tile.height) // 2),
+        )
+    return _encode_jpeg(composite, quality)
+
+
+def parse_image_variants(raw) -> list[dict]:
+    """Read a claim row's ``image_variants`` column (JSON text or already-decoded list)."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    if not isinstance(raw, list):
+        return []
+    return [v for v in raw if isinstance(v, dict)]
+
+
+def inference_urls(image_urls: list[str], image_variants: list[dict]) -> list[str]:
+    """Map each original URL to its inference variant, keeping the original when there is none."""
+    by_original = {
+        v["original"]: v["inference"]
+        for v in image_variants
+        if v.get("original") and v.get("inference")
+    }
+    return [by_original.get(url, url) for url in image_urls]
@@ -0,0 +1,201 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+import httpx
+import jwt
+from app.config import settings
+from app.utils.http_clients import SUPABASE_AUTH, http_clients
+from app.utils.logger import logger
+
+
+class TokenVerificationError(Exception):
+    """Raised when an access token cannot be verified."""
+
+
+class JWTVerifier:
+    """Verify Supabase access tokens locally and cache the resulting user claims.
+
+    HS256 tokens are checked against ``SUPABASE_JWT_SECRET``; asymmetric tokens
+    (RS256/ES256) against the project's JWKS, which is fetched once and cached.
+    Verified tokens are cached until their ``exp`` so repeat requests cost a
+    dict lookup. When a token cannot be verified locally (no secret, JWKS
+    unavailable) the verifier falls back to asking GoTrue.
+    """
+
+    ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+    REMOTE_RESULT_TTL_SECONDS = 60
+    JWKS_MIN_REFRESH_SECONDS = 30
+
+    def __init__(
+        self,
+        jwt_secret: Optional[str] = None,
+        audience: str = "authenticated",
+        jwks_url: Optional[str] = None,
+        jwks_ttl_seconds: float = 600,
+        cache_size: int = 4096,
+        revocation_check_seconds: float = 0,
+        leeway_seconds: float = 0,
+    ):
+        self.jwt_secret = jwt_secret
+        self.audience = audience
+        self.jwks_url = jwks_url
+        self.jwks_ttl_seconds = jwks_ttl_seconds
+        self.cache_size = cache_size
+        self.revocation_check_seconds = revocation_check_seconds
+        self.leeway_seconds = leeway_seconds
+
+        # token -> (user, exp, last_remote_check)
+        self._cache: "OrderedDict[str, tuple[dict, float, float]]" = OrderedDict()
+        self._jwks: dict[str, jwt.PyJWK] = {}
+        self._jwks_time: float = 0
+
+    async def verify(self, token: str) -> dict:
+        """Return the user dict for a valid token or raise TokenVerificationError."""
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None:
+            user, exp, last_check = cached
+            if exp <= now:
+                self._cache.pop(token, None)
+                raise TokenVerificationError("Token has expired")
+            if self.revocation_check_seconds and now - last_check >= self.revocation_check_seconds:
+                await self._check_revocation(token)
+                self._cache[token] = (user, exp, now)
+            self._cache.move_to_end(token)
+            return user
+
+        claims = await self._decode(token)
+        if claims is None:
+            # Could not verify locally; ask GoTrue and cache the answer briefly
+            user = await self._fetch_remote_user(token)
+            exp = now + (self.revocation_check_seconds or self.REMOTE_RESULT_TTL_SECONDS)
+            unverified_exp = self._unverified_exp(token)
+            if unverified_exp is not None:
+                exp = min(exp, unverified_exp)
+        else:
+            user = self._user_from_claims(claims)
+            exp = float(claims["exp"])
+
+        self._store(token, user, exp, now)
+        return user
+
+    def invalidate(self, token: str) -> None:
+        self._cache.pop(token, None)
+
+    def _store(self, token: str, user: dict, exp: float, checked_at: float) -> None:
+        self._cache[token] = (user, exp, checked_at)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _decode(self, token: str) -> dict | None:
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed token: {e}") from e
+
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                return None
+            key = self.jwt_secret
+        elif algorithm in self.ASYMMETRIC_ALGORITHMS:
+            key = await self._get_signing_key(header.get("kid"))
+            if key is None:
+                return None
+        else:
+            raise TokenVerificationError(f"Unsupported token algorithm: {algorithm}")
+
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                leeway=self.leeway_seconds,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(str(e)) from e
+
+    @staticmethod
+    def _unverified_exp(token: str) -> float | None:
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+            return float(exp) if exp is not None else None
+        except (jwt.PyJWTError, TypeError, ValueError):
+            return None
+
+    async def _get_signing_key(self, kid: Optional[str]):
+        if not self.jwks_url or not kid:
+            return None
+
+        now = time.time()
+        age = now - self._jwks_time
+        stale = age > self.jwks_ttl_seconds
+        # Unknown kids trigger a refresh (key rotation), but never more than
+        # once per JWKS_MIN_REFRESH_SECONDS so forged kids can't hammer GoTrue.
+        unknown_kid = kid not in self._jwks and age > self.JWKS_MIN_REFRESH_SECONDS
+        if stale or unknown_kid:
+            self._jwks_time = now
+            try:
+                r = await http_clients.get(SUPABASE_AUTH).get(self.jwks_url, timeout=10)
+                r.raise_for_status()
+                key_set = jwt.PyJWKSet.from_dict(r.json())
+                self._jwks = {k.key_id: k for k in key_set.keys if k.key_id}
+                logger.info(f"JWKS refreshed: {len(self._jwks)} signing keys")
+            except Exception as e:
+                logger.warning(f"JWKS fetch failed, falling back to remote token check: {e}")
+                return None
+
+        jwk = self._jwks.get(kid)
+        return jwk.key if jwk else None
+
+    async def _check_revocation(self, token: str) -> None:
+        try:
+            await self._fetch_remote_user(token)
+        except TokenVerificationError:
+            self._cache.pop(token, None)
+            raise
+        except Exception as e:
+            # GoTrue being unreachable should not lock out every user
+            logger.warning(f"Token revocation check failed, keeping cached verification: {e}")
+
+    async def _fetch_remote_user(self, token: str) -> dict:
+        from app.db.supabase_client import supabase_auth_get_user
+
+        try:
+            data = await supabase_auth_get_user(token)
+        except httpx.HTTPStatusError as e:
+            raise TokenVerificationError("Invalid or expired token") from e
+
+        return self._user_dict(data.get("id"), data)
+
+    @classmethod
+    def _user_from_claims(cls, claims: dict) -> dict:
+        return cls._user_dict(claims["sub"], claims)
+
+    @staticmethod
+    def _user_dict(user_id: str, data: dict) -> dict:
+        # The role must come from app_metadata: users can edit their own user_metadata
+        app_metadata = data.get("app_metadata") or {}
+        user_metadata = data.get("user_metadata") or {}
+        return {
+            "id": user_id,
+            "email": data.get("email"),
+            "role": app_metadata.get("role", "user"),
+            "name": user_metadata.get("name", ""),
+        }
+
+
+jwt_verifier = JWTVerifier(
+    jwt_secret=settings.SUPABASE_JWT_SECRET,
+    audience=settings.SUPABASE_JWT_AUDIENCE,
+    jwks_url=settings.SUPABASE_JWKS_URL or (
+        f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json" if settings.SUPABASE_URL else None
+    ),
+    jwks_ttl_seconds=settings.AUTH_JWKS_CACHE_SECONDS,
+    cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    revocation_check_seconds=settings.AUTH_REVOCATION_CHECK_SECONDS,
+    leeway_seconds=settings.AUTH_JWT_LEEWAY_SECONDS,
+)
@@ -0,0 +1,167 @@
+import asyncio
+import io
+import tempfile
+import threading
+from typing import AsyncIterator, BinaryIO
+from fastapi import UploadFile
+from PIL import Image
+from app.utils.constants import (
+    MAX_IMAGE_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_SPOOL_THRESHOLD,
+)
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+FORMAT_TO_CONTENT_TYPE = {"JPEG": "image/jpeg", "PNG": "image/png"}
+
+# JPEG dimensions sit after the APP segments (EXIF, ICC, maker notes); give up
+# if the header still hasn't parsed after this many bytes.
+HEADER_SNIFF_LIMIT = 512 * 1024
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Content type from the file signature, or None for anything but JPEG/PNG."""
+    if head.startswith(JPEG_MAGIC):
+        return "image/jpeg"
+    if head.startswith(PNG_MAGIC):
+        return "image/png"
+    return None
+
+
+class _SpoolReader(io.RawIOBase):
+    """Read-only view with its own position over a shared spool."""
+
+    def __init__(self, image: "SpooledImage"):
+        self._image = image
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._image._read_at(self._pos, len(buffer))
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = self._image.size + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class SpooledImage:
+    """A validated image upload held in memory up to a threshold, on disk beyond it.
+
+    Several readers can consume it at once (e.g. streaming it to storage
+    while a worker thread decodes it); each gets its own position from
+    ``open()``.
+    """
+
+    def __init__(self, spool_threshold: int = UPLOAD_SPOOL_THRESHOLD):
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_threshold)
+        self._lock = threading.Lock()
+        self.size = 0
+        self.content_type: str | None = None
+        self.width = 0
+        self.height = 0
+
+    def _write(self, chunk: bytes) -> None:
+        self._spool.write(chunk)
+        self.size += len(chunk)
+
+    def _read_at(self, pos: int, n: int) -> bytes:
+        with self._lock:
+            self._spool.seek(pos)
+            return self._spool.read(n)
+
+    def open(self) -> BinaryIO:
+        return io.BufferedReader(_SpoolReader(self), buffer_size=UPLOAD_CHUNK_SIZE)
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        reader = self.open()
+        while chunk := await asyncio.to_thread(reader.read, UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    def read(self) -> bytes:
+        return self._read_at(0, self.size)
+
+    def close(self) -> None:
+        self._spool.close()
+
+
+def _identify(head: bytes) -> Image.Image | None:
+    """Parse the image header from a prefix of the file; None if more bytes are needed."""
+    try:
+        return Image.open(io.BytesIO(head))
+    except Image.DecompressionBombError as e:
+        raise ValueError(f"Image dimensions too large: {e}") from e
+    except Exception:
+        return None
+
+
+async def spool_image_stream(
+    chunks: AsyncIterator[bytes],
+    max_size: int = MAX_IMAGE_SIZE,
+    spool_threshold: int = UPLOAD_SPOOL_THRESHOLD,
+) -> SpooledImage:
+    """Consume an upload chunk by chunk, rejecting it as early as possible.
+
+    The signature is checked on the first bytes, the image header (format
+    and dimensions) as soon as it has arrived, and the size on every chunk.
+    Raises ``ValueError`` on rejection; memory use stays bounded by the
+    spool threshold and the header sniff limit.
+    """
+    image = SpooledImage(spool_threshold)
+    head = b""
+    identified = False
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            image._write(chunk)
+            if image.size > max_size:
+                raise ValueError(f"File size exceeds {max_size // (1024 * 1024)}MB limit.")
+            if identified:
+                continue
+
+            head += chunk
+            if len(head) >= len(PNG_MAGIC) and sniff_image_type(head) is None:
+                raise ValueError("Invalid file type. Only JPG/PNG accepted.")
+
+            parsed = _identify(head)
+            if parsed is not None:
+                content_type = FORMAT_TO_CONTENT_TYPE.get(parsed.format)
+                if content_type != sniff_image_type(head):
+                    raise ValueError("Invalid file type. Only JPG/PNG accepted.")
+                image.content_type = content_type
+                image.width, image.height = parsed.size
+                identified = True
+                head = b""
+            elif len(head) > HEADER_SNIFF_LIMIT:
+                raise ValueError("File is not a readable JPG/PNG image.")
+
+        if not identified:
+            raise ValueError("File is not a readable JPG/PNG image.")
+    except BaseException:
+        image.close()
+        raise
+
+    return image
+
+
+async def iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
@@ -0,0 +1,125 @@
+"""Microbenchmark: GCRA ASGI rate limiter vs the previous sliding-window middleware.
+
+Run from ``backend/``:
+
+    python -m benchmarks.rate_limiter_bench --requests 50000 --ips 20000
+
+Measures per-request overhead through a trivial Starlette app (no network)
+and the number of keys each limiter retains after a scan across many IPs.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from collections import defaultdict
+from fastapi import Request
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from app.middleware.rate_limit_backends import MemoryRateLimitBackend
+from app.middleware.rate_limiter import RateLimitMiddleware
+
+
+class LegacySlidingWindowMiddleware(BaseHTTPMiddleware):
+    """Copy of the previous timestamp-list limiter, kept here as a baseline."""
+
+    def __init__(self, app, requests_per_minute: int = 60):
+        super().__init__(app)
+        self.rpm = requests_per_minute
+        self.requests: dict = defaultdict(list)
+
+    async def dispatch(self, request: Request, call_next):
+        client_ip = request.client.host if request.client else "unknown"
+        now = time.time()
+        self.requests[client_ip] = [t for t in self.requests[client_ip] if now - t < 60]
+        if len(self.requests[client_ip]) >= self.rpm:
+            return JSONResponse(status_code=429, content={"error": "rate_limit_exceeded"})
+        self.requests[client_ip].append(now)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Remaining"] = str(self.rpm - len(self.requests[client_ip]))
+        return response
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+def _build(middleware_cls, **kwargs):
+    inner = Starlette(routes=[Route("/", _ok)])
+    return middleware_cls(inner, **kwargs)
+
+
+async def _drive(app, n_requests: int, n_ips: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(n_requests):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/",
+            "raw_path": b"/",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [],
+            "client": (f"10.{(i % n_ips) >> 16 & 255}.{(i % n_ips) >> 8 & 255}.{i % n_ips & 255}", 1234),
+            "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def _run(label: str, factory, state_size, n_requests: int, n_ips: int) -> None:
+    app = factory()
+    elapsed = asyncio.run(_drive(app, n_requests, n_ips))
+    keys = state_size(app)
+
+    # Separate pass for memory so tracemalloc does not skew the timings
+    tracemalloc.start()
+    asyncio.run(_drive(factory(), n_requests, n_ips))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<28} {elapsed / n_requests * 1e6:8.1f} us/req   "
+        f"keys retained: {keys:>7}   peak traced: {peak / 1024:8.0f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--ips", type=int, default=20000)
+    parser.add_argument("--rpm", type=int, default=60)
+    parser.add_argument("--max-keys", type=int, default=10000)
+    args = parser.parse_args()
+
+    _run(
+        "sliding window (legacy)",
+        lambda: _build(LegacySlidingWindowMiddleware, requests_per_minute=args.rpm),
+        lambda app: len(app.requests),
+        args.requests,
+        args.ips,
+    )
+    _run(
+        "GCRA ASGI",
+        lambda: _build(
+            RateLimitMiddleware,
+            requests_per_minute=args.rpm,
+            backend=MemoryRateLimitBackend(args.rpm, max_keys=args.max_keys),
+        ),
+        lambda app: len(app.backend.limiter),
+        args.requests,
+        args.ips,
+    )
+
+if __name__ == "__main__":
+    main()
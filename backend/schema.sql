@@ -45,6 +45,11 @@ CREATE TABLE IF NOT EXISTS claims (
 
 ALTER TABLE claims ADD COLUMN IF NOT EXISTS vehicle_company TEXT;
 ALTER TABLE claims ADD COLUMN IF NOT EXISTS vehicle_model TEXT;
+-- Per image: {"original", "inference", "thumbnail"} URLs, generated at upload time
+ALTER TABLE claims ADD COLUMN IF NOT EXISTS image_variants JSONB;
+-- pending while a deferred AI explanation is generated, then ready (or failed)
+ALTER TABLE claims ADD COLUMN IF NOT EXISTS explanation_status TEXT
+    CHECK (explanation_status IN ('pending', 'ready', 'failed'));
 
 -- ============================================
 -- Table: cost_table (reference data)
@@ -25,3 +25,35 @@ BEGIN
     LIMIT match_count;
 END;
 $$;
+
+-- Bulk write-back for the re-pricing / re-decision backfill (python -m app.jobs.backfill).
+-- updates: [{"id", "cost_breakdown", "cost_total", "decision", "decision_confidence", "risk_level"}]
+CREATE OR REPLACE FUNCTION backfill_claim_pricing(updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    updated_count INTEGER;
+BEGIN
+    UPDATE claims c
+    SET
+        cost_breakdown = u.cost_breakdown,
+        cost_total = u.cost_total,
+        decision = u.decision,
+        decision_confidence = u.decision_confidence,
+        risk_level = u.risk_level
+    FROM jsonb_to_recordset(updates) AS u(
+        id UUID,
+        cost_breakdown JSONB,
+        cost_total INTEGER,
+        decision TEXT,
+        decision_confidence FLOAT,
+        risk_level TEXT
+    )
+    WHERE c.id = u.id
+    AND c.status = 'processed';
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$;
@@ -0,0 +1,157 @@
+import asyncio
+import fakeredis
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.middleware.rate_limit_backends import (
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RedisRateLimitBackend,
+)
+from app.middleware.rate_limiter import RateLimitMiddleware
+
+
+def _memory_backend(requests_per_minute: int, burst: int) -> RateLimitBackend:
+    return MemoryRateLimitBackend(requests_per_minute, burst=burst)
+
+
+def _redis_backend(requests_per_minute: int, burst: int) -> RateLimitBackend:
+    return RedisRateLimitBackend(fakeredis.FakeAsyncRedis(), requests_per_minute, burst=burst)
+
+
+BACKENDS = [
+    pytest.param(_memory_backend, id="memory"),
+    pytest.param(_redis_backend, id="redis"),
+]
+
+
+def _hits(backend: RateLimitBackend, key: str, count: int, cost: int = 1) -> list:
+    async def run():
+        return [await backend.hit(key, cost) for _ in range(count)]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS)
+def test_allows_burst_then_denies(make_backend):
+    backend = make_backend(60, 3)
+    results = _hits(backend, "1.2.3.4", 4)
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert [remaining for _, remaining, _ in results[:3]] == [2, 1, 0]
+    assert results[3][1] == 0
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS)
+def test_retry_after_is_time_until_next_unit(make_backend):
+    # 60 rpm: one unit refills every second
+    backend = make_backend(60, 1)
+    (_, _, first_retry), (allowed, _, retry_after) = _hits(backend, "1.2.3.4", 2)
+
+    assert first_retry == 0
+    assert not allowed
+    assert 0.9 <= retry_after <= 1.0
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS)
+def test_cost_consumes_several_units(make_backend):
+    backend = make_backend(60, 10)
+    (allowed, remaining, _), = _hits(backend, "1.2.3.4", 1, cost=5)
+    assert allowed and remaining == 5
+
+    # A second cost-5 hit fits exactly; a third does not
+    (allowed, remaining, _), (denied, _, retry_after) = _hits(backend, "1.2.3.4", 2, cost=5)
+    assert allowed and remaining == 0
+    assert not denied
+    assert 4.9 <= retry_after <= 5.0
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS)
+def test_keys_are_independent(make_backend):
+    backend = make_backend(60, 1)
+    assert _hits(backend, "1.1.1.1", 1)[0][0]
+    assert _hits(backend, "2.2.2.2", 1)[0][0]
+    assert not _hits(backend, "1.1.1.1", 1)[0][0]
+
+
+def test_redis_backend_uses_shared_state():
+    client = fakeredis.FakeAsyncRedis()
+    worker_a = RedisRateLimitBackend(client, 60, burst=2)
+    worker_b = RedisRateLimitBackend(client, 60, burst=2)
+
+    assert _hits(worker_a, "1.2.3.4", 2)[-1][0]
+    # The second worker sees the budget the first one used up
+    assert not _hits(worker_b, "1.2.3.4", 1)[0][0]
+    assert not worker_a._degraded and not worker_b._degraded
+
+
+def test_redis_backend_falls_back_when_redis_fails():
+    class BrokenScript:
+        async def __call__(self, *args, **kwargs):
+            raise ConnectionError("redis down")
+
+    backend = RedisRateLimitBackend(fakeredis.FakeAsyncRedis(), 60, burst=1)
+    backend._script = BrokenScript()
+
+    assert _hits(backend, "1.2.3.4", 1)[0][0]
+    assert not _hits(backend, "1.2.3.4", 1)[0][0]
+    assert backend._degraded
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS)
+def test_middleware_applies_route_costs(make_backend):
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = RateLimitMiddleware(
+        Starlette(routes=[Route("/claims", ok, methods=["GET", "POST"])]),
+        requests_per_minute=60,
+        backend=make_backend(60, 6),
+        route_costs=[("POST", "/claims", 5)],
+    )
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            post = await client.post("/claims")
+            get = await client.get("/claims")
+            denied = await client.get("/claims")
+        return post, get, denied
+
+    post, get, denied = asyncio.run(run())
+    assert post.status_code == 200
+    assert post.headers["X-RateLimit-Remaining"] == "1"
+    assert get.status_code == 200
+    assert get.headers["X-RateLimit-Remaining"] == "0"
+    assert denied.status_code == 429
+    assert int(denied.headers["Retry-After"]) >= 1
+
+
+def test_middleware_exempts_only_loopback_clients_on_exempt_routes():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = RateLimitMiddleware(
+        Starlette(routes=[Route("/storage/{name}", ok), Route("/claims", ok)]),
+        requests_per_minute=60,
+        backend=MemoryRateLimitBackend(60, burst=1),
+        loopback_exempt_routes=[("GET", "/storage/*")],
+    )
+
+    async def statuses(client_ip: str, paths: list[str]) -> list[int]:
+        transport = httpx.ASGITransport(app=app, client=(client_ip, 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.get(path)).status_code for path in paths]
+
+    async def run():
+        loopback = await statuses("127.0.0.1", ["/storage/a", "/storage/a", "/storage/a"])
+        loopback_other = await statuses("::1", ["/claims", "/claims"])
+        remote = await statuses("203.0.113.7", ["/storage/a", "/storage/a"])
+        return loopback, loopback_other, remote
+
+    loopback, loopback_other, remote = asyncio.run(run())
+    assert loopback == [200, 200, 200]
+    assert loopback_other == [200, 429]
+    assert remote == [200, 429]
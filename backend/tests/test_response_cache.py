@@ -0,0 +1,77 @@
+import asyncio
+import fakeredis
+from app.services.response_cache import ClaimResponseCache
+
+
+def _cached(cache: ClaimResponseCache, claim_id: str = "c1", user_id: str = "u1"):
+    return asyncio.run(cache.get(claim_id, user_id))
+
+
+def _put(cache: ClaimResponseCache, claim_id: str = "c1", user_id: str = "u1"):
+    async def run():
+        version = await cache.version(claim_id)
+        return cache.put(claim_id, user_id, "2024-01-01T00:00:00", b"{}", version=version)
+
+    return asyncio.run(run())
+
+
+def test_invalidation_reaches_other_workers_through_redis():
+    client = fakeredis.FakeAsyncRedis()
+    worker_a = ClaimResponseCache(redis_client=client)
+    worker_b = ClaimResponseCache(redis_client=client)
+    _put(worker_a)
+    _put(worker_b)
+
+    asyncio.run(worker_a.invalidate("c1"))
+
+    assert _cached(worker_a) is None
+    assert _cached(worker_b) is None
+    # Entries read after the invalidation are served again
+    _put(worker_b)
+    assert _cached(worker_b) is not None
+
+
+def test_invalidation_racing_the_row_fetch_wins():
+    client = fakeredis.FakeAsyncRedis()
+    cache = ClaimResponseCache(redis_client=client)
+
+    async def run():
+        version = await cache.version("c1")
+        # Another worker rewrites the claim between the version read and the put
+        await ClaimResponseCache(redis_client=client).invalidate("c1")
+        cache.put("c1", "u1", "2024-01-01T00:00:00", b"{}", version=version)
+        return await cache.get("c1", "u1")
+
+    assert asyncio.run(run()) is None
+
+
+def test_invalidate_many_bumps_every_claim():
+    client = fakeredis.FakeAsyncRedis()
+    worker_a = ClaimResponseCache(redis_client=client)
+    worker_b = ClaimResponseCache(redis_client=client)
+    for claim_id in ("c1", "c2", "c3"):
+        _put(worker_b, claim_id)
+
+    asyncio.run(worker_a.invalidate_many(["c1", "c2"]))
+
+    assert _cached(worker_b, "c1") is None
+    assert _cached(worker_b, "c2") is None
+    assert _cached(worker_b, "c3") is not None
+
+
+def test_falls_back_to_local_entries_when_redis_fails():
+    class BrokenRedis:
+        async def get(self, key):
+            raise ConnectionError("redis down")
+
+        def pipeline(self, transaction=True):
+            raise ConnectionError("redis down")
+
+    cache = ClaimResponseCache(redis_client=BrokenRedis())
+    _put(cache)
+    assert _cached(cache) is not None
+    assert _cached(cache, user_id="u2") is None
+
+    asyncio.run(cache.invalidate("c1"))
+    assert _cached(cache) is None
+    assert cache._degraded
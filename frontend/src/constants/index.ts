@@ -118,3 +118,7 @@ export const UI_PERMISSIONS = {
 } as const;
 
 export const ITEMS_PER_PAGE_OPTIONS = [25, 50, 100] as const;
+
+// Claim detail polling while processing / generating the explanation; stops after the cap
+export const CLAIM_POLL_INTERVAL_MS = 2500;
+export const CLAIM_POLL_MAX_MS = 5 * 60 * 1000;
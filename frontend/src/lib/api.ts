@@ -194,6 +194,7 @@ export interface ClaimResponse {
   id: string;
   user_id: string;
   image_urls: string[];
+  thumbnail_urls?: (string | null)[];
   user_description?: string;
   policy_number: string;
   vehicle_company?: string;
@@ -202,6 +203,7 @@ export interface ClaimResponse {
   damage_zones?: DamageZone[];
   damage_severity_score?: number;
   ai_explanation?: string;
+  explanation_status?: 'pending' | 'ready' | 'failed';
   cost_breakdown?: CostBreakdown[];
   cost_total?: number;
   fraud_score?: number;
@@ -8,7 +8,12 @@ import { Badge } from "../../components/ui/Badge";
 import { EmptyState } from "../../components/ui/EmptyState";
 import { Skeleton } from "../../components/ui/Skeleton";
 import { RiskScoreGauge } from "../../components/domain/RiskScoreGauge";
-import { CLAIM_STATUS_MAP, DECISION_MAP } from "../../constants";
+import {
+  CLAIM_POLL_INTERVAL_MS,
+  CLAIM_POLL_MAX_MS,
+  CLAIM_STATUS_MAP,
+  DECISION_MAP,
+} from "../../constants";
 import { formatCurrency, formatDate } from "../../lib/utils";
 import { apiDownloadReport } from "../../lib/api";
 import type { ClaimDecision } from "../../types";
@@ -36,19 +41,33 @@ export function ClaimDetailPage() {
     "photos",
   );
 
+  const [pollTimedOut, setPollTimedOut] = useState(false);
+
   useEffect(() => {
+    setPollTimedOut(false);
     if (id) fetchClaim(id);
   }, [id, fetchClaim]);
 
+  // Keep polling after processing while the explanation is still being generated
+  const awaitingResult =
+    claim?.status === "processing" || claim?.explanation_status === "pending";
+
   useEffect(() => {
-    if (!id || !claim || claim.status !== "processing") return;
+    if (!id || !awaitingResult) return;
 
+    // Capped, so a claim stuck server-side doesn't keep the page polling forever
+    const startedAt = Date.now();
     const interval = setInterval(() => {
+      if (Date.now() - startedAt > CLAIM_POLL_MAX_MS) {
+        clearInterval(interval);
+        setPollTimedOut(true);
+        return;
+      }
       fetchClaim(id);
-    }, 2500);
+    }, CLAIM_POLL_INTERVAL_MS);
 
     return () => clearInterval(interval);
-  }, [id, claim?.status, fetchClaim]);
+  }, [id, awaitingResult, fetchClaim]);
 
   if (loading) {
     return (
@@ -448,13 +467,16 @@ export function ClaimDetailPage() {
           </Card>
 
           {/* AI Explanation */}
-          {claim.ai_explanation && (
+          {(claim.ai_explanation || claim.explanation_status === 'pending') && (
             <Card padding="md">
               <CardHeader>
                 <CardTitle>AI Damage Explanation</CardTitle>
               </CardHeader>
               <p className="text-sm text-gray-300 leading-relaxed whitespace-pre-wrap">
-                {claim.ai_explanation}
+                {claim.ai_explanation ||
+                  (pollTimedOut
+                    ? 'Still generating. Refresh the page to check again.'
+                    : 'Generating explanation…')}
               </p>
             </Card>
           )}
@@ -15,6 +15,7 @@ function toClaim(c: ClaimResponse): Claim {
     id: c.id,
     user_id: c.user_id,
     image_urls: c.image_urls,
+    thumbnail_urls: c.thumbnail_urls,
     user_description: c.user_description,
     policy_number: c.policy_number,
     vehicle_company: c.vehicle_company,
@@ -23,6 +24,7 @@ function toClaim(c: ClaimResponse): Claim {
     damage_zones: c.damage_zones as Claim["damage_zones"],
     damage_severity_score: c.damage_severity_score,
     ai_explanation: c.ai_explanation,
+    explanation_status: c.explanation_status,
     cost_breakdown: c.cost_breakdown as Claim["cost_breakdown"],
     cost_total: c.cost_total,
     fraud_score: c.fraud_score,
@@ -50,6 +50,7 @@ export interface Claim {
   id: string;
   user_id: string;
   image_urls: string[];
+  thumbnail_urls?: (string | null)[];
   user_description?: string;
   policy_number: string;
   vehicle_company?: string;
@@ -58,6 +59,7 @@ export interface Claim {
   damage_zones?: DamageZone[];
   damage_severity_score?: number;
   ai_explanation?: string;
+  explanation_status?: 'pending' | 'ready' | 'failed';
   cost_breakdown?: CostBreakdown[];
   cost_total?: number;
   fraud_score?: number;